@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from celery.signals import worker_process_shutdown, worker_shutdown
+
+from .settings import get_settings
+from .task_dispatcher import DispatchingTask
+from .worker_metrics import record_task_run
+
+settings = get_settings()
+
+
+class EventLoopThread:
+    """
+    Description
+    -----------
+    A single asyncio event loop running in a background thread of the
+    current worker process. Coroutines submitted from Celery's pool
+    threads are run concurrently on it, up to `concurrency` at a time.
+    """
+
+    def __init__(self, concurrency: int) -> None:
+        self._concurrency = concurrency
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._slots: threading.BoundedSemaphore | None = None
+        self._pid: int | None = None
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        # Prefork children inherit the parent's memory but not its threads,
+        # so the loop is started lazily, once per process
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._slots = threading.BoundedSemaphore(self._concurrency)
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="celery-asyncio", daemon=True
+                )
+                self._thread.start()
+                self._pid = os.getpid()
+            return self._loop
+
+    def submit(self, coro) -> Future:
+        """
+        Schedule `coro` on the loop and return a concurrent Future for its result.
+        Blocks the caller while `concurrency` coroutines are already in flight,
+        so the broker stops handing this process new messages when it's saturated.
+        """
+        loop = self._ensure_started()
+        self._slots.acquire()
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self, timeout: float = 30.0) -> None:
+        """Wait for in-flight coroutines to finish, then stop the loop."""
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                return
+            loop, thread = self._loop, self._thread
+            self._loop = None
+
+        async def _drain():
+            pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            if pending:
+                await asyncio.wait(pending, timeout=timeout)
+
+        asyncio.run_coroutine_threadsafe(_drain(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+
+
+io_loop = EventLoopThread(settings.CELERY_ASYNC_IO_CONCURRENCY)
+
+
+def _record_detached_run(task_name: str, started_at: float):
+    def _callback(future: Future) -> None:
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is not None:
+            logging.error("Task %s failed", task_name, exc_info=exc)
+        record_task_run(task_name, time.perf_counter() - started_at, "SUCCESS" if exc is None else "FAILURE")
+
+    return _callback
+
+
+class AsyncIOTask(DispatchingTask):
+    """
+    Description
+    -----------
+    Celery task base for tasks whose body is an `async def`.
+
+    The coroutine is run on the worker process's `io_loop`. By default the
+    task waits for it to finish, just like a regular task. With
+    `CELERY_ASYNC_IO_TASKS` enabled it returns as soon as the coroutine is
+    scheduled, so a single pool slot can keep hundreds of I/O-bound tasks
+    in flight (results are not tracked anyway, see celery_app.py).
+    """
+
+    def __call__(self, *args, **kwargs):
+        # Task.__call__ pushes the request context and calls `run`, which
+        # returns a coroutine here rather than executing the body
+        future = io_loop.submit(super().__call__(*args, **kwargs))
+
+        if settings.CELERY_ASYNC_IO_TASKS:
+            # The worker's task_postrun comes before the coroutine is done (see worker_metrics.py)
+            self.request.detached = True
+            future.add_done_callback(_record_detached_run(self.name, time.perf_counter()))
+            return None
+
+        return future.result()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _drain_io_loop(**kwargs) -> None:
+    io_loop.shutdown()
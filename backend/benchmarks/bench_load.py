@@ -0,0 +1,319 @@
+"""
+Load test: simulated households going through the app's real flows, with
+throughput and latency per route.
+
+Each household runs concurrently with the others:
+
+- the admin and every member register, verify their email and log in
+- the admin creates a group and invites the members, who join it
+- the admin creates chores for each member and a weekly recurring chore
+- then, for a number of rounds, everyone loads the dashboard, their group,
+  the chore list and what changed since their last sync, and completes
+  one of their chores
+
+The API runs in this process with TASK_BACKEND=inprocess. Emails are caught
+in an in-memory outbox rather than sent, which is also how the simulated
+users get their verification and invite links. By default MongoDB is
+replaced by mongomock. `--database mongodb` uses MONGO_URI instead (point
+DB_NAME at a throwaway database). Requests go through httpx's ASGI
+transport, or `--transport socket` over HTTP to a uvicorn server on
+localhost.
+
+Prints requests per second and p50/p95/p99 per route, and with `--output`
+writes them as JSON to diff between releases.
+
+Run from the repository root (the usual settings environment variables must be set):
+
+    python -m backend.benchmarks.bench_load [--households 10] [--members 3] [--rounds 5] [--output report.json]
+"""
+import os
+
+# Tasks (and the emails they send) have to run in this process, before settings are read
+os.environ["TASK_BACKEND"] = "inprocess"
+os.environ.setdefault("CELERY_BROKER_URL", "memory://")
+
+import argparse
+import asyncio
+import json
+import re
+import secrets
+import sys
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+import httpx
+import mongomock
+import uvicorn
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.collection import Collection
+from pymongo.database import Database
+
+from backend import celery_worker  # noqa: F401 (the tasks' module, whose collections and senders are replaced)
+from backend.helpers import helper_email
+from backend.main import app
+from backend.settings import get_settings
+
+settings = get_settings()
+
+PASSWORD = "load-test-password-123"
+VERIFICATION_LINK = re.compile(r"email_verification_token=([\w-]+)")
+INVITE_LINK = re.compile(r"invite_token=([\w-]+)")
+
+
+class LoadTestError(Exception):
+    """A request in a household's flow didn't get the response it needed."""
+
+
+class Outbox:
+    """Emails the tasks sent, by recipient, in place of the SMTP server."""
+
+    def __init__(self) -> None:
+        self._messages: dict[str, list[str]] = defaultdict(list)
+
+    def send_email(self, receiver_email: str, subject: str, body: str) -> None:
+        self._messages[receiver_email].append(body)
+
+    async def send_email_async(self, receiver_email: str, subject: str, body: str) -> None:
+        self.send_email(receiver_email, subject, body)
+
+    async def wait_for_link(self, email: str, link: re.Pattern, timeout: float = 30.0) -> str:
+        """The token in the first email to `email` with a `link`, once it has been sent (and removes that email)."""
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            for body in self._messages[email]:
+                match = link.search(body)
+                if match is not None:
+                    self._messages[email].remove(body)
+                    return match[1]
+            await asyncio.sleep(0.01)
+        raise LoadTestError(f"No email with {link.pattern} for {email} after {timeout}s")
+
+
+def use_mongomock() -> None:
+    """Points every module's database and collections at one in-memory mongomock database."""
+    sync_client = mongomock.MongoClient()
+    async_database = AsyncMongoMockClient(mock_mongo_client=sync_client)[settings.DB_NAME]
+    sync_database = sync_client[settings.DB_NAME]
+
+    for module in [module for name, module in sys.modules.items() if name.startswith("backend.")]:
+        for name, value in list(vars(module).items()):
+            if isinstance(value, AsyncDatabase):
+                setattr(module, name, async_database)
+            elif isinstance(value, AsyncCollection):
+                setattr(module, name, async_database[value.name])
+            elif isinstance(value, Database):
+                setattr(module, name, sync_database)
+            elif isinstance(value, Collection):
+                setattr(module, name, sync_database[value.name])
+
+
+def use_outbox(outbox: Outbox) -> None:
+    """Replaces the email senders every module imported with the outbox's."""
+    for module in [module for name, module in sys.modules.items() if name.startswith("backend.")]:
+        if module is helper_email:
+            continue
+        for name in ("send_email", "send_email_async"):
+            if getattr(module, name, None) is getattr(helper_email, name):
+                setattr(module, name, getattr(outbox, name))
+
+
+class Recorder:
+    """Latency of every request, by route template."""
+
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def request(self, client: httpx.AsyncClient, method: str, route: str, url: str | None = None,
+                      expected: tuple[int, ...] = (200, 201), **kwargs) -> httpx.Response:
+        """Makes a request to `url` (default: `route`), recorded under `METHOD route`."""
+        start = time.perf_counter()
+        response = await client.request(method, url or route, **kwargs)
+        self.latencies[f"{method} {route}"].append(time.perf_counter() - start)
+        if response.status_code not in expected:
+            self.errors[f"{method} {route}"] += 1
+            raise LoadTestError(f"{method} {url or route} returned {response.status_code}: {response.text[:200]}")
+        return response
+
+    def report(self, duration: float) -> dict:
+        routes = {}
+        for route, latencies in sorted(self.latencies.items()):
+            latencies = sorted(latencies)
+            routes[route] = {
+                "count": len(latencies),
+                "errors": self.errors.get(route, 0),
+                "rps": round(len(latencies) / duration, 1),
+                "p50_ms": percentile_ms(latencies, 0.5),
+                "p95_ms": percentile_ms(latencies, 0.95),
+                "p99_ms": percentile_ms(latencies, 0.99),
+                "max_ms": round(latencies[-1] * 1000, 1),
+            }
+        total = sum(route["count"] for route in routes.values())
+        return {
+            "duration_s": round(duration, 2),
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "rps": round(total / duration, 1),
+            "routes": routes,
+        }
+
+
+def percentile_ms(sorted_latencies: list[float], quantile: float) -> float:
+    # Nearest rank, like the latency summaries in backend/metrics.py
+    return round(sorted_latencies[min(len(sorted_latencies) - 1, int(quantile * len(sorted_latencies)))] * 1000, 1)
+
+
+class Household:
+    def __init__(self, name: str, members: int, recorder: Recorder, outbox: Outbox, new_client) -> None:
+        self.name = name
+        self.usernames = [f"{name}user{i}" for i in range(members + 1)]
+        self.recorder = recorder
+        self.outbox = outbox
+        self.clients = {username: new_client() for username in self.usernames}
+
+    @property
+    def admin(self) -> str:
+        return self.usernames[0]
+
+    async def request(self, username: str, method: str, route: str, **kwargs) -> httpx.Response:
+        return await self.recorder.request(self.clients[username], method, route, **kwargs)
+
+    async def sign_up(self, username: str) -> None:
+        email = f"{username}@example.com"
+        await self.request(username, "POST", "/auth/register", data={
+            "username": username, "password": PASSWORD, "email": email, "full_name": f"Load Test {username}",
+        })
+        token = await self.outbox.wait_for_link(email, VERIFICATION_LINK)
+        await self.request(username, "POST", "/auth/verify-email", data={"email_verification_token": token})
+        await self.request(username, "POST", "/auth/login", data={"username": username, "password": PASSWORD})
+
+    async def join(self, username: str) -> None:
+        email = f"{username}@example.com"
+        await self.request(self.admin, "POST", "/groups/invite-user", data={"email": email})
+        token = await self.outbox.wait_for_link(email, INVITE_LINK)
+        await self.request(username, "POST", "/groups/join-group", data={"invite_token": token})
+
+    async def set_up(self, chores_per_member: int) -> None:
+        await asyncio.gather(*(self.sign_up(username) for username in self.usernames))
+        await self.request(self.admin, "POST", "/groups/create-group", data={"group_name": f"{self.name} home"})
+        await asyncio.gather(*(self.join(username) for username in self.usernames[1:]))
+
+        for username in self.usernames:
+            for i in range(chores_per_member):
+                await self.request(self.admin, "POST", "/chores/create-chore", data={
+                    "chore_name": f"Chore {i} for {username}",
+                    "chore_description": "Part of the load test",
+                    "assigned_username": username,
+                })
+        await self.request(self.admin, "POST", "/chores/recurring-chores/", data={
+            "chore_name": "Take out the trash",
+            "chore_description": "Every week, in turn",
+            "assigned_usernames": self.usernames,
+            "rrule_str": "FREQ=WEEKLY;BYDAY=TU",
+            "start_date_str": "2026-01-06T18:00:00Z",
+        })
+
+    async def member_round(self, username: str, revision: int) -> int:
+        """One visit to the app: what a member does when they open it. Returns their new sync revision."""
+        await self.request(username, "GET", "/dashboard")
+        await self.request(username, "GET", "/groups/my-group")
+        chores = (await self.request(username, "GET", "/chores/chores", params={"limit": 20})).json()
+        revision = (await self.request(username, "GET", "/chores/changes", params={"since": revision})).json()["revision"]
+
+        mine = [chore for chore in chores if not chore["is_completed"] and chore["assigned_user_id"] is not None]
+        if mine:
+            chore_id = mine[0]["_id"]
+            await self.request(username, "POST", "/chores/complete-chore/{chore_id}", url=f"/chores/complete-chore/{chore_id}")
+        return revision
+
+    async def run(self, rounds: int, chores_per_member: int) -> None:
+        await self.set_up(chores_per_member)
+        revisions = dict.fromkeys(self.usernames, 0)
+        for _ in range(rounds):
+            results = await asyncio.gather(*(self.member_round(username, revisions[username]) for username in self.usernames))
+            revisions = dict(zip(self.usernames, results))
+
+    async def close(self) -> None:
+        await asyncio.gather(*(client.aclose() for client in self.clients.values()))
+
+
+@asynccontextmanager
+async def serve(transport: str, port: int):
+    """Runs the app (and its lifespan) and yields a factory for clients of it."""
+    if transport == "asgi":
+        async with app.router.lifespan_context(app):
+            yield lambda: httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=60)
+        return
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        yield lambda: httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60)
+    finally:
+        server.should_exit = True
+        await server_task
+
+
+async def run(args: argparse.Namespace) -> dict:
+    outbox = Outbox()
+    use_outbox(outbox)
+    if args.database == "mongomock":
+        use_mongomock()
+
+    recorder = Recorder()
+    run_id = secrets.token_hex(3)
+    async with serve(args.transport, args.port) as new_client:
+        households = [Household(f"lt{run_id}h{i}", args.members, recorder, outbox, new_client) for i in range(args.households)]
+        start = time.perf_counter()
+        results = await asyncio.gather(*(household.run(args.rounds, args.chores) for household in households), return_exceptions=True)
+        duration = time.perf_counter() - start
+        await asyncio.gather(*(household.close() for household in households))
+
+    failures = [result for result in results if isinstance(result, BaseException)]
+    for failure in failures:
+        print(f"Household failed: {failure!r}", file=sys.stderr)
+
+    return {
+        "transport": args.transport,
+        "database": args.database,
+        "households": args.households,
+        "members": args.members,
+        "rounds": args.rounds,
+        "chores_per_member": args.chores,
+        "failed_households": len(failures),
+        **recorder.report(duration),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--households", type=int, default=10, help="households running at the same time")
+    parser.add_argument("--members", type=int, default=3, help="members per household besides the admin")
+    parser.add_argument("--rounds", type=int, default=5, help="times each member opens the app after setting up")
+    parser.add_argument("--chores", type=int, default=3, help="chores created per member")
+    parser.add_argument("--transport", choices=("asgi", "socket"), default="asgi")
+    parser.add_argument("--port", type=int, default=8765, help="port of the uvicorn server with --transport socket")
+    parser.add_argument("--database", choices=("mongomock", "mongodb"), default="mongomock")
+    parser.add_argument("--output", help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+
+    print(f"{report['requests']} requests in {report['duration_s']} s, {report['rps']} req/s, {report['errors']} errors")
+    print(f"  {'route':<42} {'count':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for route, stats in report["routes"].items():
+        print(f"  {route:<42} {stats['count']:>6} {stats['rps']:>7} {stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+            file.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Times validating Mongo documents into the API models, comparing the
+`PyObjectId` fields in backend/models.py with the per-field
+`mode="before"` validators the models used to have (reproduced below).
+
+Run from the repository root (the usual settings environment variables must be set):
+
+    python -m backend.benchmarks.bench_models [--docs 10000] [--repeat 20]
+"""
+import argparse
+import datetime
+import time
+
+from bson.objectid import ObjectId
+from pydantic import BaseModel, Field, field_validator
+
+from backend.models import Chore, Group, User
+
+
+def _to_str(v):
+    if v is None:
+        return v
+    try:
+        return str(v)
+    except Exception:
+        return v
+
+
+def _to_str_list(v):
+    if v is None:
+        return []
+    try:
+        return [str(item) for item in v]
+    except Exception:
+        return v
+
+
+class LegacyUser(BaseModel):
+    id: str | None = Field(default=None, serialization_alias="_id", validation_alias="_id")
+    username: str
+    email: str | None = None
+    full_name: str | None = None
+    email_verified: bool = False
+    profile_picture_url: str | None = None
+    group_ids: list[str] = Field(default_factory=list)
+
+    _convert_object_id = field_validator("id", mode="before")(_to_str)
+    _convert_group_ids = field_validator("group_ids", mode="before")(_to_str_list)
+
+
+class LegacyGroup(BaseModel):
+    id: str | None = Field(default=None, serialization_alias="_id", validation_alias="_id")
+    group_name: str = Field(..., min_length=5, max_length=35)
+    group_admin_id: str
+    group_admin_username: str
+    users_in_group: list[str] = Field(default_factory=list)
+    created_at: datetime.datetime | None = None
+
+    _convert_object_id = field_validator("id", "group_admin_id", mode="before")(_to_str)
+    _convert_user_ids = field_validator("users_in_group", mode="before")(_to_str_list)
+
+
+class LegacyChore(BaseModel):
+    id: str | None = Field(default=None, serialization_alias="_id", validation_alias="_id")
+    group_id: str | None = Field(default=None, serialization_alias="group_id", validation_alias="group_id")
+    chore_name: str
+    chore_description: str
+    assigned_user_id: str
+    is_completed: bool = False
+    created_at: datetime.datetime
+    completed_at: datetime.datetime | None = None
+    recurring_chore_id: str | None = Field(
+        default=None, serialization_alias="recurring_chore_id", validation_alias="recurring_chore_id"
+    )
+
+    _convert_object_id = field_validator(
+        "id", "group_id", "assigned_user_id", "recurring_chore_id", mode="before"
+    )(_to_str)
+
+
+def make_documents(count: int) -> dict[str, list[dict]]:
+    """User, group and chore documents as returned by Mongo."""
+    now = datetime.datetime(2026, 1, 1, 12, 0, 0)
+    users = [ObjectId() for _ in range(6)]
+    groups = [ObjectId() for _ in range(3)]
+
+    return {
+        "user": [
+            {
+                "_id": ObjectId(),
+                "username": f"user{i}",
+                "email": f"user{i}@example.com",
+                "full_name": "Some User",
+                "email_verified": True,
+                "hashed_password": "$argon2id$...",
+                "group_ids": groups[: i % 3 + 1],
+            }
+            for i in range(count)
+        ],
+        "group": [
+            {
+                "_id": ObjectId(),
+                "group_name": f"Household {i}",
+                "group_admin_id": users[0],
+                "group_admin_username": "user0",
+                "users_in_group": users,
+                "created_at": now,
+            }
+            for i in range(count)
+        ],
+        "chore": [
+            {
+                "_id": ObjectId(),
+                "group_id": groups[0],
+                "chore_name": f"Chore {i}",
+                "chore_description": "Take out the trash and recycling",
+                "assigned_user_id": users[i % len(users)],
+                "is_completed": False,
+                "created_at": now,
+                "completed_at": None,
+                "recurring_chore_id": groups[1] if i % 3 == 0 else None,
+            }
+            for i in range(count)
+        ],
+    }
+
+
+def validate_all(model: type[BaseModel], docs: list[dict]) -> float:
+    start = time.perf_counter()
+    for doc in docs:
+        model.model_validate(doc)
+    return time.perf_counter() - start
+
+
+def measure(legacy: type[BaseModel], current: type[BaseModel], docs: list[dict], repeat: int) -> tuple[float, float]:
+    """Best time of each model. Runs alternate between the two so machine noise hits both alike."""
+    legacy_timings, current_timings = [], []
+    for _ in range(repeat):
+        legacy_timings.append(validate_all(legacy, docs))
+        current_timings.append(validate_all(current, docs))
+    return min(legacy_timings), min(current_timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=10_000, help="documents per model")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per model")
+    args = parser.parse_args()
+
+    documents = make_documents(args.docs)
+    pairs = {"user": (LegacyUser, User), "group": (LegacyGroup, Group), "chore": (LegacyChore, Chore)}
+
+    print(f"model_validate x {args.docs}, best of {args.repeat} runs")
+    for name, (legacy, current) in pairs.items():
+        docs = documents[name]
+        # Both versions must validate to the same data
+        assert [legacy.model_validate(d).model_dump() for d in docs[:100]] == [
+            current.model_validate(d).model_dump() for d in docs[:100]
+        ], name
+
+        before, after = measure(legacy, current, docs, args.repeat)
+        print(f"  {name:<6} validators {before * 1000:8.2f} ms   PyObjectId {after * 1000:8.2f} ms  {before / after:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Compares ways of turning a page of chore documents into a JSON response body.
+
+- before: what GET /chores/chores used to do. ObjectIds are converted by hand,
+  then FastAPI validates the list against `list[Chore]`, dumps it to Python
+  objects and encodes it with the stdlib `json` module (JSONResponse)
+- type adapter: validate once with a pre-built TypeAdapter and let pydantic-core
+  write the JSON
+- fast path: `fast_json_response`, which leaves the documents as they are
+  and encodes them with orjson
+
+Run from the repository root (the usual settings environment variables must be set):
+
+    python -m backend.benchmarks.bench_serialization [--chores 10000] [--repeat 20]
+"""
+import argparse
+import datetime
+import json
+import statistics
+import time
+
+from bson.objectid import ObjectId
+
+from backend.helpers.helper_serialization import chore_list_adapter, chore_shape, fast_json_response
+from backend.models import Chore
+
+
+def make_chores(count: int) -> list[dict]:
+    """Chore documents as returned by Mongo, a third of them from a recurring schedule."""
+    group_id = ObjectId()
+    users = [ObjectId() for _ in range(5)]
+    recurring_chore_id = ObjectId()
+    now = datetime.datetime(2026, 1, 1, 12, 0, 0, 123000)
+
+    chores = []
+    for i in range(count):
+        chore = {
+            "_id": ObjectId(),
+            "group_id": group_id,
+            "chore_name": f"Chore {i}",
+            "chore_description": "Take out the trash and recycling",
+            "assigned_user_id": users[i % len(users)],
+            "is_completed": i % 2 == 0,
+            "created_at": now - datetime.timedelta(minutes=i),
+            "completed_at": now if i % 2 == 0 else None,
+        }
+        if i % 3 == 0:
+            chore["recurring_chore_id"] = recurring_chore_id
+        chores.append(chore)
+    return chores
+
+
+def before(docs: list[dict]) -> bytes:
+    for chore in docs:
+        chore["_id"] = str(chore["_id"])
+        chore["assigned_user_id"] = str(chore["assigned_user_id"])
+        if "recurring_chore_id" in chore and chore["recurring_chore_id"] is not None:
+            chore["recurring_chore_id"] = str(chore["recurring_chore_id"])
+
+    # FastAPI's serialize_response + JSONResponse.render
+    content = chore_list_adapter.dump_python(chore_list_adapter.validate_python(docs), mode="json", by_alias=True)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def type_adapter(docs: list[dict]) -> bytes:
+    return chore_list_adapter.dump_json(chore_list_adapter.validate_python(docs), by_alias=True)
+
+
+def fast_path(docs: list[dict]) -> bytes:
+    return fast_json_response(docs, chore_shape, chore_list_adapter).body
+
+
+def measure(encode, chores: list[dict], repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        # Every strategy gets fresh documents, like a fresh page from the database
+        docs = [dict(chore) for chore in chores]
+        start = time.perf_counter()
+        encode(docs)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chores", type=int, default=10_000, help="documents per response")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per strategy")
+    args = parser.parse_args()
+
+    chores = make_chores(args.chores)
+
+    # All strategies must produce the same response
+    expected = json.loads(before([dict(chore) for chore in chores]))
+    for encode in (type_adapter, fast_path):
+        assert json.loads(encode([dict(chore) for chore in chores])) == expected, encode.__name__
+    assert expected == [Chore.model_validate(chore).model_dump(mode="json", by_alias=True) for chore in chores]
+
+    print(f"{args.chores} chores, median of {args.repeat} runs")
+    baseline = None
+    for name, encode in (("before", before), ("type adapter", type_adapter), ("fast path", fast_path)):
+        median = statistics.median(measure(encode, chores, args.repeat))
+        baseline = baseline or median
+        print(f"  {name:<13} {median * 1000:8.2f} ms  {baseline / median:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
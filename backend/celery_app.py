@@ -10,6 +10,8 @@ celery_app = Celery(
     # skipcq: PY-W0069
     #backend=settings.CELERY_RESULT_BACKEND, # Don't need to keep track of results
     include=["backend.celery_worker"],
+    # Lets TASK_BACKEND=inprocess run tasks without a broker
+    task_cls="backend.task_dispatcher:DispatchingTask",
 )
 
 celery_app.conf.update(
@@ -19,6 +21,18 @@ celery_app.conf.update(
             'task': 'backend.celery_worker.process_recurring_chores',
             'schedule': 300.0 # Run every 5 minutes
         },
+        'stamp-pending-revisions-every-10-minutes': {
+            'task': 'backend.celery_worker.stamp_pending_revisions',
+            'schedule': 600.0
+        },
+        'expire-chore-tombstones-every-hour': {
+            'task': 'backend.celery_worker.expire_chore_tombstones',
+            'schedule': 3600.0
+        },
+        'remove-orphaned-groups-every-hour': {
+            'task': 'backend.celery_worker.remove_orphaned_groups',
+            'schedule': 3600.0
+        },
     },
 )
 
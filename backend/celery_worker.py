@@ -1,19 +1,24 @@
-import base64
 import io
 import logging
-import secrets
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from dateutil.rrule import rrulestr
 
 import boto3
 from PIL import Image
 from botocore.client import Config
 
+from .async_tasks import AsyncIOTask
 from .celery_app import celery_app
-from .helpers.helper_email import send_email
+from .events import hub
+from .helpers.helper_email import send_email, send_email_async
+from .helpers.helper_auth import user_reads
+from .helpers.helper_groups import PENDING_REVISION, group_reads, unstamped
+from .helpers.helper_tokens import new_token
+from .metrics import command_listener
 from .models import User
 from .settings import get_settings
-from pymongo import MongoClient
+from .tracing import trace_boto_client
+from pymongo import AsyncMongoClient, MongoClient, ReturnDocument
 
 from bson.objectid import ObjectId
 
@@ -29,6 +34,7 @@ GROUPS_COLLECTION = settings.GROUPS_COLLECTION
 GROUP_INVITES_COLLECTION = settings.GROUP_INVITES_COLLECTION
 CHORES_COLLECTION = settings.CHORES_COLLECTION
 RECURRING_CHORES_COLLECTION = settings.RECURRING_CHORES_COLLECTION
+CHORE_TOMBSTONES_COLLECTION = settings.CHORE_TOMBSTONES_COLLECTION
 
 # S3 config
 S3_ENDPOINT = settings.S3_ENDPOINT
@@ -37,10 +43,13 @@ S3_SECRET_KEY = settings.S3_SECRET_KEY
 S3_BUCKET_NAME = settings.S3_BUCKET_NAME
 PFP_SIZE = (256, 256)
 
+# Groups younger than this may still be getting their admin added (see POST /groups/create-group)
+ORPHANED_GROUP_GRACE_PERIOD = timedelta(hours=1)
+
 
 # Initialize MongoDB client
 # Note: Celery workers should use a synchronous MongoDB client
-client = MongoClient(MONGO_URI)
+client = MongoClient(MONGO_URI, event_listeners=[command_listener])
 _db = client[DB_NAME]
 users_coll = _db[USERS_COLLECTION]
 password_reset_coll = _db[PASSWORD_RESET_COLLECTION]
@@ -49,6 +58,14 @@ groups_coll = _db[GROUPS_COLLECTION]
 group_invites_coll = _db[GROUP_INVITES_COLLECTION]
 chores_coll = _db[CHORES_COLLECTION]
 recurring_chores_coll = _db[RECURRING_CHORES_COLLECTION]
+chore_tombstones_coll = _db[CHORE_TOMBSTONES_COLLECTION]
+
+# I/O-bound tasks (base=AsyncIOTask) run as coroutines on the worker's
+# event loop, so they get their own asynchronous client
+async_client = AsyncMongoClient(MONGO_URI, event_listeners=[command_listener])
+_async_db = async_client[DB_NAME]
+async_email_verification_coll = _async_db[EMAIL_VERIFICATION_COLLECTION]
+async_group_invites_coll = _async_db[GROUP_INVITES_COLLECTION]
 
 # Initialize S3 client
 s3_client = boto3.client(
@@ -58,6 +75,7 @@ s3_client = boto3.client(
     aws_secret_access_key=S3_SECRET_KEY,
     config=Config(s3={"addressing_style": "path"}),
 )
+trace_boto_client(s3_client)
 
 
 @celery_app.task
@@ -126,6 +144,8 @@ def upload_pfp_task(user_dict: dict, pfp_data: bytes):
             logging.warning("Failed to delete newly uploaded S3 object after DB update failed.")
         return
 
+    # Only has an effect when run by the in-process dispatcher, in the API process
+    user_reads.forget(user.username)
 
     # If user previously had a pfp, delete the old one from S3
     if old_profile_picture_url:
@@ -152,77 +172,30 @@ def forgot_password_requested_task(email: str):
     if already_requested:
         return
 
-    # Generate a random URL-safe string and store it in MongoDB
-    random_bytes = secrets.token_bytes(64)
-    url_safe_string = base64.urlsafe_b64encode(random_bytes).decode('utf-8')
-    password_reset_coll.insert_one({"email": email, "password_reset_url": url_safe_string,
-                                          "created_at": datetime.now(timezone.utc)})
+    # Generate a random URL-safe token and store its digest in MongoDB
+    reset_token, token_hash = new_token()
+    password_reset_coll.insert_one({"email": email, "token_hash": token_hash,
+                                    "created_at": datetime.now(timezone.utc)})
 
     # TODO: Mkae this look better
     send_email(receiver_email=email, subject="Password Reset Requested",
-               body=f"Please click the following link to reset your password: {settings.FRONTEND_URL}/auth/reset-password?reset_token={url_safe_string}")
+               body=f"Please click the following link to reset your password: {settings.FRONTEND_URL}/auth/reset-password?reset_token={reset_token}")
 
 
-@celery_app.task
-def verify_email_helper_task(email: str):
-    # Generate a random URL-safe string and store it in MongoDB
-    random_bytes = secrets.token_bytes(64)
-    url_safe_string = base64.urlsafe_b64encode(random_bytes).decode('utf-8')
-    email_verification_coll.insert_one({"email": email, "email_verification_url": url_safe_string,
-                                          "created_at": datetime.now(timezone.utc)})
+@celery_app.task(base=AsyncIOTask)
+async def verify_email_helper_task(email: str):
+    # Generate a random URL-safe token and store its digest in MongoDB
+    verification_token, token_hash = new_token()
+    await async_email_verification_coll.insert_one({"email": email, "token_hash": token_hash,
+                                                    "created_at": datetime.now(timezone.utc)})
 
     # TODO: Make this look better
-    send_email(receiver_email=email, subject="Verify Your Email Address",
-               body=f"Please click the following link to verify your email address: {settings.FRONTEND_URL}/auth/verify-email?email_verification_token={url_safe_string}")
+    await send_email_async(receiver_email=email, subject="Verify Your Email Address",
+                           body=f"Please click the following link to verify your email address: {settings.FRONTEND_URL}/auth/verify-email?email_verification_token={verification_token}")
 
 
-@celery_app.task
-def add_groups_to_user(user_id: str, group_id_list: list[str]) -> None:
-    """
-    Description
-    -----------
-    Adds group ids to a user's DB record
-
-    Precondition
-    ------------
-    User must exist
-
-    Returns
-    -------
-    None
-    """
-
-    # Convert to BSON object ids
-    user_bson_id = ObjectId(user_id)
-    group_bson_id_list = [ObjectId(group_id_str) for group_id_str in group_id_list]
-
-    # NOTE: `$addToSet` adds the value only if it does not already exist in the array
-    users_coll.update_one(
-        {"_id": user_bson_id}, 
-        {"$addToSet": {"group_ids": {"$each": group_bson_id_list}}}
-    )
-
-
-
-@celery_app.task
-def create_group_doc(group_dict: dict) -> None:
-    """
-    Description
-    -----------
-    Inserts the group document after converting to ObjectId types
-    """
-
-    # Convert string IDs back to ObjectId
-    group_dict["_id"] = ObjectId(group_dict["_id"])
-    group_dict["group_admin_id"] = ObjectId(group_dict["group_admin_id"])
-    group_dict["users_in_group"] = [ObjectId(uid) for uid in group_dict["users_in_group"]]
-
-    groups_coll.insert_one(group_dict)
-
-
-
-@celery_app.task
-def invite_user_to_group(email: str, group_id: str, group_name: str):
+@celery_app.task(base=AsyncIOTask)
+async def invite_user_to_group(email: str, group_id: str, group_name: str):
     """
     Description
     -----------
@@ -231,23 +204,22 @@ def invite_user_to_group(email: str, group_id: str, group_name: str):
     - Calls Celery task function to send invite email
     """
     
-    # Generate a cleaner URL-safe token
-    # secrets.token_urlsafe(32) gives you a random string approx 43 chars long
-    invite_token = secrets.token_urlsafe(32)   
+    # URL-safe token (approx 43 chars long), only its digest is stored
+    invite_token, token_hash = new_token()
 
     group_bson_id = ObjectId(group_id) 
 
-    group_invites_coll.insert_one({
+    await async_group_invites_coll.insert_one({
         "email": email, 
         "group_id": group_bson_id,
         "group_name": group_name,
-        "invite_token": invite_token,
+        "token_hash": token_hash,
         "created_at": datetime.now(timezone.utc)
     })
 
-    send_email(receiver_email=email, 
-               subject=f"Invite Link To Join Group [{group_name}]",
-               body=f"Please click the following link to reset your password: {settings.FRONTEND_URL}/groups/join-group?invite_token={invite_token}"
+    await send_email_async(receiver_email=email,
+                           subject=f"Invite Link To Join Group [{group_name}]",
+                           body=f"Please click the following link to reset your password: {settings.FRONTEND_URL}/groups/join-group?invite_token={invite_token}"
     )
 
 
@@ -286,6 +258,7 @@ def process_recurring_chores():
             "created_at": now,
             "completed_at": None,
             "recurring_chore_id": chore["_id"],
+            "revision": PENDING_REVISION,
         }
         chores_coll.insert_one(new_chore)
         logging.info("Created new chore: %s", new_chore)
@@ -306,5 +279,112 @@ def process_recurring_chores():
             },
         )
         logging.info("Updated recurring chore with new next_due_date.")
+
+        # Let clients polling the group's chores know there is a new one, and stamp
+        # it with the new revision for GET /chores/changes (see helpers/helper_groups.py)
+        group_doc = groups_coll.find_one_and_update(
+            {"_id": chore["group_id"]},
+            {"$inc": {"revision": 1}},
+            projection={"revision": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if group_doc:
+            group_reads.forget(chore["group_id"])
+            chores_coll.update_one(
+                {"_id": new_chore["_id"], **unstamped(group_doc["revision"])},
+                {"$set": {"revision": group_doc["revision"]}},
+            )
+            # Reaches API processes through the relay (EVENTS_RELAY_URL), or directly
+            # when this runs on the in-process task dispatcher
+            hub.publish_from_thread(str(chore["group_id"]), {"type": "chores", "revision": group_doc["revision"]})
     
-    logging.info("Finished processing recurring chores.")
\ No newline at end of file
+    logging.info("Finished processing recurring chores.")
+
+
+@celery_app.task
+def stamp_pending_revisions():
+    """
+    Description
+    -----------
+    Stamps chores and tombstones left with PENDING_REVISION by a write that
+    crashed before bumping its group (see helpers/helper_groups.py), which
+    every GET /chores/changes would otherwise return again forever.
+
+    A write still in progress is harmless to stamp early: it bumps the group
+    again afterwards and restamps them with the newer revision.
+    """
+    pending = {"revision": PENDING_REVISION}
+    group_ids = set(chores_coll.distinct("group_id", pending)) | set(chore_tombstones_coll.distinct("group_id", pending))
+
+    for group_id in group_ids:
+        group_doc = groups_coll.find_one_and_update(
+            {"_id": group_id},
+            {"$inc": {"revision": 1}},
+            projection={"revision": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if not group_doc:
+            continue
+        group_reads.forget(group_id)
+        for coll in (chores_coll, chore_tombstones_coll):
+            coll.update_many({"group_id": group_id, **pending}, {"$set": {"revision": group_doc["revision"]}})
+        hub.publish_from_thread(str(group_id), {"type": "chores", "revision": group_doc["revision"]})
+
+    if group_ids:
+        logging.warning("Stamped pending chore changes of %d groups", len(group_ids))
+
+
+@celery_app.task
+def expire_chore_tombstones():
+    """
+    Description
+    -----------
+    Deletes tombstones older than CHORE_TOMBSTONE_EXPIRE_DAYS. Each group
+    remembers the newest revision it expired, so GET /chores/changes can tell
+    clients that synced before it to start over (they may have missed a deletion).
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.CHORE_TOMBSTONE_EXPIRE_DAYS)
+    deleted_count = 0
+    for group in list(chore_tombstones_coll.aggregate([
+        # Pending ones are stamped first (see stamp_pending_revisions)
+        {"$match": {"deleted_at": {"$lt": cutoff}, "revision": {"$ne": PENDING_REVISION}}},
+        {"$group": {"_id": "$group_id", "revision": {"$max": "$revision"}}},
+    ])):
+        # Recorded before deleting, so no client can miss a deletion
+        groups_coll.update_one({"_id": group["_id"]}, {"$max": {"tombstones_expired_revision": group["revision"]}})
+        result = chore_tombstones_coll.delete_many(
+            {"group_id": group["_id"], "deleted_at": {"$lt": cutoff}, "revision": {"$lte": group["revision"]}}
+        )
+        deleted_count += result.deleted_count
+
+    logging.info("Expired %d chore tombstones", deleted_count)
+
+
+@celery_app.task
+def remove_orphaned_groups():
+    """
+    Description
+    -----------
+    Deletes groups left behind by a group creation that crashed between
+    inserting the group and adding it to its admin (only possible without
+    transactions, see POST /groups/create-group): a group whose only
+    member is an admin that doesn't list it.
+    """
+    cutoff = datetime.now(timezone.utc) - ORPHANED_GROUP_GRACE_PERIOD
+    candidates = list(groups_coll.find(
+        {"users_in_group": {"$size": 1}, "created_at": {"$lt": cutoff}},
+        {"group_admin_id": 1},
+    ))
+    if not candidates:
+        return
+
+    admins = users_coll.find({"_id": {"$in": [group["group_admin_id"] for group in candidates]}}, {"group_ids": 1})
+    group_ids_by_admin = {admin["_id"]: admin.get("group_ids") or [] for admin in admins}
+    orphaned_ids = [
+        group["_id"] for group in candidates
+        if group["_id"] not in group_ids_by_admin.get(group["group_admin_id"], [])
+    ]
+    if orphaned_ids:
+        # Still only one member, in case someone joined in the meantime
+        result = groups_coll.delete_many({"_id": {"$in": orphaned_ids}, "users_in_group": {"$size": 1}})
+        logging.warning("Removed %d orphaned groups: %s", result.deleted_count, orphaned_ids)
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+
+from kombu import Connection, Exchange, Queue, pools
+from kombu.mixins import ConsumerMixin
+
+from .settings import get_settings
+
+settings = get_settings()
+
+# Put on a subscriber's queue when it is dropped, so its stream ends
+EVICTED = object()
+
+
+class Subscription:
+    """A client listening to one group's events, with its own bounded queue."""
+
+    def __init__(self, group_id: str, queue_size: int) -> None:
+        self.group_id = group_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+
+class EventRelay:
+    """
+    Description
+    -----------
+    Carries events between processes through a fanout exchange on the
+    broker: every publisher (API processes, Celery workers) sends to the
+    exchange, and every API process consumes its own copy of each event
+    on an exclusive queue.
+    """
+
+    def __init__(self, url: str, exchange_name: str) -> None:
+        self._connection = Connection(url)
+        self._exchange = Exchange(exchange_name, type="fanout", durable=False)
+        self._consumer: "_RelayConsumer | None" = None
+        self._thread: threading.Thread | None = None
+
+    def publish(self, group_id: str, event: dict) -> None:
+        """Sends an event to every API process (blocking)."""
+        with pools.producers[self._connection].acquire(block=True) as producer:
+            producer.publish(
+                {"group_id": group_id, "event": event},
+                exchange=self._exchange,
+                declare=[self._exchange],
+                serializer="json",
+                retry=True,
+            )
+
+    def start(self, on_event) -> None:
+        """Starts consuming events on a background thread, calling `on_event(group_id, event)` there."""
+        self._consumer = _RelayConsumer(self._connection.clone(), self._exchange, on_event)
+        self._thread = threading.Thread(target=self._consumer.run, name="event-relay", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._consumer is not None:
+            self._consumer.should_stop = True
+            self._thread.join(timeout=5)
+            self._consumer = None
+            self._thread = None
+
+
+class _RelayConsumer(ConsumerMixin):
+    def __init__(self, connection: Connection, exchange: Exchange, on_event) -> None:
+        self.connection = connection
+        self._exchange = exchange
+        self._on_event = on_event
+
+    def get_consumers(self, Consumer, channel):
+        queue = Queue(exchange=self._exchange, exclusive=True, auto_delete=True, durable=False)
+        return [Consumer(queues=[queue], callbacks=[self._on_message], accept=["json"])]
+
+    def _on_message(self, body, message) -> None:
+        try:
+            self._on_event(body["group_id"], body["event"])
+        finally:
+            message.ack()
+
+
+class EventHub:
+    """
+    Description
+    -----------
+    In-process pub/sub for per-group events (see routes/events.py).
+
+    Each subscriber gets a queue of `queue_size` events. Publishing never
+    waits for a subscriber: one whose queue is full is evicted, which ends
+    its stream, and the client reconnects and catches up with
+    `GET /chores/changes`.
+
+    With a relay (`EVENTS_RELAY_URL`), events go through the broker so
+    subscribers connected to other API processes see them too, including
+    events published by Celery workers.
+    """
+
+    def __init__(self, queue_size: int, relay: EventRelay | None = None) -> None:
+        self._queue_size = queue_size
+        self._relay = relay
+        self._subscriptions: dict[str, set[Subscription]] = defaultdict(set)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.evictions = 0
+
+    async def start(self) -> None:
+        """Binds the hub to the running event loop and starts receiving relayed events."""
+        self._loop = asyncio.get_running_loop()
+        if self._relay is not None:
+            self._relay.start(lambda group_id, event: self._loop.call_soon_threadsafe(self._deliver, group_id, event))
+
+    async def stop(self) -> None:
+        """Stops relaying and ends every open stream."""
+        if self._relay is not None:
+            await asyncio.to_thread(self._relay.stop)
+        for subscriptions in list(self._subscriptions.values()):
+            for subscription in list(subscriptions):
+                self._evict(subscription, count=False)
+        self._loop = None
+
+    def subscribe(self, group_id: str) -> Subscription:
+        subscription = Subscription(group_id, self._queue_size)
+        self._subscriptions[group_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.group_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.group_id]
+
+    def publish(self, group_id: str, event: dict) -> None:
+        """Publishes an event from code running on the event loop (never blocks)."""
+        if self._relay is None:
+            self._deliver(group_id, event)
+            return
+
+        future = asyncio.get_running_loop().run_in_executor(None, self._relay.publish, group_id, event)
+        future.add_done_callback(_log_publish_failure)
+
+    def publish_from_thread(self, group_id: str, event: dict) -> None:
+        """
+        Publishes an event from synchronous code: Celery tasks, or tasks run
+        on the in-process dispatcher's threads. Without a relay, events
+        published outside the API process are dropped.
+        """
+        if self._relay is not None:
+            try:
+                self._relay.publish(group_id, event)
+            except Exception:
+                logging.exception("Failed to relay event for group %s", group_id)
+        elif self._loop is not None:
+            self._loop.call_soon_threadsafe(self._deliver, group_id, event)
+
+    def _deliver(self, group_id: str, event: dict) -> None:
+        for subscription in list(self._subscriptions.get(group_id, ())):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                logging.warning("Evicting slow event subscriber of group %s", group_id)
+                self._evict(subscription)
+
+    def _evict(self, subscription: Subscription, count: bool = True) -> None:
+        self.unsubscribe(subscription)
+        if count:
+            self.evictions += 1
+
+        # Make room for the marker, the pending events are useless now anyway
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(EVICTED)
+
+
+def _log_publish_failure(future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logging.error("Failed to relay event", exc_info=future.exception())
+
+
+def _exchange_name() -> str:
+    # Like the Celery queues, developers each get their own exchange in dev mode
+    if settings.DEV_MODE:
+        return f"group_events_dev_{settings.DEV_USER}"
+    return "group_events"
+
+
+hub = EventHub(
+    settings.EVENTS_SUBSCRIBER_QUEUE_SIZE,
+    EventRelay(settings.EVENTS_RELAY_URL, _exchange_name()) if settings.EVENTS_RELAY_URL else None,
+)
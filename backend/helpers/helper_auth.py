@@ -1,4 +1,4 @@
-import base64
+import functools
 import secrets
 from datetime import timedelta, datetime, timezone
 from typing import Annotated
@@ -14,7 +14,10 @@ from starlette import status
 from starlette.requests import Request
 
 from backend.helpers.helper_email import send_email
+from backend.helpers.helper_singleflight import SingleFlight
+from backend.helpers.helper_tokens import new_token
 from backend.models import UserInDB, TokenData
+from backend.metrics import command_listener, timed
 from backend.settings import get_settings
 from pymongo import AsyncMongoClient
 
@@ -32,7 +35,7 @@ PASSWORD_RESET_COLLECTION = settings.PASSWORD_RESET_COLLECTION
 EMAIL_VERIFICATION_COLLECTION = settings.EMAIL_VERIFICATION_COLLECTION
 
 # Initialize MongoDB client
-client = AsyncMongoClient(MONGO_URI)
+client = AsyncMongoClient(MONGO_URI, event_listeners=[command_listener])
 _db = client[DB_NAME]
 users_coll = _db[USERS_COLLECTION]
 password_reset_coll = _db[PASSWORD_RESET_COLLECTION]
@@ -41,6 +44,11 @@ email_verification_coll = _db[EMAIL_VERIFICATION_COLLECTION]
 
 password_hash = PasswordHash.recommended()
 
+# Every request authenticates, so a household opening the app at once fetches
+# the same users concurrently. Keyed by username; writes that change a user
+# document call `user_reads.forget(username)`
+user_reads = SingleFlight("user")
+
 
 class OAuth2PasswordBearerWithCookie(OAuth2):
     def __init__(
@@ -75,12 +83,14 @@ oauth2_scheme = OAuth2PasswordBearerWithCookie(tokenUrl="token")
 
 def verify_password(plain_password, hashed_password):
     """Verifies a plain password against a hashed password."""
-    return password_hash.verify(plain_password, hashed_password)
+    with timed("argon2"):
+        return password_hash.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password):
     """Hashes a password using the recommended algorithm."""
-    return password_hash.hash(password)
+    with timed("argon2"):
+        return password_hash.hash(password)
 
 
 async def get_user(username: str) -> UserInDB | None:
@@ -88,20 +98,28 @@ async def get_user(username: str) -> UserInDB | None:
     if users_coll is None:
         return None
 
-    doc = await users_coll.find_one({"username": username})
+    doc = await user_reads.do(username, lambda: users_coll.find_one({"username": username}))
 
     if doc:
         # Mongo returns _id but we ignore it for the model
+        # (the document may be shared with concurrent callers, so it is only read here)
         return UserInDB(**doc)
 
     return None
 
 
+@functools.cache
+def _dummy_password_hash() -> str:
+    return password_hash.hash(secrets.token_urlsafe(16))
+
+
 async def authenticate_user(username: str, password: str) -> UserInDB | None:
     """Authenticate a user by checking their username and password."""
     user = await get_user(username)
 
     if not user:
+        # Hash anyway, so the response time doesn't tell whether the user exists
+        verify_password(password, _dummy_password_hash())
         return None
 
     if not verify_password(password, user.hashed_password):
@@ -123,6 +141,11 @@ def create_access_token(data: dict, expires_delta_in_min: timedelta | None = Non
 
 async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
     """Get the current user from the JWT access token."""
+    with timed("auth"):
+        return await _get_current_user(token)
+
+
+async def _get_current_user(token: str):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -161,12 +184,11 @@ async def forgot_password_requested(email: str):
     if already_requested:
         return
 
-    # Generate a random URL-safe string and store it in MongoDB
-    random_bytes = secrets.token_bytes(64)
-    url_safe_string = base64.urlsafe_b64encode(random_bytes).decode('utf-8')
-    await password_reset_coll.insert_one({"email": email, "password_reset_url": url_safe_string,
+    # Generate a random URL-safe token and store its digest in MongoDB
+    reset_token, token_hash = new_token()
+    await password_reset_coll.insert_one({"email": email, "token_hash": token_hash,
                                           "created_at": datetime.now(timezone.utc)})
 
     # TODO: Mkae this look better
     send_email(receiver_email=email, subject="Password Reset Requested",
-               body=f"Please click the following link to reset your password: {settings.FRONTEND_URL}/auth/reset-password?reset_token={url_safe_string}")
+               body=f"Please click the following link to reset your password: {settings.FRONTEND_URL}/auth/reset-password?reset_token={reset_token}")
@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import logging
+import math
+
+from pymongo import AsyncMongoClient
+
+from backend.metrics import command_listener
+from backend.settings import get_settings
+
+settings = get_settings()
+
+# MongoDB config
+MONGO_URI = settings.MONGO_URI
+DB_NAME = settings.DB_NAME
+USERS_COLLECTION = settings.USERS_COLLECTION
+
+# Initialize MongoDB client
+client = AsyncMongoClient(MONGO_URI, event_listeners=[command_listener])
+_db = client[DB_NAME]
+users_coll = _db[USERS_COLLECTION]
+
+
+class BloomFilter:
+    """
+    Description
+    -----------
+    Set of strings in a fixed-size bit array. `in` is never wrong when it
+    says no; it says yes for an item that was never added with
+    probability `error_rate` (as long as at most `capacity` items were
+    added). Items can't be removed.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        capacity = max(capacity, 1)
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray(math.ceil(self.size / 8))
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class AvailabilityIndex:
+    """
+    Description
+    -----------
+    Bloom filters of every username and email in the users collection, so
+    `GET /auth/availability` can answer "available" without a database
+    query for names that were never taken. A name the filter might
+    contain is checked against MongoDB.
+
+    The filters are built when the API starts, rebuilt every
+    AVAILABILITY_FILTER_REBUILD_SECONDS and updated on register and
+    change-username in this process. Names taken through another API
+    process since the last rebuild aren't in them and are reported
+    available, so "available" is only a hint: registering still checks
+    for real. "Taken" is always checked against MongoDB.
+    """
+
+    def __init__(self) -> None:
+        self._usernames: BloomFilter | None = None
+        self._emails: BloomFilter | None = None
+        # Names taken while a rebuild is streaming, added to the new filters once it's done
+        self._taken_during_rebuild: list[tuple[str | None, str | None]] | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self._usernames is not None
+
+    async def rebuild(self) -> None:
+        """Builds new filters by streaming the usernames and emails of all users."""
+        # Room for twice the current users, so the error rate holds while people sign up
+        capacity = max(settings.AVAILABILITY_FILTER_CAPACITY, 2 * await users_coll.estimated_document_count())
+        usernames = BloomFilter(capacity, settings.AVAILABILITY_FILTER_ERROR_RATE)
+        emails = BloomFilter(capacity, settings.AVAILABILITY_FILTER_ERROR_RATE)
+
+        self._taken_during_rebuild = []
+        try:
+            async for user_doc in users_coll.find({}, {"_id": 0, "username": 1, "email": 1}).batch_size(1000):
+                if user_doc.get("username"):
+                    usernames.add(user_doc["username"])
+                if user_doc.get("email"):
+                    emails.add(user_doc["email"])
+
+            for username, email in self._taken_during_rebuild:
+                if username:
+                    usernames.add(username)
+                if email:
+                    emails.add(email)
+        finally:
+            self._taken_during_rebuild = None
+
+        self._usernames, self._emails = usernames, emails
+        logging.info("Built availability filters for %d users", usernames.count)
+
+    async def rebuild_in_background(self) -> None:
+        """
+        `rebuild` now and then every AVAILABILITY_FILTER_REBUILD_SECONDS (if
+        set), logging failures instead of raising (used at app startup).
+        """
+        while True:
+            try:
+                await self.rebuild()
+            except Exception:
+                logging.exception("Failed to build availability filters")
+            if settings.AVAILABILITY_FILTER_REBUILD_SECONDS <= 0:
+                return
+            await asyncio.sleep(settings.AVAILABILITY_FILTER_REBUILD_SECONDS)
+
+    def add(self, username: str | None = None, email: str | None = None) -> None:
+        """Records a newly taken username and/or email."""
+        if self._taken_during_rebuild is not None:
+            self._taken_during_rebuild.append((username, email))
+        if not self.ready:
+            return
+        if username:
+            self._usernames.add(username)
+        if email:
+            self._emails.add(email)
+
+    async def is_available(self, field: str, value: str) -> bool:
+        """
+        Whether no user has `value` as their `field` ("username" or "email").
+        A name missing from the filter is reported available without a query,
+        even if another process took it since the last rebuild (see above).
+        """
+        bloom_filter = self._usernames if field == "username" else self._emails
+        if bloom_filter is not None and value not in bloom_filter:
+            return True
+
+        return await users_coll.find_one({field: value}, {"_id": 1}) is None
+
+
+availability = AvailabilityIndex()
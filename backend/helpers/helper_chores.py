@@ -1,3 +1,7 @@
+import base64
+import binascii
+
+from bson.errors import InvalidId
 from bson.objectid import ObjectId
 import datetime
 from dateutil.rrule import rrulestr
@@ -5,6 +9,7 @@ from dateutil.parser import parse
 from fastapi import HTTPException, status
 from pymongo import AsyncMongoClient
 
+from backend.metrics import command_listener
 from backend.settings import get_settings
 
 settings = get_settings()
@@ -15,7 +20,7 @@ DB_NAME = settings.DB_NAME
 USERS_COLLECTION = settings.USERS_COLLECTION
 
 # Initialize MongoDB client
-client = AsyncMongoClient(MONGO_URI)
+client = AsyncMongoClient(MONGO_URI, event_listeners=[command_listener])
 _db = client[DB_NAME]
 users_coll = _db[USERS_COLLECTION]
 
@@ -29,14 +34,18 @@ async def validate_and_get_user_ids(usernames: list[str], group_id: ObjectId) ->
     - `group_id`: The ObjectId of the group the users must belong to.
 
     Returns:
-    - A list of ObjectIds corresponding to the validated usernames.
+    - A list of ObjectIds corresponding to the validated usernames, in the same order.
     
     Raises:
     - `HTTPException(400, ...)`: If a user is not found or not in the group.
     """
+    # One query for all of them, however many users are assigned
+    user_docs = users_coll.find({"username": {"$in": list(set(usernames))}}, {"username": 1, "group_ids": 1})
+    user_docs_by_username = {user_doc["username"]: user_doc async for user_doc in user_docs}
+
     user_obj_ids = []
     for username in usernames:
-        user_doc = await users_coll.find_one({"username": username})
+        user_doc = user_docs_by_username.get(username)
         if not user_doc or not user_doc.get("group_ids") or user_doc["group_ids"][0] != group_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -45,7 +54,7 @@ async def validate_and_get_user_ids(usernames: list[str], group_id: ObjectId) ->
         user_obj_ids.append(user_doc["_id"])
     return user_obj_ids
 
-def recalculate_schedule(rrule_str: str | None, start_date_str: str | None, existing_chore: dict) -> dict:
+def recalculate_schedule(rrule_str: str | None, start_date_str: str | None, existing_chore: dict | None) -> dict:
     """
     Recalculates the recurring chore's schedule if the rrule or start date has changed.
     
@@ -53,6 +62,7 @@ def recalculate_schedule(rrule_str: str | None, start_date_str: str | None, exis
     - `rrule_str`: The new recurrence rule string, if provided.
     - `start_date_str`: The new start date string, if provided.
     - `existing_chore`: The existing recurring chore document from the database.
+                        Only needed when exactly one of `rrule_str` / `start_date_str` is given.
 
     Returns:
     - A dictionary containing the updated schedule fields (`rrule`, `start_date`, `next_due_date`).
@@ -90,3 +100,59 @@ def recalculate_schedule(rrule_str: str | None, start_date_str: str | None, exis
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid rrule or start_date: {e}",
         )
+
+
+def parse_object_id(value: str) -> ObjectId:
+    """
+    The ObjectId in a query parameter.
+
+    Raises:
+    - `HTTPException(400, "Invalid ID.")`: If `value` is not a 24 character hex string.
+    """
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid ID.",
+        )
+
+
+def encode_chore_cursor(chore: dict) -> str:
+    """
+    Encodes the position of a chore in the (created_at, _id) ordering into an opaque,
+    URL-safe cursor string. Pass it back to `decode_chore_cursor` to resume after that chore.
+    """
+    raw = f"{chore['created_at'].isoformat()}|{chore['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_chore_cursor(cursor: str) -> tuple[datetime.datetime, ObjectId]:
+    """
+    Inverse of `encode_chore_cursor`.
+
+    Raises:
+    - `HTTPException(400, "Invalid cursor.")`: If the cursor was not produced by `encode_chore_cursor`.
+    """
+    try:
+        created_at, chore_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.datetime.fromisoformat(created_at), ObjectId(chore_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, InvalidId):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor.",
+        )
+
+
+def chores_after_cursor(cursor: str) -> dict:
+    """
+    Filter for the chores after the one `cursor` points at, newest first on (created_at, _id).
+
+    Raises:
+    - `HTTPException(400, "Invalid cursor.")`: If the cursor was not produced by `encode_chore_cursor`.
+    """
+    cursor_created_at, cursor_id = decode_chore_cursor(cursor)
+    return {"$or": [
+        {"created_at": {"$lt": cursor_created_at}},
+        {"created_at": cursor_created_at, "_id": {"$lt": cursor_id}},
+    ]}
@@ -0,0 +1,51 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from pymongo import AsyncMongoClient
+
+from backend.settings import get_settings
+
+settings = get_settings()
+
+
+@asynccontextmanager
+async def transaction(client: AsyncMongoClient):
+    """
+    Description
+    -----------
+    Runs the enclosed writes in a multi-document transaction when
+    `MONGO_USE_TRANSACTIONS` is enabled (requires a replica set or sharded
+    cluster). Raising inside the block aborts the transaction.
+
+    Yields
+    ------
+    The session to pass as `session=` to each operation, or None when
+    transactions are disabled. Callers must then undo partial writes
+    themselves.
+    """
+    if not settings.MONGO_USE_TRANSACTIONS:
+        yield None
+        return
+
+    async with client.start_session() as session:
+        async with await session.start_transaction():
+            yield session
+
+
+async def run_concurrently(session, *operations) -> list:
+    """
+    Description
+    -----------
+    Awaits independent database operations concurrently, like
+    `asyncio.gather`. Operations that share a session (i.e. run inside
+    `transaction`) must not overlap, so in that case they are awaited
+    one after the other.
+
+    Returns
+    -------
+    The results, in the same order as `operations`
+    """
+    if session is None:
+        return list(await asyncio.gather(*operations))
+
+    return [await operation for operation in operations]
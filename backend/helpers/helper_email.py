@@ -1,13 +1,28 @@
+import logging
 import smtplib
 import ssl
 from email.message import EmailMessage
 
+import aiosmtplib
+
 from backend.settings import get_settings
+from backend.tracing import span
 
 
 settings = get_settings()
 
 
+def _build_message(receiver_email: str, subject: str, body: str) -> EmailMessage:
+    # Create the email object
+    msg = EmailMessage()
+    msg['Subject'] = subject
+    msg['From'] = settings.SMTP_USERNAME
+    msg['To'] = receiver_email
+    msg.set_content(body)
+
+    return msg
+
+
 def send_email(receiver_email: str, subject: str, body: str):
     # Config values
     SMTP_HOST = settings.SMTP_HOST
@@ -15,21 +30,14 @@ def send_email(receiver_email: str, subject: str, body: str):
     SENDER_EMAIL = settings.SMTP_USERNAME
     PASSWORD = settings.SMTP_PASSWORD
     RECEIVER_EMAIL = receiver_email
-    SUBJECT = subject
-    BODY = body
 
-    # Create the email object
-    msg = EmailMessage()
-    msg['Subject'] = SUBJECT
-    msg['From'] = SENDER_EMAIL
-    msg['To'] = RECEIVER_EMAIL
-    msg.set_content(BODY)
+    msg = _build_message(receiver_email, subject, body)
 
     # Sending email
     context = ssl.create_default_context()
 
     try:
-        with smtplib.SMTP(SMTP_HOST, PORT) as server:
+        with span("smtp send", {"smtp.host": SMTP_HOST}), smtplib.SMTP(SMTP_HOST, PORT) as server:
             # Identify yourself to the ESMTP server
             server.ehlo()
 
@@ -47,3 +55,32 @@ def send_email(receiver_email: str, subject: str, body: str):
         print(f"Email successfully sent to {RECEIVER_EMAIL}!")
     except Exception as e:
         print(f"An error occurred: {e}")
+
+
+async def send_email_async(receiver_email: str, subject: str, body: str):
+    """
+    Same as `send_email` but uses an asyncio SMTP client, so the event loop
+    can keep serving other coroutines while waiting on the mail server.
+
+    Unlike `send_email`, failures are raised after they're logged, so the
+    task sending the email is recorded as failed.
+    """
+    msg = _build_message(receiver_email, subject, body)
+
+    try:
+        # STARTTLS + login, same handshake as the synchronous version
+        with span("smtp send", {"smtp.host": settings.SMTP_HOST}):
+            await aiosmtplib.send(
+                msg,
+                hostname=settings.SMTP_HOST,
+                port=settings.SMTP_PORT,
+                username=settings.SMTP_USERNAME,
+                password=settings.SMTP_PASSWORD,
+                start_tls=True,
+                tls_context=ssl.create_default_context(),
+            )
+
+        logging.info("Email successfully sent to %s", receiver_email)
+    except Exception:
+        logging.exception("Failed to send email to %s", receiver_email)
+        raise
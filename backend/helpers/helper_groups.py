@@ -0,0 +1,141 @@
+from bson.objectid import ObjectId
+from fastapi import Request, Response, status
+from pymongo import ReturnDocument
+from pymongo.asynchronous.collection import AsyncCollection
+
+from backend.events import hub
+from backend.helpers.helper_singleflight import SingleFlight
+
+# Each group document carries a `revision` counter that is incremented
+# ({"$inc": {"revision": 1}}) by every write that changes what the group's
+# members see: its chores, its recurring chores, or its members. Read
+# endpoints return it as an ETag so clients can poll with If-None-Match.
+#
+# Writes to other collections bump the revision *after* the write. A reader
+# racing with the write may then pair the new data with the old revision,
+# which only costs it one extra refetch. Bumping first could pair the new
+# revision with old data, which would be cached for good.
+#
+# Chores (and chore tombstones) are also stamped with the revision of their
+# last change, for GET /chores/changes. The write itself stores
+# PENDING_REVISION, which every "changed since" query matches, and the real
+# revision is stamped once the group has been bumped. So a change is never
+# missed by a reader that has already seen the bumped revision.
+PENDING_REVISION = 2**62
+
+# Concurrent reads of the same group document share one query. Keyed by the
+# group's ObjectId; writes to the group document call `group_reads.forget`
+group_reads = SingleFlight("group")
+
+
+def unstamped(revision: int) -> dict:
+    """
+    Filter for documents that still need `revision` stamped: pending ones,
+    or ones stamped by an older concurrent write (never lower a stamp).
+    """
+    return {"$or": [{"revision": PENDING_REVISION}, {"revision": {"$lt": revision}}]}
+
+
+async def bump_group_revision(groups_coll: AsyncCollection, group_id: ObjectId, session=None) -> int:
+    """
+    Description
+    -----------
+    Increments the revision of a group after changing what its members see.
+
+    Returns
+    -------
+    int: The group's new revision (0 if the group no longer exists)
+    """
+    group_doc = await groups_coll.find_one_and_update(
+        {"_id": group_id},
+        {"$inc": {"revision": 1}},
+        projection={"revision": 1},
+        return_document=ReturnDocument.AFTER,
+        session=session,
+    )
+    group_reads.forget(group_id)
+    return (group_doc or {}).get("revision", 0)
+
+
+async def stamp_revision(coll: AsyncCollection, query: dict, revision: int, session=None) -> None:
+    """Stamps the pending documents matching `query` with `revision` (see PENDING_REVISION)."""
+    await coll.update_many({**query, **unstamped(revision)}, {"$set": {"revision": revision}}, session=session)
+
+
+def publish_group_event(group_id: ObjectId, event_type: str, revision: int | None = None) -> None:
+    """
+    Tells the group's event subscribers (GET /events) what changed:
+    "chores" (with the new revision) or "group".
+    """
+    event = {"type": event_type}
+    if revision is not None:
+        event["revision"] = revision
+    hub.publish(str(group_id), event)
+
+
+async def get_group_revision(groups_coll: AsyncCollection, group_id: ObjectId) -> int:
+    """
+    Description
+    -----------
+    Reads only the revision of a group (groups created before revisions
+    existed count as revision 0).
+
+    Returns
+    -------
+    int: The group's revision
+    """
+    group_doc = await groups_coll.find_one({"_id": group_id}, {"revision": 1})
+    return (group_doc or {}).get("revision", 0)
+
+
+def group_details(group_doc: dict, usernames: dict[ObjectId, str]) -> dict:
+    """
+    Description
+    -----------
+    The response for a group, as returned by /groups/my-group.
+
+    Parameters
+    ----------
+    group_doc: The group document
+    usernames: Username by user id, for (at least) the group's members
+
+    Returns
+    -------
+    dict: The group with ObjectIds as strings and a users_in_group_usernames
+    field ("Unknown" for members whose user document is missing)
+    """
+    users_in_group = group_doc.get("users_in_group", [])
+    return {
+        "_id": str(group_doc["_id"]),
+        "group_name": group_doc["group_name"],
+        "group_admin_id": str(group_doc["group_admin_id"]),
+        "group_admin_username": group_doc["group_admin_username"],
+        "users_in_group": [str(uid) for uid in users_in_group],
+        "users_in_group_usernames": [usernames.get(uid, "Unknown") for uid in users_in_group],
+        "created_at": group_doc.get("created_at"),
+    }
+
+
+def group_etag(group_id: ObjectId, revision: int) -> str:
+    """The ETag for a group at a given revision."""
+    # Includes the group id, so switching groups never matches a cached revision.
+    # Weak, because the same revision is served with different encodings (JSON, NDJSON).
+    return f'W/"{group_id}-{revision}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match header matches `etag` (weak comparison)."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    opaque_tag = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque_tag for tag in if_none_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    """An empty 304 response for a matching If-None-Match."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
@@ -0,0 +1,103 @@
+import orjson
+from bson.objectid import ObjectId
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+from backend.models import Chore, RecurringChore
+from backend.settings import get_settings
+
+settings = get_settings()
+
+
+def _default(obj):
+    # orjson handles datetime natively, ObjectId is the only BSON type we store that it doesn't know
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content) -> bytes:
+    """Serialize Mongo documents (ObjectId, datetime, ...) to JSON bytes with orjson."""
+    return orjson.dumps(content, default=_default)
+
+
+class BSONJSONResponse(Response):
+    """JSON response that renders Mongo documents directly with `dumps`."""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+class DocumentShape:
+    """
+    Description
+    -----------
+    What a response model looks like on the wire, precomputed from its
+    fields: the Mongo projection that selects exactly those fields, and the
+    defaults for optional fields a document may be missing.
+
+    `prepare` makes a raw document serialize the same as
+    `model.model_validate(doc).model_dump(by_alias=True)`, without
+    going through Pydantic.
+    """
+
+    def __init__(self, model: type[BaseModel]) -> None:
+        self.projection: dict[str, int] = {}
+        self._defaults: list[tuple[str, object]] = []
+
+        for name, field in model.model_fields.items():
+            key = field.validation_alias or name
+            self.projection[key] = 1
+            if not field.is_required() and field.default_factory is None:
+                self._defaults.append((key, field.default))
+
+        # Only scalar defaults can be shared between documents
+        self._list_defaults = [
+            field.validation_alias or name
+            for name, field in model.model_fields.items()
+            if field.default_factory is list
+        ]
+
+    def prepare(self, doc: dict) -> dict:
+        for key, default in self._defaults:
+            if key not in doc:
+                doc[key] = default
+        for key in self._list_defaults:
+            if doc.get(key) is None:
+                doc[key] = []
+        return doc
+
+
+chore_shape = DocumentShape(Chore)
+recurring_chore_shape = DocumentShape(RecurringChore)
+
+# Built once at import instead of per request
+chore_list_adapter = TypeAdapter(list[Chore])
+recurring_chore_list_adapter = TypeAdapter(list[RecurringChore])
+
+
+def fast_json_response(
+    docs: list[dict],
+    shape: DocumentShape,
+    adapter: TypeAdapter,
+    headers: dict[str, str] | None = None,
+) -> BSONJSONResponse:
+    """
+    Description
+    -----------
+    Returns a list of Mongo documents (fetched with `shape.projection`) as
+    JSON, skipping FastAPI's response-model validation and the stdlib JSON
+    encoder. Endpoints using this keep their `list[Model]` return
+    annotation for the OpenAPI docs.
+
+    In DEV_MODE the payload is also validated with `adapter`, so a drift
+    between the projection and the model fails loudly during development.
+    """
+    docs = [shape.prepare(doc) for doc in docs]
+
+    if settings.DEV_MODE:
+        adapter.validate_python(docs)
+
+    return BSONJSONResponse(docs, headers=headers)
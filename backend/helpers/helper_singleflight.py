@@ -0,0 +1,68 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Description
+    -----------
+    Coalesces identical concurrent reads: while a call for a key is in
+    flight, later callers with the same key await its result instead of
+    running their own query.
+
+    The query runs as its own task, so a caller that is cancelled (e.g.
+    the client disconnected) doesn't cancel it for the others.
+
+    Notes
+    -----
+    - Every caller gets the *same* result object, so callers must not
+      mutate it.
+    - A caller may get the result of a query that started shortly before
+      it arrived. Keys should include whatever makes that unacceptable
+      (e.g. the group revision for chores), or writers should call
+      `forget` so later readers start a fresh query.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+        # Calls made, and how many of them shared an in-flight query
+        self.calls = 0
+        self.coalesced = 0
+        _flights.append(self)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Returns `await fn()`, sharing the call with concurrent callers using the same key."""
+        self.calls += 1
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+
+        return await asyncio.shield(task)
+
+    def forget(self, key: Hashable) -> None:
+        """Makes callers after this point run a new query, even if one for `key` is in flight."""
+        self._in_flight.pop(key, None)
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+
+_flights: list[SingleFlight] = []
+
+
+def singleflight_stats() -> dict[str, dict[str, int]]:
+    """Calls and coalesced calls of every SingleFlight, by name."""
+    return {flight.name: {"calls": flight.calls, "coalesced": flight.coalesced} for flight in _flights}
@@ -0,0 +1,78 @@
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pymongo.asynchronous.cursor import AsyncCursor
+
+from backend.helpers.helper_serialization import DocumentShape, dumps
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+JSON_MEDIA_TYPE = "application/json"
+
+# Documents fetched from Mongo and encoded per chunk of the response
+STREAM_BATCH_SIZE = 500
+
+
+def streaming_media_type(request: Request, stream: bool) -> str | None:
+    """
+    Description
+    -----------
+    Decides whether a list endpoint should stream its response.
+
+    Returns
+    -------
+    - NDJSON_MEDIA_TYPE if the client sent `Accept: application/x-ndjson`
+    - JSON_MEDIA_TYPE if the client asked for `?stream=true`
+    - None for a regular (buffered) response
+    """
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return NDJSON_MEDIA_TYPE
+    if stream:
+        return JSON_MEDIA_TYPE
+    return None
+
+
+def stream_documents(
+    cursor: AsyncCursor,
+    shape: DocumentShape,
+    media_type: str,
+    headers: dict[str, str] | None = None,
+) -> StreamingResponse:
+    """
+    Description
+    -----------
+    Streams the documents of a Mongo cursor as they arrive, one batch at a
+    time, so memory use is bounded by STREAM_BATCH_SIZE rather than by the
+    number of matching documents.
+
+    The cursor should be opened with `shape.projection`; each document is
+    then encoded the same way as the buffered response. NDJSON puts one
+    document per line; JSON produces a single array.
+    """
+    ndjson = media_type == NDJSON_MEDIA_TYPE
+
+    def encode(batch: list[bytes], first: bool) -> bytes:
+        if ndjson:
+            return b"".join(item + b"\n" for item in batch)
+        # Array items need a comma between batches too
+        return (b"" if first else b",") + b",".join(batch)
+
+    async def body():
+        if not ndjson:
+            yield b"["
+
+        first = True
+        batch: list[bytes] = []
+        async for doc in cursor.batch_size(STREAM_BATCH_SIZE):
+            batch.append(dumps(shape.prepare(doc)))
+
+            if len(batch) == STREAM_BATCH_SIZE:
+                yield encode(batch, first)
+                first = False
+                batch = []
+
+        if batch:
+            yield encode(batch, first)
+
+        if not ndjson:
+            yield b"]"
+
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
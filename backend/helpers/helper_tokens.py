@@ -0,0 +1,40 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta, timezone
+
+# One-time tokens (password reset, email verification, group invites) are
+# emailed to the user and only their SHA-256 digest is stored, under
+# `token_hash`. The tokens are random, so a plain digest is enough: a leaked
+# collection can't be turned back into working links. Each token collection
+# has a TTL index on `created_at` (backend/indexes.py), so MongoDB deletes
+# expired tokens by itself.
+
+
+def hash_token(token: str) -> str:
+    """The digest stored for `token` (64 hex characters)."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def new_token(nbytes: int = 32) -> tuple[str, str]:
+    """
+    Description
+    -----------
+    Generates a URL-safe one-time token.
+
+    Returns
+    -------
+    tuple[str, str]: The token to send to the user, and its digest to store
+    """
+    token = secrets.token_urlsafe(nbytes)
+    return token, hash_token(token)
+
+
+def token_query(token: str, lifetime_minutes: int) -> dict:
+    """
+    Query matching the stored document of `token`, unless it has expired.
+
+    The TTL monitor only runs about once a minute, so expired tokens can
+    linger for a bit; checking `created_at` too makes the lifetime exact.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(minutes=lifetime_minutes)
+    return {"token_hash": hash_token(token), "created_at": {"$gt": cutoff}}
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from backend.helpers.helper_singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_query():
+    flight = SingleFlight("test-coalescing")
+    queries = 0
+    release = asyncio.Event()
+
+    async def query():
+        nonlocal queries
+        queries += 1
+        await release.wait()
+        return {"username": "alice"}
+
+    callers = [asyncio.create_task(flight.do("alice", query)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*callers)
+
+    assert queries == 1
+    assert all(result is results[0] for result in results)
+    assert (flight.calls, flight.coalesced) == (3, 2)
+
+    # Once it has finished, the next call runs a new query
+    await flight.do("alice", query)
+    assert queries == 2
+
+
+@pytest.mark.asyncio
+async def test_different_keys_run_their_own_queries():
+    flight = SingleFlight("test-keys")
+
+    async def query(key):
+        await asyncio.sleep(0)
+        return key
+
+    assert await asyncio.gather(flight.do("a", lambda: query("a")), flight.do("b", lambda: query("b"))) == ["a", "b"]
+    assert flight.coalesced == 0
+
+
+@pytest.mark.asyncio
+async def test_error_reaches_every_caller():
+    flight = SingleFlight("test-errors")
+    release = asyncio.Event()
+
+    async def failing_query():
+        await release.wait()
+        raise ValueError("query failed")
+
+    callers = [asyncio.create_task(flight.do("key", failing_query)) for _ in range(2)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*callers, return_exceptions=True)
+
+    assert [type(result) for result in results] == [ValueError, ValueError]
+    assert flight.coalesced == 1
+
+    # A failed query isn't kept either
+    async def query():
+        return "ok"
+
+    assert await flight.do("key", query) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_query():
+    flight = SingleFlight("test-cancel")
+    release = asyncio.Event()
+
+    async def query():
+        await release.wait()
+        return "done"
+
+    cancelled = asyncio.create_task(flight.do("key", query))
+    waiting = asyncio.create_task(flight.do("key", query))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await waiting == "done"
+    assert cancelled.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_forget_starts_a_new_query():
+    flight = SingleFlight("test-forget")
+    release = asyncio.Event()
+    versions = iter(["before write", "after write"])
+
+    async def query():
+        version = next(versions)
+        await release.wait()
+        return version
+
+    before = asyncio.create_task(flight.do("key", query))
+    await asyncio.sleep(0)
+    # A write happened while the first query was in flight
+    flight.forget("key")
+    after = asyncio.create_task(flight.do("key", query))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await before == "before write"
+    assert await after == "after write"
+    assert flight.coalesced == 0
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+
+from pymongo import ASCENDING, DESCENDING, AsyncMongoClient, IndexModel
+from pymongo.errors import OperationFailure
+from pymongo.asynchronous.database import AsyncDatabase
+
+from backend.helpers.helper_groups import PENDING_REVISION
+from backend.metrics import command_listener
+from backend.settings import get_settings
+
+settings = get_settings()
+
+# MongoDB config
+MONGO_URI = settings.MONGO_URI
+DB_NAME = settings.DB_NAME
+
+# Initialize MongoDB client
+client = AsyncMongoClient(MONGO_URI, event_listeners=[command_listener])
+_db = client[DB_NAME]
+
+# Server error code for an index that exists with different options
+INDEX_OPTIONS_CONFLICT = 85
+
+
+def _token_indexes(expire_minutes: int) -> list[IndexModel]:
+    # One-time token collections (see helpers/helper_tokens.py)
+    return [
+        # Tokens stored before they were hashed have no token_hash, and would
+        # all collide on null in a plain unique index
+        IndexModel([("token_hash", ASCENDING)], unique=True, partialFilterExpression={"token_hash": {"$exists": True}}),
+        IndexModel([("email", ASCENDING)]),
+        # MongoDB deletes tokens once they expire
+        IndexModel([("created_at", ASCENDING)], expireAfterSeconds=expire_minutes * 60),
+    ]
+
+
+# Collections holding one-time tokens
+TOKEN_COLLECTIONS = (
+    settings.PASSWORD_RESET_COLLECTION,
+    settings.EMAIL_VERIFICATION_COLLECTION,
+    settings.GROUP_INVITES_COLLECTION,
+)
+
+# Indexes each collection needs, keyed by collection name.
+# `create_indexes` is a no-op for indexes that already exist.
+INDEXES: dict[str, list[IndexModel]] = {
+    settings.USERS_COLLECTION: [
+        # Group members (GET /dashboard)
+        IndexModel([("group_ids", ASCENDING)]),
+        # Register and change-username rely on these to reject taken names
+        IndexModel([("username", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)], unique=True),
+    ],
+    # Chore listing pages through a group's chores newest first on
+    # (created_at, _id), optionally filtered on one of these fields
+    settings.CHORES_COLLECTION: [
+        IndexModel([("group_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("group_id", ASCENDING), ("assigned_user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("group_id", ASCENDING), ("is_completed", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("group_id", ASCENDING), ("recurring_chore_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        # GET /chores/changes
+        IndexModel([("group_id", ASCENDING), ("revision", ASCENDING)]),
+        # Writes left pending by a crash (see the stamp_pending_revisions task)
+        IndexModel([("revision", ASCENDING)], partialFilterExpression={"revision": PENDING_REVISION}),
+    ],
+    settings.CHORE_TOMBSTONES_COLLECTION: [
+        IndexModel([("group_id", ASCENDING), ("revision", ASCENDING)]),
+        IndexModel([("revision", ASCENDING)], partialFilterExpression={"revision": PENDING_REVISION}),
+        # The expire_chore_tombstones task
+        IndexModel([("deleted_at", ASCENDING)]),
+    ],
+    settings.PASSWORD_RESET_COLLECTION: _token_indexes(settings.PASSWORD_RESET_TOKEN_EXPIRE_MINUTES),
+    settings.EMAIL_VERIFICATION_COLLECTION: _token_indexes(settings.EMAIL_VERIFICATION_TOKEN_EXPIRE_MINUTES),
+    settings.GROUP_INVITES_COLLECTION: _token_indexes(settings.GROUP_INVITE_TOKEN_EXPIRE_MINUTES),
+}
+
+
+class IndexBuildError(Exception):
+    """Raised when indexes could not be created, or (see `check_indexes`) are missing."""
+
+
+def _index_models(unique: bool | None) -> list[tuple[str, IndexModel]]:
+    """(collection name, index) pairs from `INDEXES`: all of them, or only the unique or non-unique ones."""
+    return [
+        (collection_name, index_model)
+        for collection_name, index_models in INDEXES.items()
+        for index_model in index_models
+        if unique is None or index_model.document.get("unique", False) == unique
+    ]
+
+
+async def ensure_indexes(db: AsyncDatabase | None = None, unique: bool | None = None) -> None:
+    """
+    Create any missing indexes from `INDEXES` in `db` (default: the app's database),
+    or only the unique or non-unique ones. An index that fails doesn't stop the others.
+
+    Raises
+    ------
+    IndexBuildError: Listing every index that could not be created.
+    """
+    db = _db if db is None else db
+    await _delete_unhashed_tokens(db)
+
+    index_models = _index_models(unique)
+    failures = []
+    for collection_name, index_model in index_models:
+        try:
+            await _ensure_index(db, collection_name, index_model)
+        except OperationFailure as e:
+            logging.error("Failed to create index %s on %s: %s", index_model.document["name"], collection_name, e)
+            failures.append(f"{collection_name}.{index_model.document['name']}: {e}")
+    logging.info("Ensured %d indexes", len(index_models) - len(failures))
+
+    if failures:
+        raise IndexBuildError(f"Failed to create {len(failures)} indexes: " + "; ".join(failures))
+
+
+async def check_indexes(db: AsyncDatabase | None = None, unique: bool | None = None) -> None:
+    """
+    Like `ensure_indexes`, but only checks that the indexes exist (by name),
+    for when MONGO_ENSURE_INDEXES is off.
+
+    Raises
+    ------
+    IndexBuildError: Listing every missing index.
+    """
+    db = _db if db is None else db
+    existing = {}
+    missing = []
+    for collection_name, index_model in _index_models(unique):
+        if collection_name not in existing:
+            existing[collection_name] = await db[collection_name].index_information()
+        if index_model.document["name"] not in existing[collection_name]:
+            missing.append(f"{collection_name}.{index_model.document['name']}")
+
+    if missing:
+        raise IndexBuildError(f"Missing {len(missing)} indexes (run python -m backend.indexes): " + ", ".join(missing))
+
+
+async def _delete_unhashed_tokens(db: AsyncDatabase) -> None:
+    # Tokens stored in plain text, before they were hashed, can't be redeemed any more
+    for collection_name in TOKEN_COLLECTIONS:
+        result = await db[collection_name].delete_many({"token_hash": {"$exists": False}})
+        if result.deleted_count:
+            logging.info("Deleted %d unhashed tokens from %s", result.deleted_count, collection_name)
+
+
+async def _ensure_index(db: AsyncDatabase, collection_name: str, index_model: IndexModel) -> None:
+    try:
+        await db[collection_name].create_indexes([index_model])
+    except OperationFailure as e:
+        expire_after_seconds = index_model.document.get("expireAfterSeconds")
+        if e.code != INDEX_OPTIONS_CONFLICT or expire_after_seconds is None:
+            raise
+        # A token lifetime setting changed: update the TTL index in place
+        await db.command("collMod", collection_name, index={
+            "keyPattern": index_model.document["key"],
+            "expireAfterSeconds": expire_after_seconds,
+        })
+        logging.info("Updated TTL of %s on %s to %ds", index_model.document["name"], collection_name, expire_after_seconds)
+
+
+async def ensure_indexes_in_background() -> None:
+    """
+    `ensure_indexes` for the non-unique indexes, logging failures instead of
+    raising (used at app startup, after the unique ones were created).
+    """
+    try:
+        await ensure_indexes(unique=False)
+    except Exception:
+        logging.exception("Failed to create MongoDB indexes")
+
+
+if __name__ == "__main__":
+    # python -m backend.indexes
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(ensure_indexes())
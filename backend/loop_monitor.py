@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+
+from .metrics import BACKGROUND_OPERATION, _current_operation, event_loop_blocked, event_loop_lag_seconds
+from .settings import get_settings
+
+settings = get_settings()
+
+# Most recent stalls longer than LOOP_BLOCKING_THRESHOLD_MS, for GET /metrics/blocking-calls
+blocking_calls: deque[dict] = deque(maxlen=settings.LOOP_BLOCKING_SAMPLES)
+
+# Innermost frames kept of a blocking call's stack
+BLOCKING_STACK_DEPTH = 30
+
+
+class LoopMonitor:
+    """
+    Description
+    -----------
+    Measures how late the event loop runs a timer that should fire every
+    `interval` seconds and records it in `event_loop_lag_seconds`. Lag
+    means a callback (e.g. argon2 or a broker publish inside a handler)
+    held the loop, and every other request waited for it.
+
+    With a `blocking_threshold`, a watchdog thread also catches the loop
+    while it's stuck for longer than that, and records the stack, task and
+    route (or Celery task) that held it in `blocking_calls` and the log.
+    Meant for dev and staging: the thread wakes up several times per
+    threshold, and taking the stack costs a little.
+    """
+
+    def __init__(self, interval: float, blocking_threshold: float = 0.0) -> None:
+        self._blocking_threshold = blocking_threshold
+        # The timer has to fire often enough to tell a stall from its own sleep
+        self._interval = min(interval, blocking_threshold / 2) if blocking_threshold > 0 else interval
+        self._last_beat = time.perf_counter()
+        self._stop = threading.Event()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        watchdog = None
+        if self._blocking_threshold > 0:
+            self._stop.clear()
+            watchdog = threading.Thread(
+                target=self._watch, args=(loop, threading.get_ident()), name="loop-watchdog", daemon=True,
+            )
+            watchdog.start()
+
+        try:
+            while True:
+                self._last_beat = time.perf_counter()
+                await asyncio.sleep(self._interval)
+                lag = time.perf_counter() - self._last_beat - self._interval
+                event_loop_lag_seconds.observe((), max(lag, 0.0))
+        finally:
+            self._stop.set()
+
+    def _watch(self, loop: asyncio.AbstractEventLoop, loop_thread_id: int) -> None:
+        stall = None
+        while not self._stop.wait(self._blocking_threshold / 4):
+            beat = self._last_beat
+            if stall is not None and beat != stall["beat"]:
+                # The loop got going again: the stall lasted until this beat
+                self._report(stall, beat - stall["beat"] - self._interval)
+                stall = None
+
+            if stall is None and time.perf_counter() - beat - self._interval >= self._blocking_threshold:
+                stall = self._capture(loop, loop_thread_id)
+                stall["beat"] = beat
+
+    def _capture(self, loop: asyncio.AbstractEventLoop, loop_thread_id: int) -> dict:
+        frame = sys._current_frames().get(loop_thread_id)
+        stack = traceback.format_stack(frame)[-BLOCKING_STACK_DEPTH:] if frame is not None else []
+
+        # The route or task comes from the running task's context (see metrics.measure_operation)
+        task = asyncio.current_task(loop)
+        stats = None
+        if task is not None and hasattr(task, "get_context"):
+            stats = task.get_context().get(_current_operation)
+
+        return {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "operation": (stats.operation if stats is not None else None) or BACKGROUND_OPERATION,
+            "task": task.get_name() if task is not None else None,
+            "stack": [line.rstrip() for line in stack],
+        }
+
+    def _report(self, stall: dict, seconds: float) -> None:
+        del stall["beat"]
+        stall["duration_ms"] = round(seconds * 1000, 1)
+        blocking_calls.append(stall)
+        event_loop_blocked.inc((stall["operation"],))
+        logging.warning("Event loop blocked for %.1f ms in %s (task %s):\n%s",
+                        stall["duration_ms"], stall["operation"], stall["task"], "\n".join(stall["stack"]))
+
+
+loop_monitor = LoopMonitor(settings.LOOP_LAG_INTERVAL_MS / 1000, settings.LOOP_BLOCKING_THRESHOLD_MS / 1000)
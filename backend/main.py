@@ -1,17 +1,90 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
+from backend.celery_app import celery_app
+from backend.events import hub
+from backend.helpers.helper_availability import availability
+from backend.indexes import check_indexes, ensure_indexes, ensure_indexes_in_background
+from backend.loop_monitor import loop_monitor
+from backend.middleware import RequestMetricsMiddleware, TracingMiddleware
+from backend.profiling import ProfilingMiddleware
+from backend.task_dispatcher import dispatcher, TaskQueueFull
 from backend.routes.auth import router as auth_router
 from backend.routes.profile_management import router as profile_management_router
 from backend.routes.groups import router as groups_router
 from backend.routes.chores import router as chores_router
+from backend.routes.events import router as events_router
+from backend.routes.dashboard import router as dashboard_router
+from backend.routes.metrics import router as metrics_router
 from backend.settings import get_settings
 
 settings = get_settings()
 
 FRONTEND_URL = settings.FRONTEND_URL
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Registering and renaming rely on the unique indexes to reject taken names,
+    # so don't serve without them. The others are built without holding up startup
+    index_task = None
+    if settings.MONGO_ENSURE_INDEXES:
+        await ensure_indexes(unique=True)
+        index_task = asyncio.create_task(ensure_indexes_in_background())
+    else:
+        await check_indexes(unique=True)
+
+    # Let the availability check answer from memory once this is done (and keep it fresh)
+    availability_task = asyncio.create_task(availability.rebuild_in_background())
+
+    # Event loop lag (and, if configured, blocking calls), see backend/loop_monitor.py
+    loop_monitor_task = asyncio.create_task(loop_monitor.run())
+
+    # Without a broker, tasks (and the beat schedule) run inside this process
+    if settings.TASK_BACKEND == "inprocess":
+        await dispatcher.start(celery_app.conf.beat_schedule if settings.INPROCESS_BEAT else None)
+
+    await hub.start()
+
+    yield
+
+    # Ends open event streams, which would otherwise hold up shutdown
+    await hub.stop()
+
+    if settings.TASK_BACKEND == "inprocess":
+        await dispatcher.stop()
+
+    if index_task is not None:
+        index_task.cancel()
+    availability_task.cancel()
+    loop_monitor_task.cancel()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.exception_handler(TaskQueueFull)
+async def task_queue_full_handler(request: Request, exc: TaskQueueFull):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, please try again later."},
+    )
+
+
+# Attribute MongoDB commands to routes, see backend/metrics.py
+app.add_middleware(RequestMetricsMiddleware)
+
+# Trace requests through tasks, MongoDB, S3 and SMTP, see backend/tracing.py
+if settings.TRACING_FILE:
+    app.add_middleware(TracingMiddleware)
+
+# Sample the stacks of selected requests, see backend/profiling.py
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
 
 # Add CORS middleware
 app.add_middleware(
@@ -22,10 +95,14 @@ app.add_middleware(
     ],
     allow_credentials=True,
     allow_methods=["GET", "POST"],
-    allow_headers=["Content-Type", "Content-Length"],
+    allow_headers=["Content-Type", "Content-Length", "traceparent"],
+    expose_headers=["X-Next-Cursor", "ETag", "traceresponse"],
 )
 
 app.include_router(auth_router, prefix="/auth")
 app.include_router(profile_management_router, prefix="/profile-management")
 app.include_router(groups_router, prefix="/groups")
 app.include_router(chores_router, prefix="/chores")
+app.include_router(events_router, prefix="/events")
+app.include_router(dashboard_router, prefix="/dashboard")
+app.include_router(metrics_router, prefix="/metrics")
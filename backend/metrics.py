@@ -0,0 +1,432 @@
+import logging
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from pymongo import monitoring
+
+from .events import hub
+from .helpers.helper_singleflight import singleflight_stats
+from .settings import get_settings
+from .tracing import Span, start_span
+
+settings = get_settings()
+
+
+def metrics_authorized(authorization: str | None) -> bool:
+    """
+    Whether a request may see metrics: it sends `Authorization: Bearer <METRICS_TOKEN>`,
+    or METRICS_TOKEN isn't set and this is DEV_MODE.
+    """
+    if not settings.METRICS_TOKEN:
+        return settings.DEV_MODE
+    return authorization is not None and secrets.compare_digest(authorization, f"Bearer {settings.METRICS_TOKEN}")
+
+
+class Counter:
+    """A monotonically increasing value per label set."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, label_names: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple[str, ...] = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterator[tuple[str, tuple[str, ...], float]]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield self.name, labels, value
+
+
+class Summary:
+    """Count and sum of observed values per label set (Prometheus summary without quantiles)."""
+
+    type = "summary"
+
+    def __init__(self, name: str, help: str, label_names: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self._values: dict[tuple[str, ...], list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple[str, ...], value: float, count: int = 1) -> None:
+        """Records `count` observations adding up to `value`."""
+        with self._lock:
+            count_and_sum = self._values.setdefault(labels, [0, 0.0])
+            count_and_sum[0] += count
+            count_and_sum[1] += value
+
+    def samples(self) -> Iterator[tuple[str, tuple[str, ...], float]]:
+        with self._lock:
+            values = [(labels, tuple(count_and_sum)) for labels, count_and_sum in self._values.items()]
+        for labels, (count, total) in values:
+            yield f"{self.name}_count", labels, count
+            yield f"{self.name}_sum", labels, total
+
+
+class QuantileSummary:
+    """
+    Description
+    -----------
+    Prometheus summary with quantiles (e.g. p50/p95/p99) per label set,
+    computed at scrape time over the last `window` observations.
+    """
+
+    type = "summary"
+
+    def __init__(self, name: str, help: str, label_names: tuple[str, ...] = (),
+                 quantiles: tuple[float, ...] = (0.5, 0.95, 0.99), window: int = 1024) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = (*label_names, "quantile")
+        self._quantiles = quantiles
+        self._window = window
+        self._values: dict[tuple[str, ...], tuple[deque, list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple[str, ...], value: float) -> None:
+        with self._lock:
+            recent, count_and_sum = self._values.setdefault(labels, (deque(maxlen=self._window), [0, 0.0]))
+            recent.append(value)
+            count_and_sum[0] += 1
+            count_and_sum[1] += value
+
+    def quantiles(self, labels: tuple[str, ...]) -> dict[float, float]:
+        """The current quantiles for `labels` (empty if nothing was observed)."""
+        with self._lock:
+            recent = sorted(self._values[labels][0]) if labels in self._values else []
+        if not recent:
+            return {}
+        return {quantile: recent[min(len(recent) - 1, int(quantile * len(recent)))] for quantile in self._quantiles}
+
+    def samples(self) -> Iterator[tuple[str, tuple[str, ...], float]]:
+        with self._lock:
+            label_sets = [(labels, tuple(count_and_sum)) for labels, (_, count_and_sum) in self._values.items()]
+        for labels, (count, total) in label_sets:
+            for quantile, value in self.quantiles(labels).items():
+                yield self.name, (*labels, str(quantile)), value
+            # The count and sum don't have a quantile label
+            yield f"{self.name}_count", labels, count
+            yield f"{self.name}_sum", labels, total
+
+
+class CallbackGauge:
+    """A gauge whose values are read from `fn` (label set -> value) at scrape time."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, label_names: tuple[str, ...], fn: Callable[[], dict[tuple[str, ...], float]]) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self._fn = fn
+
+    def samples(self) -> Iterator[tuple[str, tuple[str, ...], float]]:
+        for labels, value in self._fn().items():
+            yield self.name, labels, value
+
+
+class MetricsRegistry:
+    """
+    Description
+    -----------
+    The metrics of this process, rendered in the Prometheus text format
+    by `GET /metrics`.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: list = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self, const_labels: dict[str, str] | None = None) -> str:
+        """
+        The metrics in the Prometheus text format, with `const_labels` added
+        to every sample (e.g. to tell apart worker processes' files).
+        """
+        const_names, const_values = tuple((const_labels or {}).keys()), tuple((const_labels or {}).values())
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                label_names = (*const_names, *metric.label_names[:len(labels)])
+                lines.append(f"{name}{_format_labels(label_names, (*const_values, *labels))} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names or not values:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+registry = MetricsRegistry()
+
+mongo_command_seconds = registry.register(Summary(
+    "mongo_command_duration_seconds", "MongoDB commands and the time spent in them, by operation (route or task) and command name.", ("operation", "command")))
+mongo_command_failures = registry.register(Counter(
+    "mongo_command_failures_total", "Failed MongoDB commands by operation and command name.", ("operation", "command")))
+mongo_operation_commands = registry.register(Summary(
+    "mongo_operation_commands", "MongoDB commands per request or task run, by operation.", ("operation",)))
+operation_phase_seconds = registry.register(Summary(
+    "operation_phase_seconds", "Time requests and task runs spent in each phase (auth, db, argon2, broker), by operation.", ("operation", "phase")))
+http_requests = registry.register(Counter(
+    "http_requests_total", "Requests by route and status code.", ("operation", "status")))
+http_request_seconds = registry.register(QuantileSummary(
+    "http_request_duration_seconds", "Request latency by route, with p50/p95/p99 over recent requests.", ("operation",),
+    window=settings.METRICS_LATENCY_WINDOW))
+event_loop_lag_seconds = registry.register(QuantileSummary(
+    "event_loop_lag_seconds", "How late the event loop ran a timer, with p50/p95/p99 over recent samples.",
+    window=settings.METRICS_LATENCY_WINDOW))
+event_loop_blocked = registry.register(Counter(
+    "event_loop_blocked_total", "Times the event loop was blocked longer than LOOP_BLOCKING_THRESHOLD_MS, by operation.", ("operation",)))
+celery_task_queue_wait_seconds = registry.register(QuantileSummary(
+    "celery_task_queue_wait_seconds", "Time from publishing a task to a worker starting it, by task.", ("task",),
+    window=settings.METRICS_LATENCY_WINDOW))
+celery_task_runtime_seconds = registry.register(QuantileSummary(
+    "celery_task_runtime_seconds", "Task run time on the worker, by task.", ("task",),
+    window=settings.METRICS_LATENCY_WINDOW))
+celery_tasks = registry.register(Counter(
+    "celery_tasks_total", "Task runs by task and outcome (SUCCESS, FAILURE, RETRY).", ("task", "state")))
+
+# Counters kept by other modules
+registry.register(CallbackGauge(
+    "singleflight_calls", "Reads made through each SingleFlight.", ("name",),
+    lambda: {(name,): stats["calls"] for name, stats in singleflight_stats().items()}))
+registry.register(CallbackGauge(
+    "singleflight_coalesced", "Reads that shared another caller's in-flight query.", ("name",),
+    lambda: {(name,): stats["coalesced"] for name, stats in singleflight_stats().items()}))
+registry.register(CallbackGauge(
+    "event_subscriber_evictions", "Event stream subscribers dropped for falling behind.", (),
+    lambda: {(): hub.evictions}))
+
+
+def _resident_memory_bytes() -> float:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Not Linux: the peak is the best there is (in bytes on macOS)
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+registry.register(CallbackGauge(
+    "process_resident_memory_bytes", "Resident memory of this process.", (),
+    lambda: {(): _resident_memory_bytes()}))
+
+
+# Label for commands issued outside a request or task (startup, background work)
+BACKGROUND_OPERATION = "background"
+
+
+class OperationStats:
+    """
+    Description
+    -----------
+    MongoDB commands issued by one request or task run, and the time it
+    spent in each phase (see `timed`), reported to the registry under
+    `operation` when it finishes.
+
+    Shared by the tasks the request spawns (e.g. with asyncio.gather), so
+    `db_seconds` adds up concurrent commands and can exceed wall time.
+    Phases can overlap too (auth includes the user lookup's db time).
+    """
+
+    def __init__(self, operation: str | None = None) -> None:
+        self.operation = operation
+        self.db_commands = 0
+        self.db_seconds = 0.0
+        self.phase_seconds: dict[str, float] = {}
+        self._commands: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def add_time(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + seconds
+
+    def record(self, command: str, seconds: float, failed: bool) -> None:
+        with self._lock:
+            self.db_commands += 1
+            self.db_seconds += seconds
+            count_and_seconds = self._commands.setdefault(command, [0, 0.0, 0])
+            count_and_seconds[0] += 1
+            count_and_seconds[1] += seconds
+            count_and_seconds[2] += failed
+
+    def flush(self) -> None:
+        operation = self.operation or BACKGROUND_OPERATION
+        with self._lock:
+            commands, self._commands = self._commands, {}
+            db_commands, db_seconds = self.db_commands, self.db_seconds
+            phase_seconds = dict(self.phase_seconds)
+        for command, (count, seconds, failures) in commands.items():
+            mongo_command_seconds.observe((operation, command), seconds, count)
+            if failures:
+                mongo_command_failures.inc((operation, command), failures)
+        mongo_operation_commands.observe((operation,), db_commands)
+        for phase, seconds in {"db": db_seconds, **phase_seconds}.items():
+            operation_phase_seconds.observe((operation, phase), seconds)
+
+
+_current_operation: ContextVar[OperationStats | None] = ContextVar("current_operation", default=None)
+
+
+def current_operation() -> OperationStats | None:
+    return _current_operation.get()
+
+
+@contextmanager
+def measure_operation(operation: str | None = None) -> Iterator[OperationStats]:
+    """
+    Attributes the MongoDB commands issued inside the block to `operation`
+    (which may also be set on the yielded stats before the block ends).
+    """
+    stats = OperationStats(operation)
+    token = _current_operation.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_operation.reset(token)
+        stats.flush()
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Adds the time spent in the block to `phase` of the current request or task, if any."""
+    stats = _current_operation.get()
+    if stats is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add_time(phase, time.perf_counter() - start)
+
+
+def measured(operation: str, fn: Callable) -> Callable:
+    """`fn` wrapped in `measure_operation`, e.g. to run a task body on another thread."""
+    def wrapper(*args, **kwargs):
+        with measure_operation(operation):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+async def measured_coroutine(operation: str, coro):
+    """Awaits `coro` inside `measure_operation`."""
+    with measure_operation(operation):
+        return await coro
+
+
+# Most recent commands slower than MONGO_SLOW_QUERY_MS, for GET /metrics/slow-queries
+slow_queries: deque[dict] = deque(maxlen=settings.MONGO_SLOW_QUERY_SAMPLES)
+
+# Command fields holding the query, for the slow-query samples
+_QUERY_FIELDS = ("filter", "query", "pipeline", "updates", "deletes")
+
+
+def _query_shape(value):
+    # Keeps the structure of a query but not its values (which may be personal data)
+    if isinstance(value, dict):
+        return {key: _query_shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_query_shape(item) for item in value[:5]]
+    return "?"
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """
+    Description
+    -----------
+    Reports every MongoDB command to the request or task that issued it
+    (see `measure_operation`), and keeps samples of slow ones.
+
+    Passed to every client as `event_listeners=[command_listener]`. The
+    events are published by the coroutine or thread running the command,
+    so the context variable identifies who issued it.
+    """
+
+    def __init__(self, slow_query_ms: float) -> None:
+        self._slow_query_seconds = slow_query_ms / 1000
+        # Started commands' documents, kept until they finish for the slow-query samples
+        self._started: dict[tuple, dict] = {}
+        # Spans of started commands issued by traced requests and tasks (see backend/tracing.py)
+        self._spans: dict[tuple, Span] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if self._slow_query_seconds > 0:
+            self._started[(event.connection_id, event.request_id)] = event.command
+        span = start_span(f"mongo {event.command_name}", {
+            "db.name": event.database_name,
+            "db.collection": event.command.get(event.command_name),
+        })
+        if span is not None:
+            self._spans[(event.connection_id, event.request_id)] = span
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finished(event, failed=False)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finished(event, failed=True)
+
+    def _finished(self, event, failed: bool) -> None:
+        seconds = event.duration_micros / 1_000_000
+        command = self._started.pop((event.connection_id, event.request_id), None)
+        span = self._spans.pop((event.connection_id, event.request_id), None)
+        if span is not None:
+            span.end(str(event.failure.get("errmsg", "command failed")) if failed else None)
+
+        stats = _current_operation.get()
+        if stats is not None:
+            stats.record(event.command_name, seconds, failed)
+        else:
+            mongo_command_seconds.observe((BACKGROUND_OPERATION, event.command_name), seconds)
+            if failed:
+                mongo_command_failures.inc((BACKGROUND_OPERATION, event.command_name))
+
+        if command is not None and seconds >= self._slow_query_seconds:
+            self._record_slow_query(event, command, seconds, stats)
+
+    def _record_slow_query(self, event, command: dict, seconds: float, stats: OperationStats | None) -> None:
+        sample = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            # A request's path until its route is known
+            "operation": stats.operation if stats is not None else BACKGROUND_OPERATION,
+            "command": event.command_name,
+            "collection": command.get(event.command_name),
+            "database": event.database_name,
+            "duration_ms": round(seconds * 1000, 1),
+        }
+        for field in _QUERY_FIELDS:
+            if field in command:
+                sample[field] = _query_shape(command[field])
+                break
+        slow_queries.append(sample)
+        logging.warning("Slow MongoDB %s on %s (%.1f ms) in %s",
+                        sample["command"], sample["collection"], sample["duration_ms"], sample["operation"])
+
+
+command_listener = CommandMetricsListener(settings.MONGO_SLOW_QUERY_MS)
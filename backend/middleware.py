@@ -0,0 +1,138 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .metrics import OperationStats, http_request_seconds, http_requests, measure_operation, metrics_authorized
+from .settings import get_settings
+from .tracing import TRACEPARENT_HEADER, span
+
+settings = get_settings()
+
+# Operation label for requests that matched no route, so scanners can't add labels
+UNMATCHED_OPERATION = "unmatched"
+
+
+def route_operation(scope: Scope) -> str:
+    """`METHOD /route/{template}` of the route that handled the request."""
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if path_format is None:
+        return UNMATCHED_OPERATION
+
+    # Routes of an included router only know their path within it, so the
+    # router's prefix is what's left of the request path before the route's part
+    try:
+        route_path = path_format.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError):
+        route_path = None
+    if route_path is not None and scope["path"].endswith(route_path):
+        path_format = scope["path"][:len(scope["path"]) - len(route_path)] + path_format
+    return f"{scope['method']} {path_format}"
+
+
+def server_timing(stats: OperationStats, total_seconds: float, detailed: bool) -> str:
+    """
+    `Server-Timing` header value for a request: total and, if `detailed`,
+    db and whichever phases it went through.
+    """
+    entries = [f"total;dur={total_seconds * 1000:.1f}"]
+    if detailed:
+        entries.append(f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.db_commands} queries"')
+        entries.extend(f"{phase};dur={seconds * 1000:.1f}" for phase, seconds in stats.phase_seconds.items())
+    return ", ".join(entries)
+
+
+class RequestMetricsMiddleware:
+    """
+    Description
+    -----------
+    Times each request and attributes the MongoDB commands and phases
+    (auth, argon2, broker, see `metrics.timed`) it went through to its
+    route (see backend/metrics.py). Reports them to the client in a
+    `Server-Timing` header:
+
+        Server-Timing: total;dur=48.1, db;dur=4.2;desc="3 queries", auth;dur=2.3, argon2;dur=40.7
+
+    Only requests allowed to see metrics (see `metrics.metrics_authorized`)
+    get more than `total`: which phases a request went through, and its
+    query count, can tell whether e.g. a user exists.
+
+    `total` is the time until the response started. The latency recorded
+    in the route's histogram runs until the response body was sent.
+
+    A plain ASGI middleware rather than BaseHTTPMiddleware, so streaming
+    responses (e.g. GET /events) aren't buffered or run in another task.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1") or None
+        detailed_timing = metrics_authorized(authorization)
+
+        with measure_operation(f"{scope['method']} {scope['path']}") as stats:
+            async def send_with_timing(message: Message) -> None:
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    # Routing is done by the time the response starts
+                    stats.operation = route_operation(scope)
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"server-timing", server_timing(stats, time.perf_counter() - start, detailed_timing).encode()),
+                        # Lets the frontend (another origin) read the timings
+                        (b"timing-allow-origin", settings.FRONTEND_URL.encode()),
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                stats.operation = route_operation(scope)
+                http_requests.inc((stats.operation, str(status_code)))
+                http_request_seconds.observe((stats.operation,), time.perf_counter() - start)
+
+
+class TracingMiddleware:
+    """
+    Description
+    -----------
+    Runs each request in a span (see backend/tracing.py), continuing the
+    trace of an incoming `traceparent` header if there is one. The spans
+    of its MongoDB commands, and of the tasks it queues (through their
+    message headers), end up in the same trace.
+
+    The response's `traceresponse` header carries the trace id, to look
+    up a slow request's trace in TRACING_FILE.
+
+    Only added to the app when TRACING_FILE is set (see main.py).
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = dict(scope["headers"]).get(TRACEPARENT_HEADER.encode(), b"").decode("latin-1")
+        with span(f"{scope['method']} {scope['path']}", {"http.method": scope["method"]}, traceparent, root=True) as request_span:
+            async def send_with_trace(message: Message) -> None:
+                if message["type"] == "http.response.start" and request_span is not None:
+                    request_span.attributes["http.status_code"] = message["status"]
+                    message["headers"] = [*message.get("headers", []), (b"traceresponse", request_span.traceparent.encode())]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace)
+            finally:
+                if request_span is not None:
+                    request_span.name = route_operation(scope)
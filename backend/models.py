@@ -1,5 +1,34 @@
 from datetime import datetime
-from pydantic import BaseModel, Field, field_validator
+from typing import Annotated, Any, Literal
+
+from bson.objectid import ObjectId
+from pydantic import BaseModel, BeforeValidator, Field, GetCoreSchemaHandler
+from pydantic_core import core_schema
+
+
+class _ObjectIdAsStr:
+    """
+    Pydantic schema for `PyObjectId`: accepts a str or a bson ObjectId and
+    always yields a str. The checks run in pydantic-core, so the only Python
+    call left per value is `str(ObjectId)`.
+    """
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source_type: Any, handler: GetCoreSchemaHandler) -> core_schema.CoreSchema:
+        from_object_id = core_schema.no_info_after_validator_function(
+            str, core_schema.is_instance_schema(ObjectId)
+        )
+        return core_schema.json_or_python_schema(
+            json_schema=core_schema.str_schema(),
+            python_schema=core_schema.union_schema([from_object_id, core_schema.str_schema(strict=True)]),
+        )
+
+
+# A MongoDB ObjectId, exposed in the API as its hex string
+PyObjectId = Annotated[str, _ObjectIdAsStr]
+
+# A list of ObjectIds that older documents may store as null
+ObjectIdList = Annotated[list[PyObjectId], BeforeValidator(lambda value: value or [])]
 
 
 class Token(BaseModel):
@@ -13,7 +42,7 @@ class TokenData(BaseModel):
 
 class User(BaseModel):
     # Expose MongoDB _id in API responses while accepting it from Mongo documents
-    id: str | None = Field(
+    id: PyObjectId | None = Field(
         default=None,
         serialization_alias="_id",
         validation_alias="_id",
@@ -23,29 +52,7 @@ class User(BaseModel):
     full_name: str | None = None
     email_verified: bool = False
     profile_picture_url: str | None = None
-    group_ids: list[str] = Field(default_factory=list)
-
-    # Ensure Mongo's ObjectId gets serialized as a string
-    @field_validator("id", mode="before")
-    @classmethod
-    def _convert_object_id(cls, v):
-        if v is None:
-            return v
-        try:
-            return str(v)
-        except Exception:
-            return v
-
-    @field_validator("group_ids", mode="before")
-    @classmethod
-    def _convert_group_ids(cls, v):
-        # normalize missing/None to empty list and ObjectId items to strings
-        if v is None:
-            return []
-        try:
-            return [str(item) for item in v]
-        except Exception:
-            return v
+    group_ids: ObjectIdList = Field(default_factory=list)
 
 
 class UserInDB(User):
@@ -59,48 +66,19 @@ class UserCreate(BaseModel):
     full_name: str | None = None
 
 
-
 class Group(BaseModel):
     """Model representing a household group."""
-    id: str | None = Field(
+    id: PyObjectId | None = Field(
         default=None,
         serialization_alias="_id",
         validation_alias="_id",
     )
     group_name: str = Field(..., min_length=5, max_length=35)
-    group_admin_id: str
+    group_admin_id: PyObjectId
     group_admin_username: str
-    users_in_group: list[str] = Field(default_factory=list)
+    users_in_group: ObjectIdList = Field(default_factory=list)
     created_at: datetime | None = None
 
-    @field_validator("id", mode="before")
-    @classmethod
-    def _convert_object_id(cls, v):
-        if v is None:
-            return v
-        try:
-            return str(v)
-        except Exception:
-            return v
-
-    @field_validator("group_admin_id", mode="before")
-    @classmethod
-    def _convert_admin_id(cls, v):
-        try:
-            return str(v)
-        except Exception:
-            return v
-
-    @field_validator("users_in_group", mode="before")
-    @classmethod
-    def _convert_user_ids(cls, v):
-        if v is None:
-            return []
-        try:
-            return [str(item) for item in v]
-        except Exception:
-            return v
-
 
 class GroupCreate(BaseModel):
     """Payload for creating a new group."""
@@ -108,13 +86,13 @@ class GroupCreate(BaseModel):
 
 class Chore(BaseModel):
     # Expose MongoDB _id in API responses while accepting it from Mongo documents
-    id: str | None = Field(
+    id: PyObjectId | None = Field(
         default=None,
         serialization_alias="_id",
         validation_alias="_id",
     )
 
-    group_id: str | None = Field(
+    group_id: PyObjectId | None = Field(
         default=None,
         serialization_alias="group_id",
         validation_alias="group_id",
@@ -122,36 +100,25 @@ class Chore(BaseModel):
 
     chore_name: str
     chore_description: str
-    assigned_user_id: str
+    assigned_user_id: PyObjectId
     is_completed: bool = False
     created_at: datetime
     completed_at: datetime | None = None
-    recurring_chore_id: str | None = Field(
+    recurring_chore_id: PyObjectId | None = Field(
         default=None,
         serialization_alias="recurring_chore_id",
         validation_alias="recurring_chore_id",
     )
 
-    # Ensure Mongo's ObjectId gets serialized as a string
-    @field_validator("id", "group_id", "recurring_chore_id", mode="before")
-    @classmethod
-    def _convert_object_id(cls, v):
-        if v is None:
-            return v
-        try:
-            return str(v)
-        except Exception:
-            return v
-
 
 class RecurringChore(BaseModel):
-    id: str | None = Field(
+    id: PyObjectId | None = Field(
         default=None,
         serialization_alias="_id",
         validation_alias="_id",
     )
 
-    group_id: str | None = Field(
+    group_id: PyObjectId | None = Field(
         default=None,
         serialization_alias="group_id",
         validation_alias="group_id",
@@ -159,7 +126,7 @@ class RecurringChore(BaseModel):
 
     chore_name: str
     chore_description: str
-    assigned_user_ids: list[str] = Field(default_factory=list)
+    assigned_user_ids: ObjectIdList = Field(default_factory=list)
     rrule: str
     start_date: datetime
     next_due_date: datetime
@@ -167,23 +134,18 @@ class RecurringChore(BaseModel):
     last_assigned_user_index: int = 0
     created_at: datetime
 
-    @field_validator("id", "group_id", mode="before")
-    @classmethod
-    def _convert_object_id(cls, v):
-        if v is None:
-            return v
-        try:
-            return str(v)
-        except Exception:
-            return v
-
-    @field_validator("assigned_user_ids", mode="before")
-    @classmethod
-    def _convert_assigned_user_ids(cls, v):
-        # normalize missing/None to empty list and ObjectId items to strings
-        if v is None:
-            return []
-        try:
-            return [str(item) for item in v]
-        except Exception:
-            return v
+
+class ChoreTombstone(BaseModel):
+    """A deleted chore, or a deleted recurring chore together with all chores generated from it."""
+    kind: Literal["chore", "recurring_chore"]
+    deleted_id: PyObjectId
+    deleted_at: datetime
+
+
+class ChoreChanges(BaseModel):
+    """Changes to a group's chores after a given revision."""
+    revision: int
+    chores: list[Chore] = Field(default_factory=list)
+    deleted: list[ChoreTombstone] = Field(default_factory=list)
+    # `cursor` for the next page of a first sync, or None
+    next_cursor: str | None = None
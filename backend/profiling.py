@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import os
+import random
+import re
+import secrets
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .middleware import route_operation
+from .settings import get_settings
+
+settings = get_settings()
+
+# Request header that asks for a profile (its value must be PROFILING_TOKEN)
+PROFILE_HEADER = b"x-profile-token"
+# Deepest stack kept per sample
+MAX_STACK_DEPTH = 128
+# Installed packages and the standard library, cut from frames' file names
+_LIBRARY_DIRS = tuple(
+    os.path.join(sysconfig.get_paths()[name], "") for name in ("purelib", "platlib", "stdlib")
+)
+
+
+def _frame_name(frame) -> str:
+    """`function (file:line)`, with the file shortened to its package path (backend/..., fastapi/..., asyncio/...)."""
+    code = frame.f_code
+    filename = code.co_filename
+    library_dir = next((directory for directory in _LIBRARY_DIRS if filename.startswith(directory)), None)
+    if library_dir is not None:
+        filename = filename[len(library_dir):]
+    elif filename.startswith(os.getcwd()):
+        filename = os.path.relpath(filename)
+    # Frames are separated by `;` in the collapsed format
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+class StackSampler:
+    """
+    Description
+    -----------
+    Statistical profiler for the event loop thread: a background thread
+    records the loop thread's stack every `interval` seconds.
+
+    The loop interleaves every request in flight, so each sample is
+    rooted at "profiled request" when the profiled request's task was
+    the one running, and "other tasks" (or the loop waiting for I/O)
+    otherwise.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self._interval = interval
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self.samples: Counter[str] = Counter()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            stack.reverse()
+
+            running = asyncio.current_task(self._loop)
+            root = "profiled request" if running is self._task else "other tasks" if running is not None else "event loop"
+            self.samples[";".join([root, *stack])] += 1
+
+    def collapsed(self) -> str:
+        """The samples in the collapsed stack format (flamegraph.pl, speedscope, ...)."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def _write_profile(directory: Path, name: str, content: str, max_profiles: int) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / name).write_text(content)
+
+    # Keep the newest `max_profiles`
+    profiles = sorted(directory.glob("*.collapsed"), key=lambda path: path.stat().st_mtime, reverse=True)
+    for old_profile in profiles[max_profiles:]:
+        old_profile.unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    """
+    Description
+    -----------
+    Profiles requests that carry `X-Profile-Token: <PROFILING_TOKEN>`,
+    and a random PROFILING_SAMPLE_RATE share of all others, with
+    `StackSampler`. Only one request is profiled at a time.
+
+    Each profile is written to PROFILING_DIR as collapsed stacks, named
+    after the time, route and an id that's returned in the `X-Profile-Id`
+    response header. Only the newest PROFILING_MAX_PROFILES are kept.
+
+    Only added to the app when PROFILING_ENABLED is set (see main.py).
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._busy = False
+
+    def _wants_profile(self, scope: Scope) -> bool:
+        token = dict(scope["headers"]).get(PROFILE_HEADER)
+        if token is not None and settings.PROFILING_TOKEN:
+            return secrets.compare_digest(token, settings.PROFILING_TOKEN.encode())
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._busy or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self._busy = True
+        profile_id = secrets.token_hex(4)
+        sampler = StackSampler(settings.PROFILING_INTERVAL_MS / 1000)
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            await asyncio.to_thread(sampler.stop)
+            self._busy = False
+
+            route = re.sub(r"[^\w-]+", "_", route_operation(scope)).strip("_")
+            name = f"{time.strftime('%Y%m%dT%H%M%S')}-{route}-{profile_id}.collapsed"
+            try:
+                await asyncio.to_thread(
+                    _write_profile, Path(settings.PROFILING_DIR), name, sampler.collapsed(), settings.PROFILING_MAX_PROFILES,
+                )
+            except OSError:
+                logging.exception("Failed to write profile %s", name)
@@ -1,14 +1,20 @@
 from datetime import timedelta
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status, Form, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Form, Query, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from backend.models import User
 from pymongo import AsyncMongoClient
+from pymongo.errors import DuplicateKeyError
+from bson.objectid import ObjectId
 
+from backend.metrics import command_listener
 from backend.settings import get_settings
 
-from backend.helpers.helper_auth import get_password_hash, verify_password, authenticate_user, create_access_token, get_current_user
+from backend.helpers.helper_availability import availability
+from backend.helpers.helper_groups import publish_group_event, group_reads
+from backend.helpers.helper_tokens import token_query
+from backend.helpers.helper_auth import get_password_hash, verify_password, authenticate_user, create_access_token, get_current_user, user_reads
 from backend.celery_worker import forgot_password_requested_task, verify_email_helper_task
 
 
@@ -25,17 +31,32 @@ DB_NAME = settings.DB_NAME
 USERS_COLLECTION = settings.USERS_COLLECTION
 PASSWORD_RESET_COLLECTION = settings.PASSWORD_RESET_COLLECTION
 EMAIL_VERIFICATION_COLLECTION = settings.EMAIL_VERIFICATION_COLLECTION
+GROUPS_COLLECTION = settings.GROUPS_COLLECTION
 
 # Initialize MongoDB client
-client = AsyncMongoClient(MONGO_URI)
+client = AsyncMongoClient(MONGO_URI, event_listeners=[command_listener])
 _db = client[DB_NAME]
 users_coll = _db[USERS_COLLECTION]
 password_reset_coll = _db[PASSWORD_RESET_COLLECTION]
 email_verification_coll = _db[EMAIL_VERIFICATION_COLLECTION]
+groups_coll = _db[GROUPS_COLLECTION]
 
 
 router = APIRouter()
 
+# 400 details for a duplicate key on the users collection's unique indexes (backend/indexes.py)
+TAKEN_DETAILS = {"username": "Username already taken", "email": "Email already taken"}
+
+
+def _already_taken(error: DuplicateKeyError) -> HTTPException:
+    """Translates a duplicate username or email into the 400 the frontend expects."""
+    key_pattern = (error.details or {}).get("keyPattern") or {}
+    for field, detail in TAKEN_DETAILS.items():
+        # Older servers only name the index in the message
+        if field in key_pattern or f"{field}_1" in str(error):
+            return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+    raise error
+
 
 @router.post("/register", status_code=201)
 async def register_user(
@@ -45,26 +66,11 @@ async def register_user(
     full_name: Annotated[str, Form(..., min_length=5, max_length=100)],
 ):
     """
-    - Checks that the username does not already exist.
     - Hashes the password
     - Stores the user document in MongoDB.
+    - The unique indexes on username and email reject taken ones, so
+      concurrent signups can't both get the same name.
     """
-    # Make sure username is unique
-    existing_username = await users_coll.find_one({"username": username})
-    if existing_username:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already taken",
-        )
-
-    # Make sure email is unique
-    existing_email = await users_coll.find_one({"email": email})
-    if existing_email:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already taken",
-        )
-
     # Hash the password
     hashed_pwd = get_password_hash(password)
 
@@ -80,27 +86,60 @@ async def register_user(
     }
 
     # Insert into MongoDB
-    await users_coll.insert_one(user_doc)
+    try:
+        await users_coll.insert_one(user_doc)
+    except DuplicateKeyError as e:
+        raise _already_taken(e) from e
+    availability.add(username=username, email=email)
 
     verify_email_helper_task.delay(email)
 
     return {"msg": "User registered successfully"}
 
 
+@router.get("/availability")
+async def check_availability(
+    username: Annotated[str | None, Query(min_length=5, max_length=35)] = None,
+    email: Annotated[str | None, Query(pattern=r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")] = None,
+):
+    """
+    - Tells the signup (or change username) form whether a username and/or
+      email are still free, so it can check as the user types.
+    - Names that were never taken are answered from an in-memory Bloom
+      filter without querying MongoDB. "Available" is a hint: a name taken
+      through another API process since the filter was last rebuilt (see
+      AVAILABILITY_FILTER_REBUILD_SECONDS) is reported available too, and
+      registering still checks. "Taken" is always checked in MongoDB.
+    - Returns username_available / email_available (None for a value not asked about).
+    """
+    if username is None and email is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide a username and/or an email to check",
+        )
+
+    return {
+        "username_available": await availability.is_available("username", username) if username is not None else None,
+        "email_available": await availability.is_available("email", email) if email is not None else None,
+    }
+
+
 @router.post("/verify-email")
 async def verify_email(email_verification_token: str = Form()):
-    # Check if the verification token is valid
-    token_valid = await email_verification_coll.find_one({"email_verification_url": email_verification_token})
+    # Check if the verification token is valid (and consume it)
+    token_valid = await email_verification_coll.find_one_and_delete(
+        token_query(email_verification_token, settings.EMAIL_VERIFICATION_TOKEN_EXPIRE_MINUTES))
     if not token_valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid email verification token",
         )
 
-    await users_coll.update_one({"email": token_valid["email"]},  # Use email from email verification doc
-                                {"$set": {"email_verified": True}})
-
-    await email_verification_coll.delete_one({"email_verification_url": email_verification_token})
+    user = await users_coll.find_one_and_update({"email": token_valid["email"]},  # Use email from email verification doc
+                                                {"$set": {"email_verified": True}},
+                                                projection={"username": 1})
+    if user:
+        user_reads.forget(user["username"])
 
     return {"msg": "Email successfully verified."}
 
@@ -179,18 +218,20 @@ async def forgot_password(email: Annotated[str, Form(..., pattern=r"^[a-zA-Z0-9.
 
 @router.post("/reset-password")
 async def reset_password(reset_token: str = Form(), new_password: str = Form(min_length=15)):
-    # Check if the reset token is valid
-    token_valid = await password_reset_coll.find_one({"password_reset_url": reset_token})
+    # Check if the reset token is valid (and consume it)
+    token_valid = await password_reset_coll.find_one_and_delete(
+        token_query(reset_token, settings.PASSWORD_RESET_TOKEN_EXPIRE_MINUTES))
     if not token_valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid password reset token",
         )
 
-    await users_coll.update_one({"email": token_valid["email"]}, # Use email from forgot password doc
-                                {"$set": {"hashed_password": get_password_hash(new_password)}})
-
-    await password_reset_coll.delete_one({"password_reset_url": reset_token})
+    user = await users_coll.find_one_and_update({"email": token_valid["email"]}, # Use email from forgot password doc
+                                                {"$set": {"hashed_password": get_password_hash(new_password)}},
+                                                projection={"username": 1})
+    if user:
+        user_reads.forget(user["username"])
 
     return {"msg": "Password successfully reset."}
 
@@ -200,15 +241,23 @@ async def change_username(
     new_username: Annotated[str, Form(..., min_length=5, max_length=35)],
     current_user: Annotated[User, Depends(get_current_user)]):
 
-    existing_user = await users_coll.find_one({"username":new_username})
-
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already taken",
+    # The unique index on username rejects taken ones
+    try:
+        await users_coll.update_one({"username": current_user.username}, {"$set": {"username": new_username}})
+    except DuplicateKeyError as e:
+        raise _already_taken(e) from e
+    user_reads.forget(current_user.username)
+    availability.add(username=new_username)
+
+    # Group details list member usernames, so the user's groups have changed too
+    if current_user.group_ids:
+        await groups_coll.update_many(
+            {"_id": {"$in": [ObjectId(group_id) for group_id in current_user.group_ids]}},
+            {"$inc": {"revision": 1}},
         )
-    
-    await users_coll.update_one({"username": current_user.username}, {"$set": {"username": new_username}})
+        for group_id in current_user.group_ids:
+            group_reads.forget(ObjectId(group_id))
+            publish_group_event(group_id, "group")
 
     access_token = create_access_token(
         data={"sub": new_username},
@@ -250,5 +299,6 @@ async def change_password(
         {"username": current_user.username},
         {"$set": {"hashed_password": new_hashed_password}}
     )
+    user_reads.forget(current_user.username)
 
     return {"msg": "Password successfully changed."}
@@ -1,7 +1,7 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status, Form
-from pymongo import AsyncMongoClient
+from fastapi import APIRouter, Depends, HTTPException, status, Form, Query, Request
+from pymongo import AsyncMongoClient, ReturnDocument
 
 from dateutil.rrule import rrulestr
 from dateutil.parser import parse
@@ -9,10 +9,30 @@ from dateutil.parser import parse
 from bson.objectid import ObjectId
 import datetime
 
+from backend.metrics import command_listener
 from backend.settings import get_settings
-from backend.models import User, Chore, RecurringChore
+from backend.models import User, Chore, RecurringChore, ChoreChanges
 from backend.helpers.helper_auth import get_current_user
-from backend.helpers.helper_chores import validate_and_get_user_ids, recalculate_schedule
+from backend.helpers.helper_chores import validate_and_get_user_ids, recalculate_schedule, encode_chore_cursor, chores_after_cursor, parse_object_id
+from backend.helpers.helper_groups import (
+    PENDING_REVISION,
+    bump_group_revision,
+    publish_group_event,
+    stamp_revision,
+    get_group_revision,
+    group_etag,
+    etag_matches,
+    not_modified,
+)
+from backend.helpers.helper_singleflight import SingleFlight
+from backend.helpers.helper_streaming import streaming_media_type, stream_documents
+from backend.helpers.helper_serialization import (
+    fast_json_response,
+    chore_shape,
+    recurring_chore_shape,
+    chore_list_adapter,
+    recurring_chore_list_adapter,
+)
 
 
 settings = get_settings()
@@ -24,21 +44,60 @@ USERS_COLLECTION = settings.USERS_COLLECTION
 GROUPS_COLLECTION = settings.GROUPS_COLLECTION
 CHORES_COLLECTION = settings.CHORES_COLLECTION
 RECURRING_CHORES_COLLECTION = settings.RECURRING_CHORES_COLLECTION
+CHORE_TOMBSTONES_COLLECTION = settings.CHORE_TOMBSTONES_COLLECTION
 
 # Initialize MongoDB client
 # We use an asynchronous client here because FastAPI is an async framework.
 # This allows the server to handle other requests while waiting for database operations to complete.
-client = AsyncMongoClient(MONGO_URI)
+client = AsyncMongoClient(MONGO_URI, event_listeners=[command_listener])
 _db = client[DB_NAME]
 users_coll = _db[USERS_COLLECTION]
 groups_coll = _db[GROUPS_COLLECTION]
 chores_coll = _db[CHORES_COLLECTION]
 recurring_chores_coll = _db[RECURRING_CHORES_COLLECTION]
+chore_tombstones_coll = _db[CHORE_TOMBSTONES_COLLECTION]
+
+# Page sizes for the chore listing
+DEFAULT_CHORES_PAGE_SIZE = 100
+MAX_CHORES_PAGE_SIZE = 500
+
+# Identical concurrent chore page queries share one database query. The key includes
+# the group revision (via the ETag), so a request made after a write never gets a page
+# that was queried before it.
+chore_page_reads = SingleFlight("chores")
 
 
 router = APIRouter()
 
 
+async def _record_chore_changes(group_id: ObjectId, query: dict) -> None:
+    """
+    Bumps the group's revision after writing the chores matching `query`
+    (written with `"revision": PENDING_REVISION`) and stamps them with it.
+    """
+    revision = await bump_group_revision(groups_coll, group_id)
+    await stamp_revision(chores_coll, {"group_id": group_id, **query}, revision)
+    publish_group_event(group_id, "chores", revision)
+
+
+async def _record_deletion(group_id: ObjectId, kind: str, deleted_id: ObjectId) -> None:
+    """
+    Leaves a tombstone for a deleted chore (kind "chore") or recurring chore
+    (kind "recurring_chore", standing for all chores generated from it), so
+    `GET /chores/changes` can report the deletion, then bumps the group's revision.
+    """
+    result = await chore_tombstones_coll.insert_one({
+        "group_id": group_id,
+        "kind": kind,
+        "deleted_id": deleted_id,
+        "deleted_at": datetime.datetime.now(datetime.timezone.utc),
+        "revision": PENDING_REVISION,
+    })
+    revision = await bump_group_revision(groups_coll, group_id)
+    await stamp_revision(chore_tombstones_coll, {"_id": result.inserted_id}, revision)
+    publish_group_event(group_id, "chores", revision)
+
+
 @router.post("/create-chore")
 async def create_chore(
     current_user: Annotated[User, Depends(get_current_user)],
@@ -112,6 +171,7 @@ async def create_chore(
         "is_completed": False,
         "created_at": datetime.datetime.now(datetime.timezone.utc),
         "completed_at": None,
+        "revision": PENDING_REVISION,
     }
     # If the chore is generated from a recurring schedule, link it back.
     if recurring_chore_id:
@@ -119,26 +179,54 @@ async def create_chore(
 
     # Insert the new chore document into the database.
     result = await chores_coll.insert_one(chore_doc)
-    
+    await _record_chore_changes(group_id, {"_id": result.inserted_id})
+
     return {"message": "Chore created successfully", "chore_id": str(result.inserted_id)}
 
 
 @router.get("/chores")
-async def get_chores(current_user: Annotated[User, Depends(get_current_user)]) -> list[Chore]:
+async def get_chores(
+    current_user: Annotated[User, Depends(get_current_user)],
+    request: Request,
+    assigned_user_id: str | None = None,
+    is_completed: bool | None = None,
+    recurring_chore_id: str | None = None,
+    created_after: datetime.datetime | None = None,
+    created_before: datetime.datetime | None = None,
+    cursor: str | None = None,
+    limit: Annotated[int | None, Query(ge=1, le=MAX_CHORES_PAGE_SIZE)] = None,
+    stream: bool = False,
+) -> list[Chore]:
     """
-    Retrieves all chores for the current user's primary group.
+    Retrieves one page of chores for the current user's primary group, newest first.
 
-    This endpoint fetches all chore documents associated with the user's group, allowing
-    the frontend to display a list of all chores, their assignees, and their completion status.
+    This endpoint fetches chore documents associated with the user's group, allowing
+    the frontend to display a list of chores, their assignees, and their completion status.
+    Pages are keyed on (`created_at`, `_id`) rather than offsets, so every page costs the same
+    no matter how much history the group has.
 
     Parameters:
     - `current_user`: The authenticated user (injected by dependency).
+    - `assigned_user_id`: Optional. Only return chores assigned to this user.
+    - `is_completed`: Optional. Only return completed (`true`) or open (`false`) chores.
+    - `recurring_chore_id`: Optional. Only return chores generated from this recurring chore.
+    - `created_after` / `created_before`: Optional. Only return chores created in this range.
+    - `cursor`: Optional. The `X-Next-Cursor` header of the previous page.
+    - `limit`: Optional. The maximum number of chores to return (defaults to `DEFAULT_CHORES_PAGE_SIZE`).
+    - `stream`: Optional. Stream the response (see below).
 
     Returns:
     - A list of `Chore` objects, where each object represents a chore in the group.
+      If there are more chores, the `X-Next-Cursor` response header holds the cursor for the next page.
+    - The `ETag` header holds the group's revision. If the request's `If-None-Match` matches it,
+      nothing changed since and an empty `304` is returned without querying the chores.
+    - With `Accept: application/x-ndjson` or `stream=true`, every matching chore (up to `limit`, if given)
+      is streamed straight from the database cursor instead, as NDJSON or a JSON array respectively.
 
     Raises:
     - `HTTPException(403, "You must be in a group to view chores.")`: If the current user is not part of any group.
+    - `HTTPException(400, "Invalid cursor.")`: If the cursor is malformed.
+    - `HTTPException(400, "Invalid ID.")`: If `assigned_user_id` or `recurring_chore_id` is malformed.
     """
     # Viewing chores is a group activity. A user must be in a group.
     if not current_user.group_ids:
@@ -150,21 +238,143 @@ async def get_chores(current_user: Annotated[User, Depends(get_current_user)]) -
     # As with chore creation, we operate on the user's first group.
     group_id = ObjectId(current_user.group_ids[0])
 
-    # Retrieve all chores that belong to the user's group.
-    chores_cursor = chores_coll.find({"group_id": group_id})
-    # Convert the async cursor to a list of documents.
-    chores_list = await chores_cursor.to_list(length=None)
+    # Answer polls from clients that are already up to date with a single small lookup.
+    etag = group_etag(group_id, await get_group_revision(groups_coll, group_id))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    # Build the filter. Every combination starts with group_id, so it's served by
+    # one of the compound indexes in backend/indexes.py.
+    query = {"group_id": group_id}
+    if assigned_user_id is not None:
+        query["assigned_user_id"] = parse_object_id(assigned_user_id)
+    if is_completed is not None:
+        query["is_completed"] = is_completed
+    if recurring_chore_id is not None:
+        query["recurring_chore_id"] = parse_object_id(recurring_chore_id)
+
+    created_at_range = {}
+    if created_after is not None:
+        created_at_range["$gte"] = created_after
+    if created_before is not None:
+        created_at_range["$lt"] = created_before
+    if created_at_range:
+        query["created_at"] = created_at_range
+
+    # Resume strictly after the last chore of the previous page.
+    if cursor is not None:
+        query.update(chores_after_cursor(cursor))
+
+    def find_chores():
+        return chores_coll.find(query, chore_shape.projection).sort([("created_at", -1), ("_id", -1)])
+
+    # Streaming keeps memory flat, so there's no need to page by default.
+    media_type = streaming_media_type(request, stream)
+    if media_type is not None:
+        chores_cursor = find_chores()
+        if limit is not None:
+            chores_cursor = chores_cursor.limit(limit)
+        return stream_documents(chores_cursor, chore_shape, media_type, headers={"ETag": etag})
+
+    # Fetch one extra chore to find out whether there is a next page.
+    if limit is None:
+        limit = DEFAULT_CHORES_PAGE_SIZE
+    chores_list = await chore_page_reads.do(
+        (etag, repr(query), limit),
+        lambda: find_chores().limit(limit + 1).to_list(length=None),
+    )
+
+    headers = {"ETag": etag}
+    if len(chores_list) > limit:
+        chores_list = chores_list[:limit]
+        headers["X-Next-Cursor"] = encode_chore_cursor(chores_list[-1])
+
+    # The documents already have the shape of `Chore` (see the projection above), so they are
+    # encoded as they are instead of being validated into models and re-validated by FastAPI.
+    return fast_json_response(chores_list, chore_shape, chore_list_adapter, headers)
+
+
+@router.get("/changes")
+async def get_chore_changes(
+    current_user: Annotated[User, Depends(get_current_user)],
+    since: Annotated[int, Query(ge=0)] = 0,
+    cursor: str | None = None,
+    limit: Annotated[int | None, Query(ge=1, le=MAX_CHORES_PAGE_SIZE)] = None,
+) -> ChoreChanges:
+    """
+    Retrieves what changed in the current user's group's chores after a revision.
+
+    Instead of refetching every chore after a mutation, clients keep the `revision` of their
+    last sync and ask only for what changed since, which costs O(changes) rather than O(chores).
+
+    Parameters:
+    - `current_user`: The authenticated user (injected by dependency).
+    - `since`: Optional. The `revision` returned by the previous call. `0` (the default)
+      returns every chore, for the first sync, one page at a time (newest first, like /chores/chores).
+    - `cursor`: Optional. The `next_cursor` of the previous page of a first sync.
+    - `limit`: Optional. The maximum number of chores per page of a first sync (defaults to `DEFAULT_CHORES_PAGE_SIZE`).
+
+    Returns:
+    - A `ChoreChanges` object with:
+      - `revision`: Pass this as `since` next time. For a first sync, keep the one from its first page:
+        chores created while paging are only returned by the next call.
+      - `chores`: Chores created, updated or completed after `since` (their current state).
+      - `deleted`: Tombstones of chores deleted after `since`. A `recurring_chore` tombstone means the
+        recurring chore and every chore generated from it (matching `recurring_chore_id`) were deleted.
+      - `next_cursor`: For a first sync, the `cursor` of its next page, or None after the last one.
+
+    Raises:
+    - `HTTPException(403, "You must be in a group to view chores.")`: If the current user is not part of any group.
+    - `HTTPException(410, "Changes since this revision have expired, sync again from revision 0.")`: If
+      tombstones after `since` were already removed (see CHORE_TOMBSTONE_EXPIRE_DAYS).
+    - `HTTPException(400, "Invalid cursor.")`: If the cursor is malformed.
+    """
+    if not current_user.group_ids:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You must be in a group to view chores.",
+        )
+
+    group_id = ObjectId(current_user.group_ids[0])
+
+    # Read the revision first. Every change up to it was written (at least as pending) before
+    # the group was bumped, so the queries below are sure to see it.
+    group_doc = await groups_coll.find_one({"_id": group_id}, {"revision": 1, "tombstones_expired_revision": 1}) or {}
+    revision = group_doc.get("revision", 0)
+
+    if since == 0:
+        # Paged like /chores/chores, on its (group_id, created_at, _id) index
+        query = {"group_id": group_id}
+        if cursor is not None:
+            query.update(chores_after_cursor(cursor))
+        if limit is None:
+            limit = DEFAULT_CHORES_PAGE_SIZE
+        chores_list = await (chores_coll.find(query, chore_shape.projection)
+                             .sort([("created_at", -1), ("_id", -1)])
+                             .limit(limit + 1)
+                             .to_list(length=None))
+        next_cursor = None
+        if len(chores_list) > limit:
+            chores_list = chores_list[:limit]
+            next_cursor = encode_chore_cursor(chores_list[-1])
+        return ChoreChanges(revision=revision, chores=chores_list, next_cursor=next_cursor)
+
+    # Deletions older than the expired tombstones can't be reported any more
+    if since < group_doc.get("tombstones_expired_revision", 0):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Changes since this revision have expired, sync again from revision 0.",
+        )
 
-    # The Pydantic models expect string representations of ObjectIds for JSON serialization.
-    # We loop through the list and convert all ObjectId fields to strings.
-    for chore in chores_list:
-        chore["_id"] = str(chore["_id"])
-        chore["assigned_user_id"] = str(chore["assigned_user_id"])
-        # Not all chores are from a recurring schedule, so we must check for existence.
-        if "recurring_chore_id" in chore and chore["recurring_chore_id"] is not None:
-            chore["recurring_chore_id"] = str(chore["recurring_chore_id"])
+    # Both queries are served by the (group_id, revision) indexes in backend/indexes.py.
+    tombstones = await chore_tombstones_coll.find(
+        {"group_id": group_id, "revision": {"$gt": since}}
+    ).to_list(length=None)
+    chores_list = await chores_coll.find(
+        {"group_id": group_id, "revision": {"$gt": since}}, chore_shape.projection
+    ).to_list(length=None)
 
-    return chores_list
+    return ChoreChanges(revision=revision, chores=chores_list, deleted=tombstones)
 
 
 @router.post("/complete-chore/{chore_id}")
@@ -183,13 +393,12 @@ async def complete_chore(
     - `current_user`: The authenticated user performing the action (injected by dependency).
 
     Returns:
-    - A dictionary containing a success message.
+    - A dictionary containing a success message and the updated `Chore`.
 
     Raises:
     - `HTTPException(403, "You must be in a group to complete a chore.")`: If the user is not in a group.
     - `HTTPException(404, "Chore not found in your group.")`: If the chore ID is invalid or the chore
       does not belong to the user's group.
-    - `HTTPException(500, "Failed to update chore.")`: If the database operation fails.
     """
     if not current_user.group_ids:
         raise HTTPException(
@@ -200,29 +409,26 @@ async def complete_chore(
     group_id = ObjectId(current_user.group_ids[0])
     chore_obj_id = ObjectId(chore_id)
 
-    # First, we must verify that the chore exists and belongs to the user's group.
-    # This prevents users from completing chores in other groups.
-    chore = await chores_coll.find_one({"_id": chore_obj_id, "group_id": group_id})
+    # Update the chore document by setting `is_completed` to True and recording the completion time.
+    # Filtering on the group as well means the chore is only updated if it belongs to the user's group,
+    # which prevents users from completing chores in other groups without a separate lookup.
+    chore = await chores_coll.find_one_and_update(
+        {"_id": chore_obj_id, "group_id": group_id},
+        {"$set": {
+            "is_completed": True,
+            "completed_at": datetime.datetime.now(datetime.timezone.utc),
+            "revision": PENDING_REVISION,
+        }},
+        return_document=ReturnDocument.AFTER,
+    )
     if not chore:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Chore not found in your group.",
         )
+    await _record_chore_changes(group_id, {"_id": chore_obj_id})
 
-    # Update the chore document by setting `is_completed` to True and recording the completion time.
-    result = await chores_coll.update_one(
-        {"_id": chore_obj_id},
-        {"$set": {"is_completed": True, "completed_at": datetime.datetime.now(datetime.timezone.utc)}},
-    )
-
-    if result.modified_count == 1:
-        return {"message": "Chore marked as complete."}
-    else:
-        # This can happen if the chore was already completed or if there was a database issue.
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to update chore.",
-        )
+    return {"message": "Chore marked as complete.", "chore": Chore(**chore)}
 
 
 @router.delete("/delete-chore/{chore_id}")
@@ -240,12 +446,11 @@ async def delete_chore(
     - `current_user`: The authenticated user performing the action.
 
     Returns:
-    - A dictionary containing a success message.
+    - A dictionary containing a success message and the deleted `Chore`.
 
     Raises:
     - `HTTPException(403, "You must be in a group to delete a chore.")`: If the user is not in a group.
     - `HTTPException(404, "Chore not found in your group.")`: If the chore ID is invalid or not in the user's group.
-    - `HTTPException(500, "Failed to delete chore.")`: If the database operation fails.
     """
     if not current_user.group_ids:
         raise HTTPException(
@@ -256,24 +461,16 @@ async def delete_chore(
     group_id = ObjectId(current_user.group_ids[0])
     chore_obj_id = ObjectId(chore_id)
 
-    # As with completing a chore, we verify ownership before deleting.
-    chore = await chores_coll.find_one({"_id": chore_obj_id, "group_id": group_id})
+    # As with completing a chore, the group filter makes sure we only delete chores from the user's group.
+    chore = await chores_coll.find_one_and_delete({"_id": chore_obj_id, "group_id": group_id})
     if not chore:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Chore not found in your group.",
         )
+    await _record_deletion(group_id, "chore", chore_obj_id)
 
-    # Perform the delete operation.
-    result = await chores_coll.delete_one({"_id": chore_obj_id})
-
-    if result.deleted_count == 1:
-        return {"message": "Chore deleted successfully."}
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to delete chore.",
-        )
+    return {"message": "Chore deleted successfully.", "chore": Chore(**chore)}
 
 
 @router.post("/recurring-chores/")
@@ -350,29 +547,26 @@ async def create_recurring_chore(
 
     # Validate that all assigned users exist and belong to the same group.
     # This prevents assigning chores to users who can't see them.
-    assigned_user_obj_ids = []
-    for username in assigned_usernames:
-        user_doc = await users_coll.find_one({"username": username})
-        if not user_doc or not user_doc.get("group_ids") or user_doc["group_ids"][0] != group_id:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"User with username '{username}' not found or not in the same group.",
-            )
-        assigned_user_obj_ids.append(user_doc["_id"])
+    assigned_user_obj_ids = await validate_and_get_user_ids(assigned_usernames, group_id)
 
-        # If asssigned user is in same group then
-        # Create the new chore and assign to user 
-        new_chore = {
+    # Create a chore for each assigned user
+    new_chores = [
+        {
             "group_id": group_id,
             "chore_name": chore_name,
             "chore_description": chore_description,
-            "assigned_user_id": user_doc.get("_id"),
+            "assigned_user_id": assigned_user_obj_id,
             "is_completed": False,
             "created_at": now,
             "completed_at": None,
             "recurring_chore_id": recurring_chore_id,
+            "revision": PENDING_REVISION,
         }
-        await chores_coll.insert_one(new_chore)
+        for assigned_user_obj_id in assigned_user_obj_ids
+    ]
+
+    # Only write the chores once every assigned user has been validated.
+    await chores_coll.insert_many(new_chores)
 
     # Create the document for the recurring chore schedule.
     recurring_chore_doc = {
@@ -390,20 +584,28 @@ async def create_recurring_chore(
     }
 
     result = await recurring_chores_coll.insert_one(recurring_chore_doc)
-
+    await _record_chore_changes(group_id, {"recurring_chore_id": recurring_chore_id})
 
     return {"message": "Recurring chore created successfully", "recurring_chore_id": str(result.inserted_id)}
 
 @router.get("/recurring-chores/")
-async def get_recurring_chores(current_user: Annotated[User, Depends(get_current_user)]) -> list[RecurringChore]:
+async def get_recurring_chores(
+    current_user: Annotated[User, Depends(get_current_user)],
+    request: Request,
+    stream: bool = False,
+) -> list[RecurringChore]:
     """
     Retrieves all recurring chore schedules for the current user's group.
 
     Parameters:
     - `current_user`: The authenticated user.
+    - `stream`: Optional. Stream the response (see below).
 
     Returns:
-    - A list of `RecurringChore` objects.
+    - A list of `RecurringChore` objects, with the group's revision as the `ETag` header
+      (an empty `304` if it matches the request's `If-None-Match`).
+    - With `Accept: application/x-ndjson` or `stream=true`, the schedules are streamed straight from
+      the database cursor instead, as NDJSON or a JSON array respectively.
 
     Raises:
     - `HTTPException(403, ...)`: If the user is not in a group.
@@ -416,17 +618,20 @@ async def get_recurring_chores(current_user: Annotated[User, Depends(get_current
 
     group_id = ObjectId(current_user.group_ids[0])
 
+    etag = group_etag(group_id, await get_group_revision(groups_coll, group_id))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     # Find all recurring chore schedules associated with the user's group.
-    recurring_chores_cursor = recurring_chores_coll.find({"group_id": group_id})
-    recurring_chores_list = await recurring_chores_cursor.to_list(length=None)
+    recurring_chores_cursor = recurring_chores_coll.find({"group_id": group_id}, recurring_chore_shape.projection)
 
-    # Convert ObjectIds to strings for JSON compatibility.
-    for chore in recurring_chores_list:
-        chore["_id"] = str(chore["_id"])
-        chore["group_id"] = str(chore["group_id"])
-        chore["assigned_user_ids"] = [str(uid) for uid in chore["assigned_user_ids"]]
+    media_type = streaming_media_type(request, stream)
+    if media_type is not None:
+        return stream_documents(recurring_chores_cursor, recurring_chore_shape, media_type, headers={"ETag": etag})
 
-    return recurring_chores_list
+    recurring_chores_list = await recurring_chores_cursor.to_list(length=None)
+
+    return fast_json_response(recurring_chores_list, recurring_chore_shape, recurring_chore_list_adapter, {"ETag": etag})
 
 
 @router.put("/recurring-chores/{recurring_chore_id}")
@@ -458,13 +663,12 @@ async def update_recurring_chore(
     - `is_active`: Optional. Boolean to activate or deactivate the schedule.
 
     Returns:
-    - A dictionary containing a success message.
+    - A dictionary containing a success message and the updated `RecurringChore`.
 
     Raises:
     - `HTTPException(403, ...)`: If the user is not in a group.
     - `HTTPException(404, ...)`: If the recurring chore is not found in the user's group.
     - `HTTPException(400, "No fields to update.")`: If no update parameters are provided.
-    - `HTTPException(500, "Failed to update recurring chore.")`: If the database update fails.
     """
     if not current_user.group_ids:
         raise HTTPException(
@@ -475,13 +679,16 @@ async def update_recurring_chore(
     group_id = ObjectId(current_user.group_ids[0])
     recurring_chore_obj_id = ObjectId(recurring_chore_id)
 
-    # Verify that the recurring chore exists and belongs to the user's group.
-    existing_chore = await recurring_chores_coll.find_one({"_id": recurring_chore_obj_id, "group_id": group_id})
-    if not existing_chore:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Recurring chore not found in your group.",
-        )
+    # The stored schedule is only needed when just one of rrule/start date changes,
+    # so that's the only case where we look the recurring chore up first.
+    existing_chore = None
+    if (rrule_str is None) != (start_date_str is None):
+        existing_chore = await recurring_chores_coll.find_one({"_id": recurring_chore_obj_id, "group_id": group_id})
+        if not existing_chore:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Recurring chore not found in your group.",
+            )
 
     # Build a dictionary of fields to update.
     update_doc = {}
@@ -508,20 +715,22 @@ async def update_recurring_chore(
             detail="No fields to update.",
         )
 
-    # Perform the update operation in the database.
-    result = await recurring_chores_coll.update_one(
-        {"_id": recurring_chore_obj_id},
+    # Perform the update operation in the database. The group filter ensures the
+    # recurring chore belongs to the user's group.
+    recurring_chore = await recurring_chores_coll.find_one_and_update(
+        {"_id": recurring_chore_obj_id, "group_id": group_id},
         {"$set": update_doc},
+        return_document=ReturnDocument.AFTER,
     )
-
-    if result.modified_count == 1:
-        return {"message": "Recurring chore updated successfully."}
-    else:
-        # This could happen if the update resulted in no actual changes to the document.
+    if not recurring_chore:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to update recurring chore.",
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recurring chore not found in your group.",
         )
+    revision = await bump_group_revision(groups_coll, group_id)
+    publish_group_event(group_id, "chores", revision)
+
+    return {"message": "Recurring chore updated successfully.", "recurring_chore": RecurringChore(**recurring_chore)}
 
 @router.delete("/recurring-chores/{recurring_chore_id}")
 async def delete_recurring_chore(recurring_chore_id: str, current_user: Annotated[User, Depends(get_current_user)]):
@@ -541,7 +750,6 @@ async def delete_recurring_chore(recurring_chore_id: str, current_user: Annotate
     Raises:
     - `HTTPException(403, ...)`: If the user is not in a group.
     - `HTTPException(404, ...)`: If the recurring chore is not found.
-    - `HTTPException(500, ...)`: If the database deletion fails.
     """
     if not current_user.group_ids:
         raise HTTPException(
@@ -552,8 +760,8 @@ async def delete_recurring_chore(recurring_chore_id: str, current_user: Annotate
     group_id = ObjectId(current_user.group_ids[0])
     recurring_chore_obj_id = ObjectId(recurring_chore_id)
 
-    # Verify ownership before deleting.
-    recurring_chore = await recurring_chores_coll.find_one({"_id": recurring_chore_obj_id, "group_id": group_id})
+    # Delete the recurring chore schedule itself. The group filter verifies ownership in the same step.
+    recurring_chore = await recurring_chores_coll.find_one_and_delete({"_id": recurring_chore_obj_id, "group_id": group_id})
     if not recurring_chore:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -565,15 +773,7 @@ async def delete_recurring_chore(recurring_chore_id: str, current_user: Annotate
     # Note: This will also delete *completed* chores. Depending on the desired behavior,
     # you might want to only delete non-completed chores, e.g., by adding `"is_completed": False`
     # to the filter. For now, we delete all of them for simplicity.
-    await chores_coll.delete_many({"recurring_chore_id": recurring_chore_obj_id})
-
-    # Delete the recurring chore schedule itself.
-    result = await recurring_chores_coll.delete_one({"_id": recurring_chore_obj_id})
+    await chores_coll.delete_many({"group_id": group_id, "recurring_chore_id": recurring_chore_obj_id})
+    await _record_deletion(group_id, "recurring_chore", recurring_chore_obj_id)
 
-    if result.deleted_count == 1:
-        return {"message": "Recurring chore deleted successfully."}
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to delete recurring chore.",
-        )
\ No newline at end of file
+    return {"message": "Recurring chore deleted successfully."}
@@ -0,0 +1,131 @@
+import functools
+import inspect
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson.objectid import ObjectId
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient, AsyncMongoMockCollection
+
+from backend import indexes
+from backend.helpers.helper_auth import create_access_token
+from backend.main import app
+from backend.metrics import current_operation
+
+# Collection methods that each cost (at least) one MongoDB command.
+# find/aggregate only build a cursor, but every route that calls them reads it.
+QUERY_METHODS = (
+    "find", "aggregate", "find_one", "count_documents", "estimated_document_count", "distinct",
+    "insert_one", "insert_many", "update_one", "update_many", "replace_one", "delete_one", "delete_many",
+    "find_one_and_update", "find_one_and_delete", "find_one_and_replace", "bulk_write",
+)
+
+
+def _counting(name: str, method, calls: list):
+    # Requests are told apart by the per-request stats RequestMetricsMiddleware
+    # puts in a context variable (see backend/metrics.py), so queries made by
+    # background work, like the startup tasks, don't count
+    def record(collection):
+        stats = current_operation()
+        if stats is not None:
+            calls.append((stats, f"{collection.name}.{name}"))
+
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            record(self)
+            return await method(self, *args, **kwargs)
+    else:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            record(self)
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+@pytest.fixture
+def query_budget(monkeypatch):
+    """
+    Fails the test if a request made inside the block issues more than
+    `max_queries` database queries (counting the authentication lookup):
+
+        with query_budget(3):
+            response = client.get("/groups/my-group")
+
+    Catches N+1 patterns: make the same request with more data and the same budget.
+    """
+    calls: list = []
+    for name in QUERY_METHODS:
+        monkeypatch.setattr(AsyncMongoMockCollection, name, _counting(name, getattr(AsyncMongoMockCollection, name), calls))
+
+    @contextmanager
+    def budget(max_queries: int):
+        start = len(calls)
+        yield
+        by_request = defaultdict(list)
+        for stats, call in calls[start:]:
+            by_request[stats].append(call)
+        for stats, queries in by_request.items():
+            assert len(queries) <= max_queries, (
+                f"{stats.operation} made {len(queries)} queries, over its budget of {max_queries}: {queries}"
+            )
+
+    return budget
+
+
+@pytest.fixture(scope="function")
+def client(monkeypatch):
+    # The app creates its indexes when it starts, in a database of its own here
+    monkeypatch.setattr(indexes, "_db", AsyncMongoMockClient().get_database("testdb_startup"))
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def log_in(client):
+    """Makes `client`'s next requests as `username`: `log_in("alice0")`."""
+    def log_in_as(username: str) -> None:
+        access_token = create_access_token(data={"sub": username}, expires_delta_in_min=timedelta(minutes=30))
+        client.cookies.set("access_token", f"Bearer {access_token}")
+
+    return log_in_as
+
+
+@pytest.fixture
+def create_user(test_db):
+    """Inserts a verified user `username` (email `{username}@example.com`) into the test module's database."""
+    async def create(username: str, group_ids: list | None = None) -> ObjectId:
+        result = await test_db["users"].insert_one({
+            "username": username,
+            "hashed_password": "somehashedpassword",
+            "email": f"{username}@example.com",
+            "full_name": "Test User",
+            "email_verified": True,
+            "profile_picture_url": None,
+            "group_ids": group_ids or [],
+        })
+        return result.inserted_id
+
+    return create
+
+
+@pytest.fixture
+def create_group(test_db, create_user):
+    """Creates a group of `member_count` users named `{prefix}0` (the admin), `{prefix}1`, ..."""
+    async def create(prefix: str, member_count: int = 1) -> ObjectId:
+        group_id = ObjectId()
+        member_ids = [await create_user(f"{prefix}{i}", [group_id]) for i in range(member_count)]
+        await test_db["groups"].insert_one({
+            "_id": group_id,
+            "group_name": f"{prefix} group",
+            "group_admin_id": member_ids[0],
+            "group_admin_username": f"{prefix}0",
+            "users_in_group": member_ids,
+            "created_at": datetime.now(timezone.utc),
+            "revision": 0,
+        })
+        return group_id
+
+    return create
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from typing import Annotated
+
+from bson.objectid import ObjectId
+from fastapi import APIRouter, Depends, Request
+from pymongo import AsyncMongoClient
+
+from backend.metrics import command_listener, metrics_authorized
+from backend.settings import get_settings
+from backend.models import User
+from backend.helpers.helper_auth import get_current_user
+from backend.helpers.helper_chores import encode_chore_cursor
+from backend.helpers.helper_groups import group_details, group_reads
+from backend.helpers.helper_serialization import BSONJSONResponse, chore_shape, recurring_chore_shape
+from backend.routes.chores import DEFAULT_CHORES_PAGE_SIZE
+
+
+settings = get_settings()
+
+# MongoDB config
+MONGO_URI = settings.MONGO_URI
+DB_NAME = settings.DB_NAME
+USERS_COLLECTION = settings.USERS_COLLECTION
+GROUPS_COLLECTION = settings.GROUPS_COLLECTION
+CHORES_COLLECTION = settings.CHORES_COLLECTION
+RECURRING_CHORES_COLLECTION = settings.RECURRING_CHORES_COLLECTION
+
+# Initialize MongoDB client
+client = AsyncMongoClient(MONGO_URI, event_listeners=[command_listener])
+_db = client[DB_NAME]
+users_coll = _db[USERS_COLLECTION]
+groups_coll = _db[GROUPS_COLLECTION]
+chores_coll = _db[CHORES_COLLECTION]
+recurring_chores_coll = _db[RECURRING_CHORES_COLLECTION]
+
+
+router = APIRouter()
+
+
+async def _timed(timings: dict[str, float], name: str, operation):
+    """Awaits `operation`, recording how long it took (in ms) under `name`."""
+    start = time.perf_counter()
+    try:
+        return await operation
+    finally:
+        timings[name] = (time.perf_counter() - start) * 1000
+
+
+def _server_timing(timings: dict[str, float]) -> str:
+    return ", ".join(f"{name};dur={duration:.1f}" for name, duration in timings.items())
+
+
+@router.get("")
+async def dashboard(
+    current_user: Annotated[User, Depends(get_current_user)],
+    request: Request,
+) -> BSONJSONResponse:
+    """
+    Description
+    -----------
+    Everything the frontend shows on load, in one request: the user
+    (like /auth/my-details), their group (like /groups/my-group), the
+    first page of chores (like /chores/chores) and the recurring chores
+    (like /chores/recurring-chores/).
+
+    The user is authenticated once. The members are queried alongside
+    the group, and the chores and recurring chores concurrently after it
+    (see below). How long each one took is reported in the Server-Timing
+    header, to requests allowed to see metrics (see `metrics.metrics_authorized`).
+
+    Returns
+    -------
+    dict:
+    - user: The current user
+    - group: The group details, or None if the user is not in a group
+    - revision: The group's revision (see GET /chores/changes)
+    - chores: The newest DEFAULT_CHORES_PAGE_SIZE chores
+    - next_cursor: `cursor` for /chores/chores to load more, or None
+    - recurring_chores: The group's recurring chores
+    """
+    payload = {
+        # Only the public User fields, current_user also has the password hash
+        "user": current_user.model_dump(by_alias=True, include=set(User.model_fields)),
+        "group": None,
+        "revision": 0,
+        "chores": [],
+        "next_cursor": None,
+        "recurring_chores": [],
+    }
+    timings: dict[str, float] = {}
+
+    if current_user.group_ids:
+        group_id = ObjectId(current_user.group_ids[0])
+
+        # Members are found by their group_ids rather than the group's users_in_group,
+        # so the query doesn't have to wait for the group document.
+        members_task = asyncio.ensure_future(
+            _timed(timings, "members", users_coll.find({"group_ids": group_id}, {"username": 1}).to_list(length=None))
+        )
+        try:
+            # Read the revision before the chores, like GET /chores/changes: every change up to
+            # it is then in the chores below, so a client syncing from it can't miss one.
+            group_doc = await _timed(timings, "group", group_reads.do(group_id, lambda: groups_coll.find_one({"_id": group_id})))
+            chores_list, recurring_chores_list = await asyncio.gather(
+                _timed(timings, "chores", chores_coll.find({"group_id": group_id}, chore_shape.projection)
+                       .sort([("created_at", -1), ("_id", -1)])
+                       .limit(DEFAULT_CHORES_PAGE_SIZE + 1)
+                       .to_list(length=None)),
+                _timed(timings, "recurring_chores", recurring_chores_coll.find({"group_id": group_id}, recurring_chore_shape.projection)
+                       .to_list(length=None)),
+            )
+        except BaseException:
+            members_task.cancel()
+            raise
+        members = await members_task
+
+        if group_doc:
+            usernames = {member["_id"]: member.get("username", "Unknown") for member in members}
+            payload["group"] = group_details(group_doc, usernames)
+            payload["revision"] = group_doc.get("revision", 0)
+
+        if len(chores_list) > DEFAULT_CHORES_PAGE_SIZE:
+            chores_list = chores_list[:DEFAULT_CHORES_PAGE_SIZE]
+            payload["next_cursor"] = encode_chore_cursor(chores_list[-1])
+
+        payload["chores"] = [chore_shape.prepare(chore) for chore in chores_list]
+        payload["recurring_chores"] = [recurring_chore_shape.prepare(chore) for chore in recurring_chores_list]
+
+    show_timings = timings and metrics_authorized(request.headers.get("authorization"))
+    headers = {"Server-Timing": _server_timing(timings)} if show_timings else None
+    return BSONJSONResponse(payload, headers=headers)
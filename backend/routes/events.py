@@ -0,0 +1,81 @@
+import asyncio
+import json
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+
+from backend.events import EVICTED, hub
+from backend.helpers.helper_auth import get_current_user
+from backend.models import User
+from backend.settings import get_settings
+
+settings = get_settings()
+
+# Tells EventSource how long to wait before reconnecting (ms)
+RECONNECT_DELAY_MS = 3000
+
+
+router = APIRouter()
+
+
+@router.get("")
+async def group_events(
+    current_user: Annotated[User, Depends(get_current_user)],
+    request: Request,
+) -> StreamingResponse:
+    """
+    Description
+    -----------
+    Server-Sent Events stream of changes to the current user's group, so
+    the frontend doesn't have to poll. Each event names what changed and
+    the group revision after the change:
+
+        event: chores
+        data: {"type": "chores", "revision": 12}
+
+    - `chores`: chores or recurring chores changed. Catch up with
+      `GET /chores/changes?since=<last revision>`
+    - `group`: members, admin or usernames changed. Refetch `/groups/my-group`
+
+    A comment line is sent every EVENTS_HEARTBEAT_SECONDS to keep
+    proxies from closing the connection. If the client falls too far
+    behind, the server ends the stream; EventSource then reconnects by
+    itself.
+
+    Raises
+    ------
+    HTTPException: If user is not part of any group
+    """
+    if not current_user.group_ids:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You must be in a group to receive group events.",
+        )
+
+    subscription = hub.subscribe(current_user.group_ids[0])
+
+    async def body():
+        try:
+            yield f"retry: {RECONNECT_DELAY_MS}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), settings.EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": heartbeat\n\n"
+                    continue
+
+                if event is EVICTED:
+                    break
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        # Keep proxies (e.g. nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
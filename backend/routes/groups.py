@@ -1,15 +1,19 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status, Form
-from pymongo import AsyncMongoClient
+from fastapi import APIRouter, Depends, HTTPException, status, Form, Request, Response
+from pymongo import AsyncMongoClient, ReturnDocument
 
 from bson.objectid import ObjectId
 from datetime import datetime, timezone
 
+from backend.metrics import command_listener
 from backend.settings import get_settings
 from backend.models import User
-from backend.helpers.helper_auth import get_current_user
-from backend.celery_worker import add_groups_to_user, create_group_doc, invite_user_to_group 
+from backend.helpers.helper_auth import get_current_user, user_reads
+from backend.helpers.helper_db import transaction, run_concurrently
+from backend.helpers.helper_groups import group_details, group_etag, etag_matches, not_modified, publish_group_event, group_reads
+from backend.helpers.helper_tokens import token_query
+from backend.celery_worker import invite_user_to_group 
 
 
 settings = get_settings()
@@ -25,7 +29,7 @@ PASSWORD_RESET_COLLECTION = settings.PASSWORD_RESET_COLLECTION
 GROUP_INVITES_COLLECTION = settings.GROUP_INVITES_COLLECTION
 
 # Initialize MongoDB client
-client = AsyncMongoClient(MONGO_URI)
+client = AsyncMongoClient(MONGO_URI, event_listeners=[command_listener])
 _db = client[DB_NAME]
 users_coll = _db[USERS_COLLECTION]
 groups_coll = _db[GROUPS_COLLECTION]
@@ -50,10 +54,13 @@ async def create_houshold_group(
 
     - Adds the newly created group id to the
       group admin's DB record 
+
+    Both writes happen before responding (in a transaction when
+    enabled), so the group can be read as soon as this returns.
     
     Returns
     -------
-    None
+    dict: Success message and the new group's id
 
     """
 
@@ -64,14 +71,11 @@ async def create_houshold_group(
     # Prevent creating a group if user already belongs to any group
     admin_obj_id = ObjectId(group_admin_id)
 
-    admin_doc = await users_coll.find_one({"_id": admin_obj_id})
-    if admin_doc:
-        existing_group_ids = admin_doc.get("group_ids")
-        if existing_group_ids and len(existing_group_ids) > 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="User already belongs to a group and cannot create a new one.",
-            )
+    if current_user.group_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User already belongs to a group and cannot create a new one.",
+        )
 
 
     # Create a new group id
@@ -84,23 +88,39 @@ async def create_houshold_group(
         "group_admin_id": admin_obj_id,
         "group_admin_username": group_admin_username,
         "users_in_group": [admin_obj_id],
-        "created_at": datetime.now(timezone.utc)
+        "created_at": datetime.now(timezone.utc),
+        # Bumped by every change members can see (see helpers/helper_groups.py)
+        "revision": 0,
     }
 
-    # Update group admin's db record using Celery task
-    # NOTE: Celery task cannot accept json objects since they're not serializable
-    # Thus, passed in as string
-    add_groups_to_user.delay(str(admin_obj_id), [str(new_group_id)]) #await add_groups_to_user(ObjectId(group_admin_id), [new_group_id])
-
-    # Insert into group doc in MongoDB using Celery task
-    # Convert ObjectId to string for JSON serialization
-    groups_doc["_id"] = str(groups_doc["_id"])
-    groups_doc["group_admin_id"] = str(groups_doc["group_admin_id"])
-    groups_doc["users_in_group"] = [str(uid) for uid in groups_doc["users_in_group"]]
-    create_group_doc.delay(groups_doc)
+    async with transaction(groups_coll.database.client) as session:
+        # Insert the group first, then add it to the admin's record.
+        # If we crash in between, the leftover group has no members
+        # pointing at it and is removed by the remove_orphaned_groups task.
+        await groups_coll.insert_one(groups_doc, session=session)
+
+        try:
+            # Only matches if the admin still has no group, which also
+            # covers two create/join requests racing each other
+            result = await users_coll.update_one(
+                {"_id": admin_obj_id, "group_ids.0": {"$exists": False}},
+                {"$addToSet": {"group_ids": new_group_id}},
+                session=session,
+            )
+            if result.matched_count == 0:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="User already belongs to a group and cannot create a new one.",
+                )
+        except Exception:
+            # Without a transaction, undo the group insert ourselves
+            if session is None:
+                await groups_coll.delete_one({"_id": new_group_id})
+            raise
 
+    user_reads.forget(current_user.username)
 
-    return {"msg": "Group created successfully"}    
+    return {"msg": "Group created successfully", "group_id": str(new_group_id)}    
 
 
 
@@ -184,11 +204,10 @@ async def join_houshold_group(
     Description
     -----------
     - Check if current user is already in a group. If yes, cannot join
-    - Checks if invite token is valid
-    - Finds group_id that invite token corresponds to
-    - Adds current user to the group doc
-    - Adds group_id to the current user's group_ids
-    - Deletes the group invite doc
+    - Checks if invite token is valid and deletes the group invite doc
+      (a single find_one_and_delete)
+    - Adds current user to the group doc and the group_id to the
+      current user's group_ids (concurrently)
     
     Returns
     -------
@@ -198,49 +217,81 @@ async def join_houshold_group(
 
     # Resolve current user ObjectId and check user's existing groups
     current_user_id = ObjectId(current_user.id)
-    user_doc = await users_coll.find_one({"_id": current_user_id})
-    existing_group_ids = user_doc.get("group_ids") if user_doc else []
 
     # If current user is already in a group they cannot join another one.
-    if existing_group_ids and len(existing_group_ids) > 0:
+    if current_user.group_ids:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User already belongs to a group and cannot join another one.",
         )
-    
-    # Get the group invite doc to check if invite token is valid
-    # we search by email AND invite token to ensure current user
-    # is the correct invitee with matching email
-    group_invites_doc = await group_invites_coll.find_one(
-        {"email": user_doc.get("email"),
-         "invite_token": invite_token}
-    )
-    # Check if the invite token is valid
-    if not group_invites_doc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid group invite token",
+
+    async with transaction(groups_coll.database.client) as session:
+        # Get and consume the group invite doc in one go.
+        # we search by email AND invite token to ensure current user
+        # is the correct invitee with matching email
+        group_invites_doc = await group_invites_coll.find_one_and_delete(
+            {"email": current_user.email,
+             **token_query(invite_token, settings.GROUP_INVITE_TOKEN_EXPIRE_MINUTES)},
+            session=session,
         )
+        # Check if the invite token is valid
+        if not group_invites_doc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid group invite token",
+            )
 
-    # Get group id from the group invite doc
-    group_id = group_invites_doc.get("group_id")
+        # Get group id from the group invite doc
+        group_id = group_invites_doc.get("group_id")
+
+        user_result, group_result = await run_concurrently(
+            session,
+            # Update the user's document to include the group ID,
+            # unless they joined/created another group in the meantime
+            users_coll.update_one(
+                {"_id": current_user_id, "group_ids.0": {"$exists": False}},
+                {"$addToSet": {"group_ids": group_id}},
+                session=session,
+            ),
+            # Add the current user to the group
+            groups_coll.update_one(
+                {"_id": group_id},
+                {"$addToSet": {"users_in_group": current_user_id}, "$inc": {"revision": 1}},
+                session=session,
+            ),
+        )
 
-    # Add the current user to the group
-    await groups_coll.update_one(
-        {"_id": group_id},
-        {"$addToSet": {"users_in_group": current_user_id}}  # Add user to group
-    )
-    
-    # Update the user's document to include the group ID
-    await users_coll.update_one(
-        {"_id": ObjectId(current_user.id)},
-        {"$addToSet": {"group_ids": group_id}}  # Add group ID to user's group_ids
-    )
+        user_reads.forget(current_user.username)
+        group_reads.forget(group_id)
+
+        if user_result.matched_count == 1 and group_result.matched_count == 1:
+            publish_group_event(group_id, "group")
+            return {"msg": "Successfully joined the group."}
+
+        # Without a transaction, undo whichever half went through ourselves
+        if session is None:
+            if user_result.matched_count == 1:
+                await users_coll.update_one({"_id": current_user_id}, {"$pull": {"group_ids": group_id}})
+            if group_result.modified_count == 1:
+                await groups_coll.update_one(
+                    {"_id": group_id},
+                    {"$pull": {"users_in_group": current_user_id}, "$inc": {"revision": 1}},
+                )
 
-    # Delete the group invite doc after successful joining
-    await group_invites_coll.delete_one({"invite_token": invite_token})
+        if user_result.matched_count == 0:
+            # Give the invite back, it can still be used once they leave their group
+            if session is None:
+                await group_invites_coll.insert_one(group_invites_doc)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="User already belongs to a group and cannot join another one.",
+            )
 
-    return {"msg": "Successfully joined the group."}
+        # The group was deleted after the invite was sent
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid group invite token",
+        )
 
 
 
@@ -252,9 +303,9 @@ async def leave_household_group(
     Description
     -----------
     - Removes the current user from their first group (group_ids[0])
-    - Removes the user from the group's users_in_group array
+    - Removes the user from the group's users_in_group array and, if
+      they were admin, promotes the first remaining user in the same write
     - Deletes the group if it becomes empty
-    - Promotes first remaining user as admin if current user was admin
 
     Returns
     -------
@@ -264,15 +315,8 @@ async def leave_household_group(
     # resolve user/object ids
     user_obj_id = ObjectId(current_user.id)
 
-    # fetch user document and ensure they belong to a group
-    user_doc = await users_coll.find_one({"_id": user_obj_id})
-    if not user_doc:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found.",
-        )
-
-    group_ids = user_doc.get("group_ids") or []
+    # ensure the user belongs to a group
+    group_ids = current_user.group_ids
     if not group_ids:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -280,47 +324,68 @@ async def leave_household_group(
         )
 
     # assume we remove the first group id (group_ids[0])
-    target_group_id = group_ids[0]
-    # ensure we have an ObjectId value
-    if not isinstance(target_group_id, ObjectId):
-        target_group_id = ObjectId(target_group_id)
-
-    # remove the group id from the user's group_ids array
-    # $pull to removes specific id (safe even if it's not first)
-    await users_coll.update_one(
-        {"_id": user_obj_id},
-        {"$pull": {"group_ids": target_group_id}},
-    )
-
-    # remove the user from the group's users_in_group array
-    await groups_coll.update_one(
-        {"_id": target_group_id},
-        {"$pull": {"users_in_group": user_obj_id}},
-    )
-
-    # if the group is now empty, deletes it
-    # otherwise, if current user was admin makes another user admin
-    group_doc = await groups_coll.find_one({"_id": target_group_id})
-    if group_doc:
-        users_in_group = group_doc.get("users_in_group", [])
-        if not users_in_group:
-            # delete any outstanding group invites for this group
-            await group_invites_coll.delete_many({"group_id": target_group_id})
-            # delete empty group
-            await groups_coll.delete_one({"_id": target_group_id})
-
-        else:
-            # if the user was the admin, you may want to promote another member
-            if group_doc.get("group_admin_id") == user_obj_id:
-                # promote first remaining member to admin
+    target_group_id = ObjectId(group_ids[0])
+
+    async with transaction(groups_coll.database.client) as session:
+        _, group_doc = await run_concurrently(
+            session,
+            # remove the group id from the user's group_ids array
+            # $pull to removes specific id (safe even if it's not first)
+            users_coll.update_one(
+                {"_id": user_obj_id},
+                {"$pull": {"group_ids": target_group_id}},
+                session=session,
+            ),
+            # remove the user from the group's users_in_group array and,
+            # if they were admin, make the first remaining member admin.
+            # Returns the group as it was before, so we know what changed
+            groups_coll.find_one_and_update(
+                {"_id": target_group_id},
+                [
+                    {"$set": {"users_in_group": {"$filter": {
+                        "input": "$users_in_group",
+                        "cond": {"$ne": ["$$this", user_obj_id]},
+                    }}}},
+                    {"$set": {"group_admin_id": {"$cond": [
+                        {"$eq": ["$group_admin_id", user_obj_id]},
+                        {"$arrayElemAt": ["$users_in_group", 0]},
+                        "$group_admin_id",
+                    ]}}},
+                    {"$set": {"revision": {"$add": [{"$ifNull": ["$revision", 0]}, 1]}}},
+                ],
+                return_document=ReturnDocument.BEFORE,
+                session=session,
+            ),
+        )
+
+        if group_doc:
+            users_in_group = [uid for uid in group_doc.get("users_in_group", []) if uid != user_obj_id]
+            if not users_in_group:
+                await run_concurrently(
+                    session,
+                    # delete any outstanding group invites for this group
+                    group_invites_coll.delete_many({"group_id": target_group_id}, session=session),
+                    # delete empty group (unless someone joined in the meantime)
+                    groups_coll.delete_one({"_id": target_group_id, "users_in_group": {"$size": 0}}, session=session),
+                )
+
+            elif group_doc.get("group_admin_id") == user_obj_id:
+                # the admin id was already moved on, fill in the new admin's username
                 new_admin = users_in_group[0]
-                new_admin_doc = await users_coll.find_one({"_id": new_admin})
+                new_admin_doc = await users_coll.find_one({"_id": new_admin}, {"username": 1}, session=session)
                 new_admin_username = new_admin_doc.get("username")
                 await groups_coll.update_one(
-                    {"_id": target_group_id},
-                    {"$set": {"group_admin_id": new_admin, "group_admin_username": new_admin_username}}
+                    {"_id": target_group_id, "group_admin_id": new_admin},
+                    {"$set": {"group_admin_username": new_admin_username}, "$inc": {"revision": 1}},
+                    session=session,
                 )
 
+    user_reads.forget(current_user.username)
+    group_reads.forget(target_group_id)
+
+    if group_doc:
+        publish_group_event(target_group_id, "group")
+
     return {"msg": "Left group successfully."}
 
 
@@ -328,6 +393,8 @@ async def leave_household_group(
 @router.get("/my-group")
 async def my_group_details(
     current_user: Annotated[User, Depends(get_current_user)],
+    request: Request,
+    response: Response,
 ):
     """
     Description
@@ -335,6 +402,8 @@ async def my_group_details(
     - Retrieves the current user's group details
     - Returns group information including name, admin, and members
     - Includes usernames for all group members
+    - Sets the group's revision as the ETag. A matching If-None-Match
+      gets an empty 304 without looking up the members
     
     Returns
     -------
@@ -353,10 +422,10 @@ async def my_group_details(
         )
     
     # Get the first group ID
-    my_group_id: str = current_user.group_ids[0]
+    my_group_id = ObjectId(current_user.group_ids[0])
     
-    # Fetch group document from MongoDB
-    group_doc = await groups_coll.find_one({"_id": ObjectId(my_group_id)})
+    # Fetch group document from MongoDB (shared with concurrent requests for the same group)
+    group_doc = await group_reads.do(my_group_id, lambda: groups_coll.find_one({"_id": my_group_id}))
     
     # Check if group exists
     if not group_doc:
@@ -364,25 +433,14 @@ async def my_group_details(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Group not found."
         )
-    
-    # Fetch usernames for all users in the group
-    users_in_group_usernames = []
-    for user_id in group_doc.get("users_in_group", []):
-        user_doc = await users_coll.find_one({"_id": user_id})
-        if user_doc:
-            users_in_group_usernames.append(user_doc.get("username", "Unknown"))
-        else:
-            users_in_group_usernames.append("Unknown")
-    
-    # Convert ObjectIds to strings for JSON serialization
-    group_response = {
-        "_id": str(group_doc["_id"]),
-        "group_name": group_doc["group_name"],
-        "group_admin_id": str(group_doc["group_admin_id"]),
-        "group_admin_username": group_doc["group_admin_username"],
-        "users_in_group": [str(uid) for uid in group_doc.get("users_in_group", [])],
-        "users_in_group_usernames": users_in_group_usernames,
-        "created_at": group_doc.get("created_at")
-    }
-    
-    return group_response
\ No newline at end of file
+
+    etag = group_etag(group_doc["_id"], group_doc.get("revision", 0))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+
+    # Fetch usernames for all users in the group in one query
+    users_cursor = users_coll.find({"_id": {"$in": group_doc.get("users_in_group", [])}}, {"username": 1})
+    usernames = {user_doc["_id"]: user_doc.get("username", "Unknown") async for user_doc in users_cursor}
+
+    return group_details(group_doc, usernames)
\ No newline at end of file
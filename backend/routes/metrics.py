@@ -0,0 +1,59 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from backend.loop_monitor import blocking_calls
+from backend.metrics import metrics_authorized, registry, slow_queries
+from backend.settings import get_settings
+
+settings = get_settings()
+
+
+router = APIRouter()
+
+
+async def require_metrics_token(authorization: Annotated[str | None, Header()] = None) -> None:
+    """
+    Requires `Authorization: Bearer <METRICS_TOKEN>`. Without METRICS_TOKEN,
+    the metrics routes only exist in DEV_MODE.
+    """
+    if not settings.METRICS_TOKEN and not settings.DEV_MODE:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not metrics_authorized(authorization):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+
+
+@router.get("", response_class=PlainTextResponse, dependencies=[Depends(require_metrics_token)])
+async def metrics() -> PlainTextResponse:
+    """
+    Description
+    -----------
+    This process's metrics in the Prometheus text format: MongoDB commands
+    and time per route or task, commands per request, single-flight reads,
+    event stream evictions and event loop lag.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/slow-queries", dependencies=[Depends(require_metrics_token)])
+async def recent_slow_queries() -> list[dict]:
+    """
+    Description
+    -----------
+    The most recent MongoDB commands that took longer than
+    MONGO_SLOW_QUERY_MS (newest last). Query values are replaced by "?".
+    """
+    return list(slow_queries)
+
+
+@router.get("/blocking-calls", dependencies=[Depends(require_metrics_token)])
+async def recent_blocking_calls() -> list[dict]:
+    """
+    Description
+    -----------
+    The most recent times the event loop was held for longer than
+    LOOP_BLOCKING_THRESHOLD_MS (newest last), with the route or task and
+    the stack that held it. Empty unless the threshold is set.
+    """
+    return list(blocking_calls)
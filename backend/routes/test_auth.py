@@ -1,10 +1,12 @@
+import asyncio
 from unittest.mock import patch, AsyncMock
 import pytest
-from fastapi.testclient import TestClient
 from mongomock_motor import AsyncMongoMockClient
-from backend.main import app
+from backend.indexes import ensure_indexes
 from backend.routes import auth as auth_routes
-from backend.helpers import helper_auth
+from backend.helpers import helper_auth, helper_availability
+from backend.helpers.helper_tokens import hash_token
+from backend.task_dispatcher import TaskQueueFull
 from datetime import datetime, timezone
 
 
@@ -19,26 +21,26 @@ def test_db():
     auth_routes.users_coll = test_database["users"]
     auth_routes.password_reset_coll = test_database["password_reset"]
     auth_routes.email_verification_coll = test_database["email_verification"]
+    auth_routes.groups_coll = test_database["groups"]
 
     helper_auth._db = test_database
     helper_auth.users_coll = test_database["users"]
     helper_auth.password_reset_coll = test_database["password_reset"]
     helper_auth.email_verification_coll = test_database["email_verification"]
 
+    helper_availability.users_coll = test_database["users"]
+
+    # Registering relies on the unique indexes
+    asyncio.run(ensure_indexes(test_database))
+
     yield test_database
 
     # Clean up the database after tests
     mock_client.close()
 
 
-@pytest.fixture(scope="function")
-def client():
-    with TestClient(app) as c:
-        yield c
-
-
 @pytest.mark.asyncio
-async def test_register_user_username_already_taken(client, test_db):
+async def test_register_user_username_already_taken(client, test_db, query_budget):
     # Pre-populate a user
     await test_db["users"].insert_one({
         "username": "existinguser",
@@ -50,15 +52,17 @@ async def test_register_user_username_already_taken(client, test_db):
         "group_ids": []
     })
 
-    response = client.post(
-        "/auth/register",
-        data={
-            "username": "existinguser",
-            "password": "StrongPassword123",
-            "email": "new@example.com",
-            "full_name": "New User"
-        }
-    )
+    # The unique index rejects the insert, no lookups first
+    with query_budget(1):
+        response = client.post(
+            "/auth/register",
+            data={
+                "username": "existinguser",
+                "password": "StrongPassword123",
+                "email": "new@example.com",
+                "full_name": "New User"
+            }
+        )
     assert response.status_code == 400
     assert response.json() == {"detail": "Username already taken"}
 
@@ -103,7 +107,7 @@ async def test_verify_email_success(client, test_db):
     })
     await test_db["email_verification"].insert_one({
         "email": "unverified@example.com",
-        "email_verification_url": "valid_token",
+        "token_hash": hash_token("valid_token"),
         "created_at": datetime.now(timezone.utc)
     })
 
@@ -119,7 +123,7 @@ async def test_verify_email_success(client, test_db):
     assert user_in_db["email_verified"] is True
 
     # Verify that the verification token is deleted
-    token_in_db = await test_db["email_verification"].find_one({"email_verification_url": "valid_token"})
+    token_in_db = await test_db["email_verification"].find_one({"token_hash": hash_token("valid_token")})
     assert token_in_db is None
 
 
@@ -169,7 +173,20 @@ async def test_resend_verify_email_unregistered_email(mock_celery_task, client):
 
 
 @pytest.mark.asyncio
-async def test_login_for_access_token_success(client, test_db):
+@patch('backend.task_dispatcher.dispatcher.submit', side_effect=TaskQueueFull("queue is full"))
+@patch('backend.task_dispatcher.settings.TASK_BACKEND', "inprocess")
+async def test_forgot_password_in_process_queue_full(mock_submit, client):
+    response = client.post(
+        "/auth/forgot-password",
+        data={"email": "someone@example.com"}
+    )
+    assert response.status_code == 503
+    assert response.json() == {"detail": "Server is busy, please try again later."}
+    mock_submit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_login_for_access_token_success(client, test_db, query_budget):
     # Pre-populate a user
     from backend.helpers.helper_auth import get_password_hash
     await test_db["users"].insert_one({
@@ -182,10 +199,11 @@ async def test_login_for_access_token_success(client, test_db):
         "group_ids": []
     })
 
-    response = client.post(
-        "/auth/login",
-        data={"username": "loginuser", "password": "StrongPassword123"}
-    )
+    with query_budget(1):
+        response = client.post(
+            "/auth/login",
+            data={"username": "loginuser", "password": "StrongPassword123"}
+        )
     assert response.status_code == 200
     assert response.json() == {"msg": "Login successful"}
     assert "access_token" in response.cookies
@@ -236,7 +254,7 @@ async def test_login_for_access_token_unverified_email(client, test_db):
 
 
 @pytest.mark.asyncio
-async def test_read_users_me_success(client, test_db):
+async def test_read_users_me_success(client, test_db, query_budget):
     # Pre-populate a user
     from backend.helpers.helper_auth import create_access_token
     from datetime import timedelta
@@ -261,7 +279,8 @@ async def test_read_users_me_success(client, test_db):
     # Set the access token as a cookie
     client.cookies.set("access_token", f"Bearer {access_token}")
 
-    response = client.get("/auth/my-details")
+    with query_budget(1):
+        response = client.get("/auth/my-details")
     assert response.status_code == 200
     response_data = response.json()
     assert response_data["username"] == username
@@ -269,6 +288,23 @@ async def test_read_users_me_success(client, test_db):
     assert response_data["full_name"] == "My Details User"
 
 
+@pytest.mark.asyncio
+async def test_read_users_me_with_null_group_ids(client, test_db, log_in):
+    # Older user documents store null instead of an empty list
+    await test_db["users"].insert_one({
+        "username": "nullgroupsuser",
+        "hashed_password": "somehashedpassword",
+        "email": "nullgroups@example.com",
+        "email_verified": True,
+        "group_ids": None
+    })
+    log_in("nullgroupsuser")
+
+    response = client.get("/auth/my-details")
+    assert response.status_code == 200
+    assert response.json()["group_ids"] == []
+
+
 @pytest.mark.asyncio
 async def test_read_users_me_no_token(client):
     response = client.get("/auth/my-details")
@@ -303,7 +339,7 @@ async def test_reset_password_success(client, test_db):
     })
     await test_db["password_reset"].insert_one({
         "email": email,
-        "password_reset_url": "valid_reset_token",
+        "token_hash": hash_token("valid_reset_token"),
         "created_at": datetime.now(timezone.utc)
     })
 
@@ -319,7 +355,7 @@ async def test_reset_password_success(client, test_db):
     assert verify_password("NewStrongPassword123", user_in_db["hashed_password"])
 
     # Verify that the reset token is deleted
-    token_in_db = await test_db["password_reset"].find_one({"password_reset_url": "valid_reset_token"})
+    token_in_db = await test_db["password_reset"].find_one({"token_hash": hash_token("valid_reset_token")})
     assert token_in_db is None
 
 
@@ -333,6 +369,25 @@ async def test_reset_password_invalid_token(client, test_db):
     assert response.json() == {"detail": "Invalid password reset token"}
 
 
+@pytest.mark.asyncio
+async def test_reset_password_expired_token(client, test_db):
+    from datetime import timedelta
+
+    # A token older than its lifetime the TTL monitor hasn't deleted yet
+    await test_db["password_reset"].insert_one({
+        "email": "expired@example.com",
+        "token_hash": hash_token("expired_reset_token"),
+        "created_at": datetime.now(timezone.utc) - timedelta(minutes=auth_routes.settings.PASSWORD_RESET_TOKEN_EXPIRE_MINUTES + 1)
+    })
+
+    response = client.post(
+        "/auth/reset-password",
+        data={"reset_token": "expired_reset_token", "new_password": "NewStrongPassword123"}
+    )
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid password reset token"}
+
+
 @pytest.mark.asyncio
 async def test_change_username_success(client, test_db):
     # Pre-populate a user
@@ -501,3 +556,64 @@ async def test_change_password_incorrect_old_password(client, test_db):
     )
     assert response.status_code == 400
     assert response.json() == {"detail": "Old password is incorrect"}
+
+
+@pytest.mark.asyncio
+async def test_check_availability(client, test_db):
+    await test_db["users"].insert_one({
+        "username": "availabilityuser",
+        "hashed_password": "somehashedpassword",
+        "email": "availability@example.com",
+        "full_name": "Availability User",
+        "email_verified": False,
+        "profile_picture_url": None,
+        "group_ids": []
+    })
+    # Taken after the filters were built at startup
+    helper_availability.availability.add(username="availabilityuser", email="availability@example.com")
+
+    response = client.get("/auth/availability", params={"username": "availabilityuser", "email": "free@example.com"})
+    assert response.status_code == 200
+    assert response.json() == {"username_available": False, "email_available": True}
+
+    response = client.get("/auth/availability", params={"email": "availability@example.com"})
+    assert response.json() == {"username_available": None, "email_available": False}
+
+    response = client.get("/auth/availability")
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_availability_after_rebuild(client, test_db, query_budget, create_user):
+    # Registered through another API process, so only a rebuild picks it up
+    await create_user("rebuilduser")
+    await helper_availability.availability.rebuild()
+
+    # Never taken: answered from the filter alone
+    with query_budget(0):
+        response = client.get("/auth/availability", params={"username": "neverusedname", "email": "neverused@example.com"})
+    assert response.json() == {"username_available": True, "email_available": True}
+
+    # Taken: in the rebuilt filter, confirmed in MongoDB
+    with query_budget(2):
+        response = client.get("/auth/availability", params={"username": "rebuilduser", "email": "rebuilduser@example.com"})
+    assert response.json() == {"username_available": False, "email_available": False}
+
+
+@pytest.mark.asyncio
+async def test_server_timing_only_has_total_without_metrics_token(client, monkeypatch):
+    monkeypatch.setattr(helper_auth.settings, "METRICS_TOKEN", "scraper-token")
+
+    response = client.post("/auth/login", data={"username": "nosuchuser", "password": "StrongPassword123"})
+    assert response.status_code == 401
+    assert [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")] == ["total"]
+
+    # With the token, the phases show, and argon2 ran even though the user doesn't exist
+    response = client.post(
+        "/auth/login",
+        data={"username": "nosuchuser", "password": "StrongPassword123"},
+        headers={"Authorization": "Bearer scraper-token"},
+    )
+    phases = [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+    assert phases[:2] == ["total", "db"]
+    assert "argon2" in phases
@@ -0,0 +1,267 @@
+import json
+from datetime import timedelta, datetime, timezone
+
+import pytest
+from bson.objectid import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+from backend.routes import chores as chores_routes
+from backend.helpers import helper_auth, helper_availability, helper_chores
+
+
+@pytest.fixture(scope="module", autouse=True)
+def test_db():
+    # In-memory MongoDB for testing
+    mock_client = AsyncMongoMockClient()
+    test_database = mock_client.get_database("testdb_chores")
+
+    # Override the database client in chores_routes, helper_chores and helper_auth
+    chores_routes._db = test_database
+    chores_routes.users_coll = test_database["users"]
+    chores_routes.groups_coll = test_database["groups"]
+    chores_routes.chores_coll = test_database["chores"]
+    chores_routes.recurring_chores_coll = test_database["recurring_chores"]
+    chores_routes.chore_tombstones_coll = test_database["chore_tombstones"]
+
+    helper_chores.users_coll = test_database["users"]
+
+    helper_auth._db = test_database
+    helper_auth.users_coll = test_database["users"]
+
+    helper_availability.users_coll = test_database["users"]
+
+    yield test_database
+
+    # Clean up the database after tests
+    mock_client.close()
+
+
+@pytest.mark.asyncio
+async def test_create_and_complete_chore(client, test_db, query_budget, create_group, log_in):
+    group_id = await create_group("completer")
+    log_in("completer0")
+
+    # Authentication, the assignee, the insert, and the revision bump and stamp
+    with query_budget(5):
+        response = client.post("/chores/create-chore", data={"chore_name": "Dishes", "chore_description": "All of them"})
+    assert response.status_code == 200
+    chore_id = response.json()["chore_id"]
+
+    with query_budget(4):
+        response = client.post(f"/chores/complete-chore/{chore_id}")
+    assert response.status_code == 200
+    assert response.json()["chore"]["is_completed"] is True
+
+    group_in_db = await test_db["groups"].find_one({"_id": group_id})
+    assert group_in_db["revision"] == 2
+
+
+@pytest.mark.asyncio
+async def test_chore_page_query_count_does_not_grow_with_chores(client, test_db, query_budget, create_group, log_in):
+    for prefix, chore_count in (("fewchores", 2), ("manychores", 40)):
+        group_id = await create_group(prefix)
+        await test_db["chores"].insert_many([
+            {
+                "group_id": group_id,
+                "chore_name": f"Chore {i}",
+                "chore_description": "Description",
+                "assigned_user_id": None,
+                "is_completed": False,
+                "created_at": datetime.now(timezone.utc) - timedelta(minutes=i),
+                "completed_at": None,
+                "revision": 0,
+            }
+            for i in range(chore_count)
+        ])
+        log_in(f"{prefix}0")
+
+        # Authentication, the group revision and one page of chores
+        with query_budget(3):
+            response = client.get("/chores/chores", params={"limit": 10})
+        assert response.status_code == 200
+        assert len(response.json()) == min(chore_count, 10)
+
+        # An up-to-date client skips the chore query
+        with query_budget(2):
+            response = client.get("/chores/chores", params={"limit": 10}, headers={"If-None-Match": response.headers["ETag"]})
+        assert response.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_chores_next_page(client, test_db, create_group, log_in):
+    await create_group("pager")
+    log_in("pager0")
+    for name in ("Dusting", "Mopping", "Hoovering"):
+        client.post("/chores/create-chore", data={"chore_name": name, "chore_description": "Hallway"})
+
+    response = client.get("/chores/chores", params={"limit": 2})
+    assert response.status_code == 200
+    first_page = [chore["chore_name"] for chore in response.json()]
+    assert len(first_page) == 2
+
+    response = client.get("/chores/chores", params={"limit": 2, "cursor": response.headers["X-Next-Cursor"]})
+    assert response.status_code == 200
+    second_page = [chore["chore_name"] for chore in response.json()]
+    assert sorted(first_page + second_page) == ["Dusting", "Hoovering", "Mopping"]
+    assert "X-Next-Cursor" not in response.headers
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("param", ["assigned_user_id", "recurring_chore_id"])
+async def test_chores_invalid_id_filter(client, test_db, create_group, log_in, param):
+    await create_group(f"badfilter{param}")
+    log_in(f"badfilter{param}0")
+
+    response = client.get("/chores/chores", params={param: "abc"})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid ID."}
+
+
+@pytest.mark.asyncio
+async def test_create_recurring_chore_query_count_does_not_grow_with_assignees(client, test_db, query_budget, create_group, log_in):
+    for prefix, member_count in (("smallrotation", 1), ("largerotation", 6)):
+        await create_group(prefix, member_count)
+        log_in(f"{prefix}0")
+
+        # Authentication, the assignees, the chore and schedule inserts, and the revision bump and stamp
+        with query_budget(6):
+            response = client.post("/chores/recurring-chores/", data={
+                "chore_name": "Trash",
+                "chore_description": "Take it out",
+                "assigned_usernames": [f"{prefix}{i}" for i in range(member_count)],
+                "rrule_str": "FREQ=WEEKLY;BYDAY=TU",
+                "start_date_str": "2025-12-01T10:00:00Z",
+            })
+        assert response.status_code == 200
+
+        recurring_chore = await test_db["recurring_chores"].find_one({"_id": ObjectId(response.json()["recurring_chore_id"])})
+        assert len(recurring_chore["assigned_user_ids"]) == member_count
+
+
+@pytest.mark.asyncio
+async def test_create_recurring_chore_user_not_in_group(client, test_db, create_group, log_in):
+    await create_group("rotationowner")
+    await create_group("otherrotation")
+    log_in("rotationowner0")
+
+    response = client.post("/chores/recurring-chores/", data={
+        "chore_name": "Trash",
+        "chore_description": "Take it out",
+        "assigned_usernames": ["rotationowner0", "otherrotation0"],
+        "rrule_str": "FREQ=WEEKLY;BYDAY=TU",
+        "start_date_str": "2025-12-01T10:00:00Z",
+    })
+    assert response.status_code == 400
+    assert response.json() == {"detail": "User with username 'otherrotation0' not found or not in the same group."}
+
+
+@pytest.mark.asyncio
+async def test_chore_changes_since_revision(client, test_db, query_budget, create_group, log_in):
+    await create_group("syncer")
+    log_in("syncer0")
+
+    client.post("/chores/create-chore", data={"chore_name": "Ironing", "chore_description": "Shirts"})
+    response = client.get("/chores/changes")
+    revision = response.json()["revision"]
+    assert revision == 1
+
+    response = client.post("/chores/create-chore", data={"chore_name": "Laundry", "chore_description": "Fold it"})
+    chore_id = response.json()["chore_id"]
+    client.delete(f"/chores/delete-chore/{chore_id}")
+
+    # Authentication, the group revision, changed chores and tombstones
+    with query_budget(4):
+        response = client.get("/chores/changes", params={"since": revision})
+    assert response.status_code == 200
+    changes = response.json()
+    assert changes["revision"] == revision + 2
+    assert changes["chores"] == []
+    assert [tombstone["deleted_id"] for tombstone in changes["deleted"]] == [chore_id]
+
+
+@pytest.mark.asyncio
+async def test_first_chore_sync_is_paged(client, test_db, query_budget, create_group, log_in):
+    await create_group("pagedsyncer")
+    log_in("pagedsyncer0")
+    for name in ("Hoovering", "Mopping", "Dusting"):
+        client.post("/chores/create-chore", data={"chore_name": name, "chore_description": "Downstairs"})
+
+    # Authentication, the group revision and one page of chores
+    with query_budget(3):
+        response = client.get("/chores/changes", params={"limit": 2})
+    first_page = response.json()
+    assert [chore["chore_name"] for chore in first_page["chores"]] == ["Dusting", "Mopping"]
+    assert first_page["revision"] == 3
+
+    response = client.get("/chores/changes", params={"limit": 2, "cursor": first_page["next_cursor"]})
+    second_page = response.json()
+    assert [chore["chore_name"] for chore in second_page["chores"]] == ["Hoovering"]
+    assert second_page["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_chore_changes_since_expired_tombstones(client, test_db, create_group, log_in):
+    group_id = await create_group("expiredsyncer")
+    log_in("expiredsyncer0")
+    await test_db["groups"].update_one({"_id": group_id}, {"$set": {"revision": 10, "tombstones_expired_revision": 5}})
+
+    response = client.get("/chores/changes", params={"since": 4})
+    assert response.status_code == 410
+
+    response = client.get("/chores/changes", params={"since": 5})
+    assert response.status_code == 200
+    assert response.json()["revision"] == 10
+
+
+def _create_chores_and_schedule(client, prefix: str) -> None:
+    for name in ("Sweeping", "Windows", "Plants"):
+        client.post("/chores/create-chore", data={"chore_name": name, "chore_description": "Living room"})
+    client.post("/chores/recurring-chores/", data={
+        "chore_name": "Bins",
+        "chore_description": "Out on the curb",
+        "assigned_usernames": [f"{prefix}0"],
+        "rrule_str": "FREQ=WEEKLY;BYDAY=MO",
+        "start_date_str": "2025-12-01T10:00:00Z",
+    })
+
+
+def _get_streamed(client, route: str, ndjson: bool):
+    if ndjson:
+        response = client.get(route, headers={"Accept": "application/x-ndjson"})
+        assert response.headers["content-type"] == "application/x-ndjson"
+        return response, [json.loads(line) for line in response.text.splitlines()]
+
+    response = client.get(route, params={"stream": "true"})
+    assert response.headers["content-type"] == "application/json"
+    return response, response.json()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("route", ["/chores/chores", "/chores/recurring-chores/"])
+@pytest.mark.parametrize("ndjson", [True, False], ids=["ndjson", "json"])
+async def test_streamed_list_matches_buffered(client, test_db, create_group, log_in, route, ndjson):
+    prefix = f"streamer{'ndjson' if ndjson else 'json'}{route.count('recurring')}"
+    await create_group(prefix)
+    log_in(f"{prefix}0")
+    _create_chores_and_schedule(client, prefix)
+
+    buffered = client.get(route)
+    response, streamed = _get_streamed(client, route, ndjson)
+    assert response.status_code == 200
+    assert streamed
+    assert streamed == buffered.json()
+    assert response.headers["ETag"] == buffered.headers["ETag"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("route", ["/chores/chores", "/chores/recurring-chores/"])
+@pytest.mark.parametrize("ndjson", [True, False], ids=["ndjson", "json"])
+async def test_streamed_list_empty(client, test_db, create_group, log_in, route, ndjson):
+    prefix = f"emptystream{'ndjson' if ndjson else 'json'}{route.count('recurring')}"
+    await create_group(prefix)
+    log_in(f"{prefix}0")
+
+    response, streamed = _get_streamed(client, route, ndjson)
+    assert response.status_code == 200
+    assert response.text == ("" if ndjson else "[]")
+    assert streamed == []
+    assert response.headers["ETag"]
@@ -0,0 +1,101 @@
+from datetime import datetime, timezone
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient, AsyncMongoMockCollection
+from backend.routes import dashboard as dashboard_routes
+from backend.helpers import helper_auth, helper_availability
+
+
+@pytest.fixture(scope="module", autouse=True)
+def test_db():
+    # In-memory MongoDB for testing
+    mock_client = AsyncMongoMockClient()
+    test_database = mock_client.get_database("testdb_dashboard")
+
+    # Override the database client in dashboard_routes and helper_auth
+    dashboard_routes._db = test_database
+    dashboard_routes.users_coll = test_database["users"]
+    dashboard_routes.groups_coll = test_database["groups"]
+    dashboard_routes.chores_coll = test_database["chores"]
+    dashboard_routes.recurring_chores_coll = test_database["recurring_chores"]
+
+    helper_auth._db = test_database
+    helper_auth.users_coll = test_database["users"]
+
+    helper_availability.users_coll = test_database["users"]
+
+    yield test_database
+
+    # Clean up the database after tests
+    mock_client.close()
+
+
+@pytest.mark.asyncio
+async def test_dashboard(client, test_db, query_budget, create_group, log_in):
+    group_id = await create_group("dashboard", 3)
+    await test_db["chores"].insert_one({
+        "group_id": group_id,
+        "chore_name": "Dishes",
+        "chore_description": "Wash the dishes",
+        "assigned_user_id": (await test_db["users"].find_one({"username": "dashboard1"}))["_id"],
+        "assigned_username": "dashboard1",
+        "completed": False,
+        "created_at": datetime.now(timezone.utc),
+    })
+    log_in("dashboard0")
+
+    # Authentication, then the group, members, chores and recurring chores
+    with query_budget(5):
+        response = client.get("/dashboard")
+    assert response.status_code == 200
+
+    body = response.json()
+    assert body["user"]["username"] == "dashboard0"
+    assert "hashed_password" not in body["user"]
+    assert body["group"]["group_name"] == "dashboard group"
+    assert len(body["group"]["users_in_group_usernames"]) == 3
+    assert [chore["chore_name"] for chore in body["chores"]] == ["Dishes"]
+    assert body["next_cursor"] is None
+    assert body["recurring_chores"] == []
+
+
+@pytest.mark.asyncio
+async def test_dashboard_without_group(client, test_db, create_user, log_in):
+    await create_user("dashboardloner")
+    log_in("dashboardloner")
+
+    response = client.get("/dashboard")
+    assert response.status_code == 200
+
+    body = response.json()
+    assert body["user"]["username"] == "dashboardloner"
+    assert "hashed_password" not in body["user"]
+    assert body["group"] is None
+    assert body["chores"] == []
+
+
+@pytest.mark.asyncio
+async def test_dashboard_reads_revision_before_chores(client, test_db, monkeypatch, create_group, log_in):
+    # A chore written between the two reads must not be missing from chores at the returned revision,
+    # so the group (and its revision) has to be read before the chores query starts
+    events = []
+    find_one, find = AsyncMongoMockCollection.find_one, AsyncMongoMockCollection.find
+
+    async def recording_find_one(self, *args, **kwargs):
+        result = await find_one(self, *args, **kwargs)
+        events.append(f"{self.name}.find_one done")
+        return result
+
+    def recording_find(self, *args, **kwargs):
+        events.append(f"{self.name}.find")
+        return find(self, *args, **kwargs)
+
+    await create_group("orderedreads")
+    log_in("orderedreads0")
+    monkeypatch.setattr(AsyncMongoMockCollection, "find_one", recording_find_one)
+    monkeypatch.setattr(AsyncMongoMockCollection, "find", recording_find)
+
+    response = client.get("/dashboard")
+    assert response.status_code == 200
+    assert events.index("groups.find_one done") < events.index("chores.find")
+    assert events.index("groups.find_one done") < events.index("recurring_chores.find")
@@ -0,0 +1,108 @@
+from datetime import datetime, timezone
+
+import pytest
+from bson.objectid import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+from backend.routes import groups as groups_routes
+from backend.helpers import helper_auth, helper_availability
+from backend.helpers.helper_tokens import hash_token
+
+
+@pytest.fixture(scope="module", autouse=True)
+def test_db():
+    # In-memory MongoDB for testing
+    mock_client = AsyncMongoMockClient()
+    test_database = mock_client.get_database("testdb_groups")
+
+    # Override the database client in groups_routes and helper_auth
+    groups_routes._db = test_database
+    groups_routes.users_coll = test_database["users"]
+    groups_routes.groups_coll = test_database["groups"]
+    groups_routes.group_invites_coll = test_database["group_invites"]
+
+    helper_auth._db = test_database
+    helper_auth.users_coll = test_database["users"]
+
+    helper_availability.users_coll = test_database["users"]
+
+    yield test_database
+
+    # Clean up the database after tests
+    mock_client.close()
+
+
+@pytest.mark.asyncio
+async def test_create_group(client, test_db, query_budget, create_user, log_in):
+    user_id = await create_user("groupcreator")
+    log_in("groupcreator")
+
+    with query_budget(3):
+        response = client.post("/groups/create-group", data={"group_name": "Creators Group"})
+    assert response.status_code == 200
+
+    group_id = ObjectId(response.json()["group_id"])
+    user_in_db = await test_db["users"].find_one({"_id": user_id})
+    assert user_in_db["group_ids"] == [group_id]
+
+
+@pytest.mark.asyncio
+async def test_my_group_query_count_does_not_grow_with_members(client, test_db, query_budget, create_group, log_in):
+    # Authentication, the group and its members' usernames, however many members there are
+    for prefix, member_count in (("smallgroup", 2), ("largegroup", 8)):
+        await create_group(prefix, member_count)
+        log_in(f"{prefix}0")
+
+        with query_budget(3):
+            response = client.get("/groups/my-group")
+        assert response.status_code == 200
+        assert len(response.json()["users_in_group_usernames"]) == member_count
+
+
+@pytest.mark.asyncio
+async def test_my_group_not_modified(client, test_db, query_budget, create_group, log_in):
+    await create_group("etaggroup", 3)
+    log_in("etaggroup0")
+
+    response = client.get("/groups/my-group")
+    etag = response.headers["ETag"]
+
+    # An up-to-date client doesn't need the members looked up
+    with query_budget(2):
+        response = client.get("/groups/my-group", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_join_group(client, test_db, query_budget, create_user, create_group, log_in):
+    group_id = await create_group("joingroup", 2)
+    user_id = await create_user("groupjoiner")
+    await test_db["group_invites"].insert_one({
+        "email": "groupjoiner@example.com",
+        "group_id": group_id,
+        "group_name": "joingroup group",
+        "token_hash": hash_token("valid_invite_token"),
+        "created_at": datetime.now(timezone.utc),
+    })
+    log_in("groupjoiner")
+
+    with query_budget(4):
+        response = client.post("/groups/join-group", data={"invite_token": "valid_invite_token"})
+    assert response.status_code == 200
+
+    group_in_db = await test_db["groups"].find_one({"_id": group_id})
+    assert user_id in group_in_db["users_in_group"]
+    assert group_in_db["revision"] == 1
+
+
+@pytest.mark.asyncio
+async def test_leave_group_promotes_new_admin(client, test_db, query_budget, create_group, log_in):
+    group_id = await create_group("leavegroup", 3)
+    log_in("leavegroup0")
+
+    with query_budget(5):
+        response = client.post("/groups/leave-group")
+    assert response.status_code == 200
+
+    group_in_db = await test_db["groups"].find_one({"_id": group_id})
+    assert group_in_db["group_admin_username"] == "leavegroup1"
+    assert len(group_in_db["users_in_group"]) == 2
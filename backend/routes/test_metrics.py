@@ -0,0 +1,34 @@
+import pytest
+
+from backend.settings import get_settings
+
+settings = get_settings()
+
+METRICS_ROUTES = ("/metrics", "/metrics/slow-queries", "/metrics/blocking-calls")
+
+
+@pytest.mark.parametrize("route", METRICS_ROUTES)
+def test_metrics_hidden_without_token(client, monkeypatch, route):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    monkeypatch.setattr(settings, "DEV_MODE", False)
+
+    response = client.get(route)
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("route", METRICS_ROUTES)
+def test_metrics_require_token(client, monkeypatch, route):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scraper-token")
+
+    assert client.get(route).status_code == 401
+    assert client.get(route, headers={"Authorization": "Bearer wrong-token"}).status_code == 401
+    assert client.get(route, headers={"Authorization": "Bearer scraper-token"}).status_code == 200
+
+
+def test_metrics_open_in_dev_mode_without_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    monkeypatch.setattr(settings, "DEV_MODE", True)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "http_requests_total" in response.text
@@ -1,5 +1,6 @@
 from functools import lru_cache
 from pathlib import Path
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -10,6 +11,11 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    # How long emailed one-time links stay valid (MongoDB deletes them after that)
+    PASSWORD_RESET_TOKEN_EXPIRE_MINUTES: int = 60
+    EMAIL_VERIFICATION_TOKEN_EXPIRE_MINUTES: int = 60 * 24
+    GROUP_INVITE_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7
+
     # MongoDB Stuff
     MONGO_URI: str
     DB_NAME: str
@@ -20,6 +26,27 @@ class Settings(BaseSettings):
     GROUP_INVITES_COLLECTION: str
     CHORES_COLLECTION: str
     RECURRING_CHORES_COLLECTION: str
+    # Records of deleted chores, for GET /chores/changes
+    CHORE_TOMBSTONES_COLLECTION: str = "chore_tombstones"
+    # Tombstones are removed after this long; clients that last synced before
+    # that must sync again from scratch (GET /chores/changes returns 410)
+    CHORE_TOMBSTONE_EXPIRE_DAYS: int = 30
+    # Multi-document transactions need a replica set or sharded cluster
+    MONGO_USE_TRANSACTIONS: bool = False
+    # Create missing indexes (backend/indexes.py) when the API starts. The
+    # unique ones are created before serving, and startup fails without them.
+    # Off: startup only checks that the unique ones exist
+    MONGO_ENSURE_INDEXES: bool = True
+    # Commands slower than this are logged and kept for GET /metrics/slow-queries (0 turns it off)
+    MONGO_SLOW_QUERY_MS: float = 100.0
+    MONGO_SLOW_QUERY_SAMPLES: int = 50
+
+    # Username/email availability filters (GET /auth/availability)
+    # Sized for at least this many users (or twice the current number)
+    AVAILABILITY_FILTER_CAPACITY: int = 100_000
+    AVAILABILITY_FILTER_ERROR_RATE: float = 0.01
+    # Rebuilt this often to pick up names taken through other API processes (0: only at startup)
+    AVAILABILITY_FILTER_REBUILD_SECONDS: float = 600.0
 
     # S3 Stuff
     S3_ENDPOINT: str
@@ -41,6 +68,65 @@ class Settings(BaseSettings):
 
     # Celery Stuff
     CELERY_BROKER_URL: str
+    # Run I/O-bound tasks (emails, small Mongo writes) as coroutines without
+    # holding a pool slot until they finish. See backend/async_tasks.py
+    # The task is acked before its coroutine runs, so a failed email (or
+    # write) is only logged, never retried
+    CELERY_ASYNC_IO_TASKS: bool = False
+    CELERY_ASYNC_IO_CONCURRENCY: int = 200
+    # Each worker process writes its metrics (task run time, queue wait,
+    # outcomes, memory) to worker-<pid>.prom here, for node_exporter's
+    # textfile collector. Unset: not written. See backend/worker_metrics.py
+    WORKER_METRICS_DIR: str | None = None
+    WORKER_METRICS_INTERVAL_SECONDS: float = 15.0
+
+    # Task Dispatch Stuff
+    # "celery" publishes tasks to the broker, "inprocess" runs them inside
+    # the API process (no RabbitMQ needed). See backend/task_dispatcher.py
+    TASK_BACKEND: Literal["celery", "inprocess"] = "celery"
+    INPROCESS_TASK_WORKERS: int = 8
+    INPROCESS_TASK_QUEUE_SIZE: int = 1000
+    # With "inprocess", only the API process holding this lock file runs the
+    # beat schedule. Its processes on other machines need INPROCESS_BEAT=false
+    INPROCESS_BEAT: bool = True
+    INPROCESS_BEAT_LOCK_FILE: str = "inprocess-beat.lock"
+
+    # Event Stream Stuff (GET /events, see backend/events.py)
+    # Events a slow subscriber may fall behind by before it is disconnected
+    EVENTS_SUBSCRIBER_QUEUE_SIZE: int = 100
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    # Broker URL (e.g. the same as CELERY_BROKER_URL) to share events between
+    # API processes and with Celery workers. Unset: events stay in this process
+    EVENTS_RELAY_URL: str | None = None
+
+    # Metrics Stuff (GET /metrics, see backend/metrics.py)
+    # Scrapers must send `Authorization: Bearer <METRICS_TOKEN>`. Unset: the
+    # metrics routes are only served in DEV_MODE (without a token)
+    METRICS_TOKEN: str | None = None
+    # Recent requests per route the latency percentiles are computed over
+    METRICS_LATENCY_WINDOW: int = 1024
+    # How often the event loop's lag is sampled (see backend/loop_monitor.py)
+    LOOP_LAG_INTERVAL_MS: float = 500.0
+    # Dev/staging: log the stack of anything holding the event loop longer
+    # than this (and list it at GET /metrics/blocking-calls). 0 turns it off
+    LOOP_BLOCKING_THRESHOLD_MS: float = 0.0
+    LOOP_BLOCKING_SAMPLES: int = 50
+
+    # Tracing Stuff (see backend/tracing.py)
+    # File spans are appended to as JSON lines, by the API and the workers.
+    # Unset: no tracing
+    TRACING_FILE: str | None = None
+
+    # Profiling Stuff (see backend/profiling.py)
+    # Profiles requests that send `X-Profile-Token: <PROFILING_TOKEN>`, and
+    # a random PROFILING_SAMPLE_RATE share (0 to 1) of all requests
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str | None = None
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL_MS: float = 5.0
+    # Where profiles are written (collapsed stacks), and how many are kept
+    PROFILING_DIR: str = "profiles"
+    PROFILING_MAX_PROFILES: int = 50
 
     # Configure code to read from .env file in the backend dir
     model_config = SettingsConfigDict(
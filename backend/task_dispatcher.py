@@ -0,0 +1,203 @@
+import asyncio
+import fcntl
+import functools
+import inspect
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from celery import Task
+
+from .celery_app import celery_app
+from .metrics import measured, measured_coroutine, timed
+from .settings import get_settings
+from .tracing import TRACEPARENT_HEADER, current_traceparent, span, traced, traced_coroutine
+
+settings = get_settings()
+
+
+class TaskQueueFull(Exception):
+    """Raised when the in-process task queue cannot take any more work."""
+
+
+class InProcessDispatcher:
+    """
+    Description
+    -----------
+    Runs Celery task bodies inside the API process instead of sending them
+    to RabbitMQ. Tasks go through a bounded asyncio queue drained by a fixed
+    number of consumers: coroutine tasks are awaited on the event loop and
+    regular tasks are run on a thread pool.
+
+    Also runs the beat schedule, since there is no `celery beat` process
+    when there is no broker. Only one process holding `beat_lock_file` runs
+    it, so API processes sharing a machine don't each run every task.
+    """
+
+    def __init__(self, workers: int, queue_size: int, beat_lock_file: str | None = None) -> None:
+        self._workers = workers
+        self._queue_size = queue_size
+        self._beat_lock_file = beat_lock_file
+        self._beat_lock = None
+        self._queue: asyncio.Queue | None = None
+        self._consumers: list[asyncio.Task] = []
+        self._executor: ThreadPoolExecutor | None = None
+
+    async def start(self, beat_schedule: dict | None = None) -> None:
+        """
+        Start the consumers (and periodic tasks) on the running event loop.
+
+        Raises
+        ------
+        ValueError: If a beat schedule entry isn't an interval (e.g. a crontab).
+        """
+        intervals = {name: _schedule_seconds(name, entry["schedule"]) for name, entry in (beat_schedule or {}).items()}
+
+        self._queue = asyncio.Queue(maxsize=self._queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="inprocess-task")
+        self._consumers = [asyncio.create_task(self._consume()) for _ in range(self._workers)]
+
+        if intervals and not self._acquire_beat_lock():
+            logging.info("Another process holds %s, not running the beat schedule", self._beat_lock_file)
+            return
+
+        for name, interval in intervals.items():
+            task = celery_app.tasks[beat_schedule[name]["task"]]
+            self._consumers.append(asyncio.create_task(self._run_periodically(task, interval)))
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Let queued tasks finish (up to `timeout` seconds), then shut down."""
+        if self._queue is None:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logging.warning("Dropping %d queued in-process tasks on shutdown", self._queue.qsize())
+
+        for consumer in self._consumers:
+            consumer.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+
+        self._executor.shutdown(wait=True)
+        self._queue = None
+        self._consumers = []
+
+        if self._beat_lock is not None:
+            # Closing the file releases the lock
+            self._beat_lock.close()
+            self._beat_lock = None
+
+    def _acquire_beat_lock(self) -> bool:
+        if self._beat_lock_file is None:
+            return True
+
+        # Held until stop(), or until the process exits
+        lock = open(self._beat_lock_file, "a")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            return False
+        self._beat_lock = lock
+        return True
+
+    def submit(self, task: Task, args: tuple, kwargs: dict) -> None:
+        """
+        Queue a task for execution.
+
+        Raises
+        ------
+        TaskQueueFull: If `INPROCESS_TASK_QUEUE_SIZE` tasks are already waiting.
+        """
+        if self._queue is None:
+            raise RuntimeError("In-process task dispatcher has not been started.")
+
+        try:
+            # The task continues the caller's trace, like it would through its message headers
+            self._queue.put_nowait((task, args, kwargs, current_traceparent()))
+        except asyncio.QueueFull:
+            raise TaskQueueFull(f"Cannot queue {task.name}, in-process task queue is full.")
+
+    async def _consume(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            task, args, kwargs, traceparent = await self._queue.get()
+            try:
+                if inspect.iscoroutinefunction(task.run):
+                    await traced_coroutine(
+                        task_operation(task), measured_coroutine(task_operation(task), task.run(*args, **kwargs)), traceparent,
+                    )
+                else:
+                    # The executor doesn't carry over context variables, so measure and trace on its thread
+                    run = traced(task_operation(task), measured(task_operation(task), task.run), traceparent)
+                    await loop.run_in_executor(self._executor, functools.partial(run, *args, **kwargs))
+            except Exception:
+                logging.exception("In-process task %s failed", task.name)
+            finally:
+                self._queue.task_done()
+
+    async def _run_periodically(self, task: Task, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.submit(task, (), {})
+            except TaskQueueFull:
+                logging.warning("Skipping scheduled run of %s, queue is full", task.name)
+
+
+def _schedule_seconds(name: str, schedule) -> float:
+    """The interval of a beat schedule entry, in seconds (crontabs and solar schedules aren't supported)."""
+    if isinstance(schedule, timedelta):
+        return schedule.total_seconds()
+    if isinstance(schedule, (int, float)) and not isinstance(schedule, bool):
+        return float(schedule)
+    raise ValueError(
+        f"Beat schedule entry {name!r} has schedule {schedule!r}, but TASK_BACKEND=inprocess only runs intervals "
+        "(seconds or a timedelta). Use TASK_BACKEND=celery with celery beat for it."
+    )
+
+
+dispatcher = InProcessDispatcher(
+    settings.INPROCESS_TASK_WORKERS, settings.INPROCESS_TASK_QUEUE_SIZE, settings.INPROCESS_BEAT_LOCK_FILE,
+)
+
+
+def task_operation(task: Task) -> str:
+    """Operation label for the MongoDB commands a task issues (see backend/metrics.py)."""
+    return f"task {task.name}"
+
+
+class DispatchingTask(Task):
+    """
+    Description
+    -----------
+    Default Celery task class for this app (see celery_app.py).
+
+    `.delay()` / `.apply_async()` publish to the broker as usual when
+    `TASK_BACKEND` is "celery". When it is "inprocess" the task is handed to
+    `dispatcher` instead, and nothing is returned since there is no result
+    to track.
+    """
+
+    def __call__(self, *args, **kwargs):
+        # Attribute the task's MongoDB commands to it when run by a worker, and
+        # trace it as part of the request (or task) that queued it.
+        # Coroutine bodies run later, on the worker's event loop (see async_tasks.py)
+        traceparent = self.request.get(TRACEPARENT_HEADER)
+        if inspect.iscoroutinefunction(self.run):
+            return traced_coroutine(
+                task_operation(self), measured_coroutine(task_operation(self), super().__call__(*args, **kwargs)), traceparent,
+            )
+        return traced(task_operation(self), measured(task_operation(self), super().__call__), traceparent)(*args, **kwargs)
+
+    def apply_async(self, args=None, kwargs=None, **options):
+        if settings.TASK_BACKEND == "inprocess":
+            dispatcher.submit(self, tuple(args or ()), dict(kwargs or {}))
+            return None
+
+        # Publishing to the broker blocks the caller (e.g. the request).
+        # The task's message carries this span's traceparent (see tracing.py)
+        with timed("broker"), span(f"publish {self.name}"):
+            return super().apply_async(args, kwargs, **options)
@@ -0,0 +1,70 @@
+import time
+
+import aiosmtplib
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from backend import celery_worker
+from backend.celery_worker import verify_email_helper_task
+from backend.metrics import celery_tasks
+from backend.settings import get_settings
+
+settings = get_settings()
+
+
+def _runs(state: str) -> float:
+    return next((value for name, labels, value in celery_tasks.samples()
+                 if labels == (verify_email_helper_task.name, state)), 0)
+
+
+def _wait_for_runs(state: str, count: float) -> None:
+    # Recorded by the io_loop thread once the detached coroutine is done
+    deadline = time.monotonic() + 5
+    while _runs(state) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def smtp_down(monkeypatch):
+    async def failing_send(*args, **kwargs):
+        raise aiosmtplib.SMTPConnectError("Mail server unreachable")
+
+    mock_client = AsyncMongoMockClient()
+    monkeypatch.setattr(celery_worker, "async_email_verification_coll", mock_client.get_database("testdb_async_tasks")["email_verification"])
+    monkeypatch.setattr(aiosmtplib, "send", failing_send)
+    yield
+    mock_client.close()
+
+
+def test_failed_send_raises(smtp_down, monkeypatch):
+    monkeypatch.setattr(settings, "CELERY_ASYNC_IO_TASKS", False)
+
+    with pytest.raises(aiosmtplib.SMTPConnectError):
+        verify_email_helper_task("waiting@example.com")
+
+
+def test_detached_failed_send_recorded_as_failure(smtp_down, monkeypatch):
+    monkeypatch.setattr(settings, "CELERY_ASYNC_IO_TASKS", True)
+    failures, successes = _runs("FAILURE"), _runs("SUCCESS")
+
+    # Returns once the coroutine is scheduled
+    assert verify_email_helper_task("detached@example.com") is None
+
+    _wait_for_runs("FAILURE", failures + 1)
+    assert _runs("FAILURE") == failures + 1
+    assert _runs("SUCCESS") == successes
+
+
+def test_detached_send_recorded_as_success(smtp_down, monkeypatch):
+    async def send(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(settings, "CELERY_ASYNC_IO_TASKS", True)
+    monkeypatch.setattr(aiosmtplib, "send", send)
+    failures, successes = _runs("FAILURE"), _runs("SUCCESS")
+
+    assert verify_email_helper_task("detached@example.com") is None
+
+    _wait_for_runs("SUCCESS", successes + 1)
+    assert _runs("SUCCESS") == successes + 1
+    assert _runs("FAILURE") == failures
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+import pytest
+from bson.objectid import ObjectId
+
+from backend import celery_worker
+from backend.helpers.helper_groups import PENDING_REVISION
+
+
+@pytest.fixture
+def test_db(monkeypatch):
+    # In-memory MongoDB for testing, synchronous like the worker's client
+    test_database = mongomock.MongoClient().get_database("testdb_worker")
+    monkeypatch.setattr(celery_worker, "users_coll", test_database["users"])
+    monkeypatch.setattr(celery_worker, "groups_coll", test_database["groups"])
+    monkeypatch.setattr(celery_worker, "chores_coll", test_database["chores"])
+    monkeypatch.setattr(celery_worker, "chore_tombstones_coll", test_database["chore_tombstones"])
+    return test_database
+
+
+def _create_group(test_db, admin_lists_group: bool, age: timedelta, members: int = 1) -> ObjectId:
+    group_id = ObjectId()
+    member_ids = [
+        test_db["users"].insert_one({"username": f"member{i}", "group_ids": [group_id] if admin_lists_group or i else []}).inserted_id
+        for i in range(members)
+    ]
+    test_db["groups"].insert_one({
+        "_id": group_id,
+        "group_name": "Some group",
+        "group_admin_id": member_ids[0],
+        "users_in_group": member_ids,
+        "created_at": datetime.now(timezone.utc) - age,
+    })
+    return group_id
+
+
+def test_remove_orphaned_groups(test_db):
+    orphaned = _create_group(test_db, admin_lists_group=False, age=timedelta(hours=2))
+    being_created = _create_group(test_db, admin_lists_group=False, age=timedelta(seconds=1))
+    healthy = _create_group(test_db, admin_lists_group=True, age=timedelta(hours=2))
+    with_members = _create_group(test_db, admin_lists_group=False, age=timedelta(hours=2), members=2)
+
+    celery_worker.remove_orphaned_groups()
+
+    remaining = {group["_id"] for group in test_db["groups"].find()}
+    assert orphaned not in remaining
+    assert remaining == {being_created, healthy, with_members}
+
+
+def test_stamp_pending_revisions(test_db):
+    group_id = ObjectId()
+    test_db["groups"].insert_one({"_id": group_id, "revision": 4})
+    stuck = test_db["chores"].insert_one({"group_id": group_id, "revision": PENDING_REVISION}).inserted_id
+    stamped = test_db["chores"].insert_one({"group_id": group_id, "revision": 2}).inserted_id
+    tombstone = test_db["chore_tombstones"].insert_one({"group_id": group_id, "revision": PENDING_REVISION}).inserted_id
+
+    celery_worker.stamp_pending_revisions()
+
+    assert test_db["groups"].find_one({"_id": group_id})["revision"] == 5
+    assert test_db["chores"].find_one({"_id": stuck})["revision"] == 5
+    assert test_db["chores"].find_one({"_id": stamped})["revision"] == 2
+    assert test_db["chore_tombstones"].find_one({"_id": tombstone})["revision"] == 5
+
+
+def test_expire_chore_tombstones(test_db):
+    group_id = ObjectId()
+    test_db["groups"].insert_one({"_id": group_id, "revision": 9})
+    long_ago = datetime.now(timezone.utc) - timedelta(days=celery_worker.settings.CHORE_TOMBSTONE_EXPIRE_DAYS + 1)
+    for revision, deleted_at in ((3, long_ago), (6, long_ago), (8, datetime.now(timezone.utc))):
+        test_db["chore_tombstones"].insert_one({"group_id": group_id, "revision": revision, "deleted_at": deleted_at})
+
+    celery_worker.expire_chore_tombstones()
+
+    assert [tombstone["revision"] for tombstone in test_db["chore_tombstones"].find()] == [8]
+    assert test_db["groups"].find_one({"_id": group_id})["tombstones_expired_revision"] == 6
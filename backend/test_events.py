@@ -0,0 +1,51 @@
+import pytest
+
+from backend.events import EVICTED, EventHub
+
+
+@pytest.mark.asyncio
+async def test_publish_delivers_to_group_subscribers():
+    hub = EventHub(queue_size=2)
+    subscription = hub.subscribe("group-a")
+    other_group = hub.subscribe("group-b")
+
+    hub.publish("group-a", {"type": "chore_created"})
+
+    assert subscription.queue.get_nowait() == {"type": "chore_created"}
+    assert other_group.queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_evicted():
+    hub = EventHub(queue_size=2)
+    slow = hub.subscribe("group-a")
+    fast = hub.subscribe("group-a")
+
+    hub.publish("group-a", {"revision": 1})
+    fast.queue.get_nowait()
+    hub.publish("group-a", {"revision": 2})
+    fast.queue.get_nowait()
+    hub.publish("group-a", {"revision": 3})
+
+    # Its pending events are dropped and its stream ends
+    assert slow.queue.get_nowait() is EVICTED
+    assert slow.queue.empty()
+    assert hub.evictions == 1
+
+    # Other subscribers keep getting events, the evicted one doesn't
+    assert fast.queue.get_nowait() == {"revision": 3}
+    hub.publish("group-a", {"revision": 4})
+    assert slow.queue.empty()
+    assert fast.queue.get_nowait() == {"revision": 4}
+
+
+@pytest.mark.asyncio
+async def test_stop_ends_every_stream_without_counting_evictions():
+    hub = EventHub(queue_size=2)
+    await hub.start()
+    subscription = hub.subscribe("group-a")
+
+    await hub.stop()
+
+    assert subscription.queue.get_nowait() is EVICTED
+    assert hub.evictions == 0
@@ -0,0 +1,60 @@
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from backend.indexes import IndexBuildError, check_indexes, ensure_indexes
+from backend.settings import get_settings
+
+settings = get_settings()
+
+
+@pytest.fixture
+def test_db():
+    # In-memory MongoDB for testing
+    mock_client = AsyncMongoMockClient()
+    yield mock_client.get_database("testdb_indexes")
+    mock_client.close()
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_with_unhashed_tokens(test_db):
+    # Tokens stored in plain text, before token_hash existed
+    await test_db[settings.PASSWORD_RESET_COLLECTION].insert_many([
+        {"email": "first@example.com", "token": "plain-token-1"},
+        {"email": "second@example.com", "token": "plain-token-2"},
+    ])
+    await test_db[settings.PASSWORD_RESET_COLLECTION].insert_one({"email": "third@example.com", "token_hash": "digest"})
+
+    await ensure_indexes(test_db)
+
+    remaining = await test_db[settings.PASSWORD_RESET_COLLECTION].find({}, {"_id": 0, "email": 1}).to_list(length=None)
+    assert remaining == [{"email": "third@example.com"}]
+    # Indexes after the token ones were created too, TTL included
+    assert "created_at_1" in await test_db[settings.PASSWORD_RESET_COLLECTION].index_information()
+    assert "deleted_at_1" in await test_db[settings.CHORE_TOMBSTONES_COLLECTION].index_information()
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_reports_every_failure(test_db):
+    # Duplicates that stop both unique indexes on users from being created
+    await test_db[settings.USERS_COLLECTION].insert_many([
+        {"username": "twin", "email": "twin@example.com"},
+        {"username": "twin", "email": "twin@example.com"},
+    ])
+
+    with pytest.raises(IndexBuildError) as error:
+        await ensure_indexes(test_db)
+    assert "username_1" in str(error.value)
+    assert "email_1" in str(error.value)
+
+    # The other indexes were still created
+    assert "group_ids_1" in await test_db[settings.USERS_COLLECTION].index_information()
+    assert "deleted_at_1" in await test_db[settings.CHORE_TOMBSTONES_COLLECTION].index_information()
+
+
+@pytest.mark.asyncio
+async def test_check_indexes(test_db):
+    with pytest.raises(IndexBuildError):
+        await check_indexes(test_db, unique=True)
+
+    await ensure_indexes(test_db, unique=True)
+    await check_indexes(test_db, unique=True)
@@ -0,0 +1,47 @@
+import asyncio
+import sys
+import time
+
+import pytest
+
+from backend.loop_monitor import LoopMonitor, blocking_calls
+from backend.metrics import BACKGROUND_OPERATION, event_loop_lag_seconds, measured_coroutine
+
+
+def _lag_count_and_sum() -> tuple[float, float]:
+    samples = {name: value for name, labels, value in event_loop_lag_seconds.samples()}
+    return samples.get("event_loop_lag_seconds_count", 0), samples.get("event_loop_lag_seconds_sum", 0.0)
+
+
+def hold_the_loop():
+    time.sleep(0.3)
+
+
+async def blocking_handler():
+    hold_the_loop()
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_recorded():
+    blocking_calls.clear()
+    count_before, sum_before = _lag_count_and_sum()
+    monitor = asyncio.create_task(LoopMonitor(0.01, blocking_threshold=0.05).run())
+    await asyncio.sleep(0.05)
+
+    # In a task of its own, like each connection's in the server
+    await asyncio.create_task(measured_coroutine("GET /blocking", blocking_handler()))
+    # Give the watchdog time to see the loop running again
+    await asyncio.sleep(0.1)
+    monitor.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await monitor
+
+    [blocking_call] = blocking_calls
+    # The operation is read with Task.get_context, new in Python 3.12
+    assert blocking_call["operation"] == ("GET /blocking" if sys.version_info >= (3, 12) else BACKGROUND_OPERATION)
+    assert blocking_call["duration_ms"] >= 200
+    assert any("hold_the_loop" in line for line in blocking_call["stack"])
+
+    count_after, sum_after = _lag_count_and_sum()
+    assert count_after > count_before
+    assert sum_after - sum_before >= 0.2
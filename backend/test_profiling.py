@@ -0,0 +1,75 @@
+import re
+import time
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from fastapi.testclient import TestClient
+
+from backend.profiling import ProfilingMiddleware
+from backend.settings import get_settings
+
+settings = get_settings()
+
+
+async def slow_endpoint(request):
+    # Blocks the loop, so the samples land in this frame
+    time.sleep(0.1)
+    return PlainTextResponse("done")
+
+
+@pytest.fixture
+def profiler(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", "profile-token")
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(settings, "PROFILING_INTERVAL_MS", 1.0)
+    monkeypatch.setattr(settings, "PROFILING_DIR", str(tmp_path))
+    return ProfilingMiddleware(Starlette(routes=[Route("/slow", slow_endpoint)]))
+
+
+def test_profile_selected_by_token(profiler, tmp_path):
+    with TestClient(profiler) as client:
+        response = client.get("/slow", headers={"X-Profile-Token": "profile-token"})
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+
+    [profile] = tmp_path.glob("*.collapsed")
+    assert profile.name.endswith(f"-GET_slow-{profile_id}.collapsed")
+    lines = profile.read_text().splitlines()
+    assert lines
+    # `frame;frame;... count`, one line per distinct stack
+    assert all(re.fullmatch(r"\S.* \d+", line) for line in lines)
+    assert any(line.startswith("profiled request;") and "slow_endpoint" in line for line in lines)
+
+
+def test_profile_wrong_token(profiler, tmp_path):
+    with TestClient(profiler) as client:
+        response = client.get("/slow", headers={"X-Profile-Token": "guessed-token"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert list(tmp_path.glob("*.collapsed")) == []
+
+
+def test_only_newest_profiles_kept(profiler, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_MAX_PROFILES", 2)
+
+    with TestClient(profiler) as client:
+        profile_ids = [
+            client.get("/slow", headers={"X-Profile-Token": "profile-token"}).headers["X-Profile-Id"]
+            for _ in range(3)
+        ]
+
+    kept = sorted(profile.stem.rsplit("-", 1)[1] for profile in tmp_path.glob("*.collapsed"))
+    assert kept == sorted(profile_ids[1:])
+
+
+def test_one_profile_at_a_time(profiler, tmp_path):
+    # Another request is being profiled
+    profiler._busy = True
+
+    with TestClient(profiler) as client:
+        response = client.get("/slow", headers={"X-Profile-Token": "profile-token"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert list(tmp_path.glob("*.collapsed")) == []
@@ -0,0 +1,64 @@
+from unittest.mock import patch
+
+import pytest
+from celery.schedules import crontab
+
+from backend.celery_worker import forgot_password_requested_task
+from backend.task_dispatcher import InProcessDispatcher, TaskQueueFull
+
+
+@pytest.mark.asyncio
+async def test_submit_raises_when_queue_is_full():
+    dispatcher = InProcessDispatcher(workers=1, queue_size=1)
+    await dispatcher.start()
+    try:
+        # The consumer only picks tasks up once the loop runs it, so the first stays queued
+        dispatcher.submit(forgot_password_requested_task, ("first@example.com",), {})
+        with pytest.raises(TaskQueueFull):
+            dispatcher.submit(forgot_password_requested_task, ("second@example.com",), {})
+    finally:
+        with patch.object(forgot_password_requested_task, "run"):
+            await dispatcher.stop(timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_submit_before_start_raises():
+    dispatcher = InProcessDispatcher(workers=1, queue_size=1)
+    with pytest.raises(RuntimeError):
+        dispatcher.submit(forgot_password_requested_task, (), {})
+
+
+BEAT_SCHEDULE = {
+    "stamp-pending-revisions": {"task": "backend.celery_worker.stamp_pending_revisions", "schedule": 600.0},
+}
+
+
+@pytest.mark.asyncio
+async def test_one_process_runs_the_beat_schedule(tmp_path):
+    # Separate API processes on one machine, sharing the lock file
+    first = InProcessDispatcher(workers=1, queue_size=1, beat_lock_file=str(tmp_path / "beat.lock"))
+    second = InProcessDispatcher(workers=1, queue_size=1, beat_lock_file=str(tmp_path / "beat.lock"))
+    await first.start(BEAT_SCHEDULE)
+    await second.start(BEAT_SCHEDULE)
+    try:
+        # A consumer each, and the periodic task only in the first
+        assert len(first._consumers) == 2
+        assert len(second._consumers) == 1
+    finally:
+        await first.stop(timeout=1)
+        await second.stop(timeout=1)
+
+    # The lock is released on stop
+    third = InProcessDispatcher(workers=1, queue_size=1, beat_lock_file=str(tmp_path / "beat.lock"))
+    await third.start(BEAT_SCHEDULE)
+    assert len(third._consumers) == 2
+    await third.stop(timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_crontab_beat_schedule_rejected():
+    dispatcher = InProcessDispatcher(workers=1, queue_size=1)
+    schedule = {"nightly": {"task": "backend.celery_worker.stamp_pending_revisions", "schedule": crontab(hour=3, minute=0)}}
+
+    with pytest.raises(ValueError, match="nightly"):
+        await dispatcher.start(schedule)
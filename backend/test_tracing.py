@@ -0,0 +1,21 @@
+import json
+import time
+
+from backend.tracing import JsonlExporter
+
+
+def test_exporter_appends_one_line_per_span(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    path.write_text('{"name": "earlier"}\n')
+    exporter = JsonlExporter(str(path))
+
+    for i in range(3):
+        exporter.export({"name": f"span {i}", "attributes": {"padding": "x" * 10_000}})
+
+    # Written by the exporter's thread
+    deadline = time.monotonic() + 5
+    while len(path.read_text().splitlines()) < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    names = [json.loads(line)["name"] for line in path.read_text().splitlines()]
+    assert names == ["earlier", "span 0", "span 1", "span 2"]
@@ -0,0 +1,82 @@
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+from celery.app.task import Context
+
+from backend import worker_metrics
+from backend.metrics import celery_task_queue_wait_seconds, celery_task_runtime_seconds, celery_tasks
+from backend.worker_metrics import PUBLISHED_AT_HEADER, MetricsFileWriter, _task_finished, _task_started
+
+
+def _sample(metric, name: str, labels: tuple[str, ...]) -> float:
+    return next((value for sample_name, sample_labels, value in metric.samples()
+                 if sample_name == name and sample_labels == labels), 0)
+
+
+def _fake_task(name: str, **request) -> SimpleNamespace:
+    return SimpleNamespace(name=name, request=Context(request))
+
+
+@pytest.fixture(autouse=True)
+def no_metrics_file(monkeypatch):
+    monkeypatch.setattr(worker_metrics, "metrics_file_writer", MetricsFileWriter(None, 60))
+
+
+def test_queue_wait_and_runtime():
+    task = _fake_task("tests.timed", **{PUBLISHED_AT_HEADER: time.time() - 2})
+    waits_before = _sample(celery_task_queue_wait_seconds, "celery_task_queue_wait_seconds_count", ("tests.timed",))
+    waited_before = _sample(celery_task_queue_wait_seconds, "celery_task_queue_wait_seconds_sum", ("tests.timed",))
+    runs_before = _sample(celery_task_runtime_seconds, "celery_task_runtime_seconds_count", ("tests.timed",))
+    ran_before = _sample(celery_task_runtime_seconds, "celery_task_runtime_seconds_sum", ("tests.timed",))
+
+    _task_started("timed-task-id", task)
+    time.sleep(0.05)
+    _task_finished("timed-task-id", task, state="SUCCESS")
+
+    assert _sample(celery_task_queue_wait_seconds, "celery_task_queue_wait_seconds_count", ("tests.timed",)) == waits_before + 1
+    waited = _sample(celery_task_queue_wait_seconds, "celery_task_queue_wait_seconds_sum", ("tests.timed",)) - waited_before
+    assert 2 <= waited < 10
+    assert _sample(celery_task_runtime_seconds, "celery_task_runtime_seconds_count", ("tests.timed",)) == runs_before + 1
+    ran = _sample(celery_task_runtime_seconds, "celery_task_runtime_seconds_sum", ("tests.timed",)) - ran_before
+    assert 0.05 <= ran < 2
+
+
+def test_outcomes_counted():
+    task = _fake_task("tests.counted")
+    for i, state in enumerate(("SUCCESS", "FAILURE", "RETRY", "FAILURE")):
+        _task_started(f"counted-task-{i}", task)
+        _task_finished(f"counted-task-{i}", task, state=state)
+
+    # Detached coroutine runs are recorded by AsyncIOTask when they finish
+    detached = _fake_task("tests.counted", detached=True)
+    _task_started("detached-task", detached)
+    _task_finished("detached-task", detached, state="SUCCESS")
+
+    assert _sample(celery_tasks, "celery_tasks_total", ("tests.counted", "SUCCESS")) == 1
+    assert _sample(celery_tasks, "celery_tasks_total", ("tests.counted", "FAILURE")) == 2
+    assert _sample(celery_tasks, "celery_tasks_total", ("tests.counted", "RETRY")) == 1
+
+
+def test_metrics_file(tmp_path, monkeypatch):
+    writer = MetricsFileWriter(str(tmp_path), 3600)
+    path = tmp_path / f"worker-{os.getpid()}.prom"
+    replaced = []
+    replace = os.replace
+
+    def recording_replace(source, destination):
+        replaced.append((str(source), str(destination)))
+        replace(source, destination)
+
+    monkeypatch.setattr(os, "replace", recording_replace)
+    writer.ensure_started()
+    writer.write()
+
+    # Renamed into place from a temporary file
+    assert replaced == [(f"{path}.tmp", str(path))]
+    assert f'pid="{os.getpid()}"' in path.read_text()
+    assert [file.name for file in tmp_path.iterdir()] == [path.name]
+
+    writer.stop()
+    assert not path.exists()
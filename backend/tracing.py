@@ -0,0 +1,244 @@
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from celery.signals import before_task_publish
+
+from .settings import get_settings
+
+settings = get_settings()
+
+# W3C trace context header, in HTTP requests and Celery task messages
+TRACEPARENT_HEADER = "traceparent"
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+class Span:
+    """
+    Description
+    -----------
+    One timed step of a traced user action: a request, a task run, or a
+    MongoDB command, S3 call or email send made on its behalf. Exported
+    when it ends, with OTLP-style field names.
+    """
+
+    def __init__(self, name: str, trace_id: str, parent_id: str | None, attributes: dict | None = None) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.error: str | None = None
+        self._start_ns = time.time_ns()
+        self._start = time.perf_counter()
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def end(self, error: BaseException | str | None = None) -> None:
+        if error is not None:
+            self.error = error if isinstance(error, str) else f"{type(error).__name__}: {error}"
+        duration_ns = int((time.perf_counter() - self._start) * 1_000_000_000)
+        exporter.export({
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": self._start_ns,
+            "endTimeUnixNano": self._start_ns + duration_ns,
+            "durationMs": round(duration_ns / 1_000_000, 3),
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+            "pid": os.getpid(),
+        })
+
+
+class JsonlExporter:
+    """
+    Description
+    -----------
+    Appends finished spans to `path`, one JSON object per line, from a
+    background thread so the event loop never waits on the disk. Every
+    process (API, each Celery worker process) appends to the same file.
+    Each line is written with its own `os.write` to a file opened with
+    O_APPEND, so the kernel appends it whole, and lines from different
+    processes don't interleave (on a local filesystem).
+    """
+
+    def __init__(self, path: str | None) -> None:
+        self.path = path
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._pid: int | None = None
+
+    def export(self, span: dict) -> None:
+        self._ensure_started()
+        self._queue.put(span)
+
+    def _ensure_started(self) -> None:
+        # Prefork children inherit the parent's memory but not its threads
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.SimpleQueue()
+                threading.Thread(target=self._run, args=(self._queue,), name="span-exporter", daemon=True).start()
+                self._pid = os.getpid()
+
+    def _run(self, spans: queue.SimpleQueue) -> None:
+        while True:
+            batch = [spans.get()]
+            while not spans.empty():
+                batch.append(spans.get())
+            try:
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    for span in batch:
+                        line = (json.dumps(span, default=str) + "\n").encode()
+                        # A regular file takes the whole line in one write
+                        os.write(fd, line)
+                finally:
+                    os.close(fd)
+            except OSError:
+                logging.exception("Failed to export %d spans to %s", len(batch), self.path)
+
+
+exporter = JsonlExporter(settings.TRACING_FILE)
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def tracing_enabled() -> bool:
+    return exporter.path is not None
+
+
+def current_traceparent() -> str | None:
+    """`traceparent` header for work started on behalf of the current span, if any."""
+    span = _current_span.get()
+    return span.traceparent if span is not None else None
+
+
+def start_span(name: str, attributes: dict | None = None, traceparent: str | None = None, root: bool = False) -> Span | None:
+    """
+    Starts a span under `traceparent` if given (and valid), else under the
+    current span. Without either, starts a new trace if `root` is set and
+    returns None otherwise, so commands made outside a traced request or
+    task aren't exported. The caller must `end()` the span.
+    """
+    if not tracing_enabled():
+        return None
+
+    match = _TRACEPARENT.match(traceparent or "")
+    if match is not None:
+        return Span(name, match[1], match[2], attributes)
+
+    parent = _current_span.get()
+    if parent is not None:
+        return Span(name, parent.trace_id, parent.span_id, attributes)
+    if root:
+        return Span(name, secrets.token_hex(16), None, attributes)
+    return None
+
+
+@contextmanager
+def span(name: str, attributes: dict | None = None, traceparent: str | None = None, root: bool = False) -> Iterator[Span | None]:
+    """`start_span`, as the current span until the block ends (see `start_span`)."""
+    started = start_span(name, attributes, traceparent, root)
+    if started is None:
+        yield None
+        return
+
+    token = _current_span.set(started)
+    try:
+        yield started
+    except BaseException as exc:
+        started.error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        _current_span.reset(token)
+        started.end()
+
+
+def traced(name: str, fn: Callable, traceparent: str | None = None) -> Callable:
+    """`fn` run in a root span, e.g. a task body on another thread (see metrics.measured)."""
+    def wrapper(*args, **kwargs):
+        with span(name, traceparent=traceparent, root=True):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+async def traced_coroutine(name: str, coro, traceparent: str | None = None):
+    """Awaits `coro` in a root span."""
+    with span(name, traceparent=traceparent, root=True):
+        return await coro
+
+
+def trace_boto_client(client) -> None:
+    """Records a span for every call `client` makes (put_object, delete_object, ...)."""
+    def before_parameter_build(params, model, context, **kwargs):
+        context["span"] = start_span(f"s3 {model.name}", {"s3.bucket": params.get("Bucket"), "s3.key": params.get("Key")})
+
+    def after_call(http_response, context, **kwargs):
+        started = context.pop("span", None)
+        if started is not None:
+            started.attributes["http.status_code"] = http_response.status_code
+            started.end(f"HTTP {http_response.status_code}" if http_response.status_code >= 300 else None)
+
+    def after_call_error(exception, context, **kwargs):
+        started = context.pop("span", None)
+        if started is not None:
+            started.end(exception)
+
+    client.meta.events.register("before-parameter-build.s3.*", before_parameter_build)
+    client.meta.events.register("after-call.s3.*", after_call)
+    client.meta.events.register("after-call-error.s3.*", after_call_error)
+
+
+@before_task_publish.connect
+def _propagate_trace(headers: dict | None = None, **kwargs) -> None:
+    traceparent = current_traceparent()
+    if headers is not None and traceparent is not None:
+        headers[TRACEPARENT_HEADER] = traceparent
+
+
+def summarize(path: str) -> list[dict]:
+    """
+    End-to-end latency of each trace in the span file at `path`: from its
+    root span (e.g. the request) starting to its last span (e.g. the email
+    its task sent) ending, slowest first.
+    """
+    traces = defaultdict(list)
+    with open(path) as file:
+        for line in file:
+            recorded = json.loads(line)
+            traces[recorded["traceId"]].append(recorded)
+
+    summaries = []
+    for trace_id, spans in traces.items():
+        root = min(spans, key=lambda recorded: recorded["startTimeUnixNano"])
+        end = max(recorded["endTimeUnixNano"] for recorded in spans)
+        summaries.append({
+            "trace_id": trace_id,
+            "action": root["name"],
+            "end_to_end_ms": round((end - root["startTimeUnixNano"]) / 1_000_000, 1),
+            "spans": len(spans),
+            "errors": [recorded["name"] for recorded in spans if recorded["status"]["code"] == "ERROR"],
+        })
+    return sorted(summaries, key=lambda summary: summary["end_to_end_ms"], reverse=True)
+
+
+if __name__ == "__main__":
+    # python -m backend.tracing [TRACING_FILE]
+    for summary in summarize(sys.argv[1] if len(sys.argv) > 1 else settings.TRACING_FILE):
+        print(json.dumps(summary))
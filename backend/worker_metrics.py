@@ -0,0 +1,118 @@
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from celery.signals import before_task_publish, task_postrun, task_prerun, worker_process_shutdown
+
+from .metrics import celery_task_queue_wait_seconds, celery_task_runtime_seconds, celery_tasks, registry
+from .settings import get_settings
+
+settings = get_settings()
+
+# Message header with the wall clock time a task was published at
+PUBLISHED_AT_HEADER = "published_at"
+
+
+class MetricsFileWriter:
+    """
+    Description
+    -----------
+    Writes this process's metrics registry to `worker-<pid>.prom` in
+    `directory` every `interval` seconds, for node_exporter's textfile
+    collector (or anything else that reads Prometheus text files).
+
+    Celery's prefork children each have their own registry, so each
+    process writes its own file, with a `pid` label on every sample.
+    Started lazily by the first task a process runs, and its file is
+    removed when the process exits.
+    """
+
+    def __init__(self, directory: str | None, interval: float) -> None:
+        self._directory = Path(directory) if directory else None
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pid: int | None = None
+
+    @property
+    def _path(self) -> Path:
+        return self._directory / f"worker-{os.getpid()}.prom"
+
+    def ensure_started(self) -> None:
+        if self._directory is None:
+            return
+        # Prefork children inherit the parent's memory but not its threads
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop = threading.Event()
+            self._directory.mkdir(parents=True, exist_ok=True)
+            threading.Thread(target=self._run, args=(self._stop,), name="metrics-file-writer", daemon=True).start()
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            self._pid = None
+            self._stop.set()
+        self._path.unlink(missing_ok=True)
+
+    def _run(self, stop: threading.Event) -> None:
+        while not stop.wait(self._interval):
+            try:
+                self.write()
+            except OSError:
+                logging.exception("Failed to write worker metrics to %s", self._path)
+
+    def write(self) -> None:
+        # Written to a temporary file and renamed, so readers never see half a file
+        temporary_path = self._path.with_suffix(".prom.tmp")
+        temporary_path.write_text(registry.render({"pid": str(os.getpid())}))
+        os.replace(temporary_path, self._path)
+
+
+metrics_file_writer = MetricsFileWriter(settings.WORKER_METRICS_DIR, settings.WORKER_METRICS_INTERVAL_SECONDS)
+
+# perf_counter at which each running task (by id) started
+_started_at: dict[str, float] = {}
+
+
+def record_task_run(task_name: str, seconds: float, state: str) -> None:
+    """Records a finished run of `task_name` (see AsyncIOTask for detached runs)."""
+    celery_task_runtime_seconds.observe((task_name,), seconds)
+    celery_tasks.inc((task_name, state))
+
+
+@before_task_publish.connect
+def _stamp_published_at(headers: dict | None = None, **kwargs) -> None:
+    if headers is not None:
+        headers[PUBLISHED_AT_HEADER] = time.time()
+
+
+@task_prerun.connect
+def _task_started(task_id: str, task, **kwargs) -> None:
+    metrics_file_writer.ensure_started()
+    _started_at[task_id] = time.perf_counter()
+
+    published_at = task.request.get(PUBLISHED_AT_HEADER)
+    if published_at is not None:
+        # Clocks of the publishing and worker machines may disagree a little
+        celery_task_queue_wait_seconds.observe((task.name,), max(time.time() - published_at, 0.0))
+
+
+@task_postrun.connect
+def _task_finished(task_id: str, task, state: str | None = None, **kwargs) -> None:
+    # Sent for every outcome (SUCCESS, FAILURE, RETRY, ...), so it counts failures and retries too
+    started_at = _started_at.pop(task_id, None)
+    # Detached coroutine runs are recorded when they finish (see async_tasks.py)
+    if started_at is None or task.request.get("detached"):
+        return
+    record_task_run(task.name, time.perf_counter() - started_at, state or "SUCCESS")
+
+
+@worker_process_shutdown.connect
+def _remove_metrics_file(**kwargs) -> None:
+    metrics_file_writer.stop()